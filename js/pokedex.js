@@ -7,6 +7,22 @@ if (!userParam) {
 
 const jsonPath = `data/${userParam}.json`;
 
+// Only the small manifest is cache-busted; data/v/<user>.<hash>.json never
+// changes once written, so the browser cache can serve it until the hash moves.
+const manifestPath = "data/manifest.json";
+const patchFeedPath = `data/${userParam}.patches.json`;
+
+// Newest trainer file schema this page understands
+const SUPPORTED_SCHEMA_VERSION = 2;
+
+// Sibling suffix -> DecompressionStream format, smallest first
+const COMPRESSED_FORMATS = [
+  ["br", "brotli"],
+  ["gz", "gzip"]
+];
+
+const encodingStorageKey = `dexforge-encodings-${userParam}`;
+
 console.log("Loading Pokédex from:", jsonPath);
 
 let allPokemon = [];
@@ -33,31 +49,294 @@ document.addEventListener("click", (e) => {
 });
 
 
-fetch(`${jsonPath}?v=${Date.now()}`)
-  .then(response => {
-    if (!response.ok) {
-      throw new Error(`Failed to load ${jsonPath}`);
-    }
-    return response.json();
-  })
+loadTrainerData()
+  .then(data => data.format === "split" ? loadSplitTrainer(data) : data)
   .then(data => {
     allPokemon = data.pokemon;
+    filterIndex = loadFilterIndex(data.filters, data.pokemon);
     populateRegionFilter(allPokemon);
     populateTypeFilter(allPokemon);
     buildStageFilter(allPokemon);
     renderPokemon(allPokemon);
-    renderUser(data.user);
-    renderTrainerSummary(data.trainer_stats);
-    renderRegions(data.trainer_stats);
-    renderTypeMastery(data.trainer_stats);
-    renderCapturePerformance(data.trainer_stats);
-    renderJourney(data.trainer_stats);
-    renderCompanion(data);
+    renderTrainerView(data);
+    followPatchFeed(data);
   })
   .catch(error => {
     console.error(error);
   });
 
+function renderTrainerView(data) {
+  renderUser(data.user);
+  renderTrainerSummary(data.trainer_stats);
+  renderRegions(data.trainer_stats);
+  renderTypeMastery(data.trainer_stats);
+  renderCapturePerformance(data.trainer_stats);
+  renderJourney(data.trainer_stats);
+  renderCompanion(data);
+}
+
+// ---- TRAINER FILE LOADING (PLAIN OR PRECOMPRESSED) ----
+
+function decodableEncoding(encodings) {
+  if (!("DecompressionStream" in window)) return null;
+
+  for (const [suffix, format] of COMPRESSED_FORMATS) {
+    if (!encodings.includes(suffix)) continue;
+
+    try {
+      new DecompressionStream(format);
+      return [suffix, format];
+    } catch (e) {
+      // Browser can't decode this one, try the next
+    }
+  }
+
+  return null;
+}
+
+function fetchPlainTrainer(url = `${jsonPath}?v=${Date.now()}`) {
+  return fetch(url)
+    .then(response => {
+      if (!response.ok) {
+        throw new Error(`Failed to load ${url}`);
+      }
+      return response.json();
+    })
+    .then(data => {
+      // Remember which siblings the file advertises for the next load
+      localStorage.setItem(encodingStorageKey, JSON.stringify(data.encodings || []));
+      return data;
+    });
+}
+
+function fetchCompressedTrainer(suffix, format, url = `${jsonPath}.${suffix}?v=${Date.now()}`) {
+  return fetch(url)
+    .then(response => {
+      if (!response.ok) {
+        throw new Error(`Failed to load ${url}`);
+      }
+      return new Response(response.body.pipeThrough(new DecompressionStream(format))).json();
+    })
+    .then(data => {
+      if (!data.schema_version || data.schema_version > SUPPORTED_SCHEMA_VERSION) {
+        throw new Error(`Unsupported schema in ${url}`);
+      }
+      return data;
+    });
+}
+
+// ---- CONTENT-HASHED FILES (data/manifest.json) ----
+
+function fetchManifestEntry() {
+  return fetch(`${manifestPath}?v=${Date.now()}`)
+    .then(response => response.ok ? response.json() : null)
+    .then(manifest => (manifest && manifest.trainers &&
+                       manifest.trainers[userParam.toLowerCase()]) || null)
+    .catch(() => null);
+}
+
+function fetchHashedTrainer(entry) {
+  const hashedPath = `data/${entry.file}`;
+  const choice = decodableEncoding(entry.encodings || []);
+
+  if (!choice) return fetchPlainTrainer(hashedPath);
+
+  return fetchCompressedTrainer(...choice, `${hashedPath}.${choice[0]}`).catch(error => {
+    console.warn(error);
+    return fetchPlainTrainer(hashedPath);
+  });
+}
+
+function loadTrainerData() {
+  // No manifest (or no entry yet): load the latest file as before
+  return fetchManifestEntry().then(entry => {
+    if (!entry) return loadLatestTrainer();
+
+    return fetchHashedTrainer(entry).catch(error => {
+      console.warn(error);
+      return loadLatestTrainer();
+    });
+  });
+}
+
+function loadLatestTrainer() {
+  let encodings = [];
+
+  try {
+    encodings = JSON.parse(localStorage.getItem(encodingStorageKey)) || [];
+  } catch (e) {
+    encodings = [];
+  }
+
+  const choice = decodableEncoding(encodings);
+
+  if (!choice) return fetchPlainTrainer();
+
+  // Any problem with the compressed copy falls back to the plain file
+  return fetchCompressedTrainer(...choice).catch(error => {
+    console.warn(error);
+    return fetchPlainTrainer();
+  });
+}
+
+// ---- LIVE PATCH FEED (data/<user>.patches.json) ----
+
+// Trainer files generated with PATCH_FEED carry a "revision"; the feed holds
+// the patches between recent revisions. Anything the ring can't bridge
+// fetches the whole trainer file again, at most once per feed revision.
+const SUPPORTED_PATCH_FEED_VERSION = 1;
+const PATCH_POLL_INTERVAL = 5000;
+
+let liveTrainer = null;
+let patchPoller = null;
+// Feed revision the last full fetch was for; a file still behind it waits
+// for the feed to move on instead of being fetched every poll.
+let resyncedRevision = null;
+
+function followPatchFeed(data) {
+  if (typeof data.revision !== "number") return;
+
+  liveTrainer = {
+    data,
+    revision: data.revision,
+    pokemonByKey: new Map(data.pokemon.map(p => [p.name.toLowerCase(), p]))
+  };
+
+  if (!patchPoller) patchPoller = setInterval(pollPatchFeed, PATCH_POLL_INTERVAL);
+}
+
+function resyncTrainer(feedRevision) {
+  if (resyncedRevision !== null && feedRevision <= resyncedRevision) return;
+  resyncedRevision = feedRevision;
+
+  loadTrainerData()
+    .then(data => data.format === "split" ? loadSplitTrainer(data) : data)
+    .then(data => {
+      allPokemon = data.pokemon;
+      filterIndex = loadFilterIndex(data.filters, data.pokemon);
+      applyFilters();
+      renderTrainerView(data);
+      followPatchFeed(data);
+    })
+    .catch(error => console.warn(error));
+}
+
+function pollPatchFeed() {
+  fetch(`${patchFeedPath}?v=${Date.now()}`)
+    .then(response => response.ok ? response.json() : null)
+    .then(feed => {
+      if (!feed || feed.version !== SUPPORTED_PATCH_FEED_VERSION) return;
+      if (feed.revision <= liveTrainer.revision) return;
+
+      const pending = feed.patches.filter(patch => patch.from >= liveTrainer.revision);
+
+      if (!pending.length || pending[0].from !== liveTrainer.revision) {
+        resyncTrainer(feed.revision);
+        return;
+      }
+
+      pending.forEach(applyTrainerPatch);
+      applyFilters();
+      renderTrainerView(liveTrainer.data);
+    })
+    .catch(error => console.warn(error));
+}
+
+// Flag bitsets that follow per-trainer fields (see pokedex_filters.py)
+const PATCHED_FILTER_FLAGS = {
+  owned: p => p.owned,
+  line_complete: p => p.line_complete,
+  evolvable_now: p => p.evolvable_now,
+  friendship_points: p => p.friendship_points > 0
+};
+
+function updateFilterBits(pokemon) {
+  const i = filterIndex.pokemon.indexOf(pokemon);
+  if (i < 0) return;
+
+  Object.entries(PATCHED_FILTER_FLAGS).forEach(([name, test]) => {
+    const bits = filterIndex.flags[name];
+    if (!bits) return;
+
+    if (test(pokemon)) bits[i >> 3] |= 1 << (i & 7);
+    else bits[i >> 3] &= ~(1 << (i & 7));
+  });
+}
+
+function applyTrainerPatch(patch) {
+  const data = liveTrainer.data;
+
+  Object.entries(patch.pokemon || {}).forEach(([key, fields]) => {
+    const pokemon = liveTrainer.pokemonByKey.get(key);
+    if (!pokemon) return;
+
+    Object.assign(pokemon, fields);
+    pokemonCards.delete(pokemon);
+
+    if (filterIndex) updateFilterBits(pokemon);
+  });
+
+  (patch.stats || []).forEach(([path, value]) => {
+    let target = data.trainer_stats;
+
+    path.slice(0, -1).forEach(key => {
+      target = target[key] = target[key] || {};
+    });
+
+    if (path.length) target[path[path.length - 1]] = value;
+    else data.trainer_stats = value;
+  });
+
+  Object.assign(data, patch.sections || {});
+
+  data.updated_at = patch.at;
+  data.revision = patch.to;
+  liveTrainer.revision = patch.to;
+}
+
+// ---- SPLIT FORMAT (SHARED CATALOG + SLIM TRAINER FILE) ----
+
+function loadSplitTrainer(data) {
+  // The version in the query string keeps the catalog cacheable until it changes
+  const catalogPath = `data/${data.catalog.file}?v=${data.catalog.version}`;
+
+  return fetch(catalogPath)
+    .then(response => {
+      if (!response.ok) {
+        throw new Error(`Failed to load ${catalogPath}`);
+      }
+      return response.json();
+    })
+    .then(catalog => ({
+      ...data,
+      pokemon: joinCatalogPokemon(catalog, data.pokemon)
+    }));
+}
+
+function joinCatalogPokemon(catalog, trainerPokemon) {
+  return catalog.pokemon.map(species => {
+    // Slim files only list species the trainer has touched
+    const entry = trainerPokemon[species.name.toLowerCase()] || {};
+    const count = entry.count || 0;
+
+    const pokemon = {
+      ...species,
+      count,
+      owned: count > 0,
+      evolution_line: catalog.evolution_lines[species.evolution_line_id] || [],
+      line_complete: entry.line_complete || false,
+      evolvable_now: entry.evolvable_now || false,
+      friendship_points: entry.friendship_points || 0
+    };
+
+    if (species.friendship_requirement) {
+      pokemon.friendship_progress_percent = entry.friendship_progress_percent || 0;
+    }
+
+    return pokemon;
+  });
+}
+
 function renderUser(user) {
   const name = user.username;
   const possessive = name.endsWith("s") ? `${name}'` : `${name}'s`;
@@ -776,9 +1055,129 @@ function renderCompanion(data) {
     </div>
   `;
 }
+
+// ---- FILTER INDEX (PRECOMPUTED BITSETS) ----
+
+// Trainer files generated with FILTER_INDEX carry a "filters" section: one
+// bitset per filter value (bit i = pokemon[i]) plus normalized names, so a
+// filter change is a few byte-array ANDs. Older files use the predicate below.
+const SUPPORTED_FILTER_INDEX_VERSION = 1;
+
+let filterIndex = null;
+
+function decodeBitset(encoded) {
+  const binary = atob(encoded);
+  const bits = new Uint8Array(binary.length);
+
+  for (let i = 0; i < binary.length; i++) {
+    bits[i] = binary.charCodeAt(i);
+  }
+
+  return bits;
+}
+
+function decodeBitsets(sets) {
+  return Object.fromEntries(
+    Object.entries(sets).map(([value, encoded]) => [value, decodeBitset(encoded)])
+  );
+}
+
+function loadFilterIndex(filters, pokemonList) {
+  if (!filters ||
+      filters.version !== SUPPORTED_FILTER_INDEX_VERSION ||
+      filters.size !== pokemonList.length)
+    return null;
+
+  return {
+    // Own copy in bit order; renderPokemon sorts the list it is given in place
+    pokemon: pokemonList.slice(),
+    names: filters.names,
+    flags: decodeBitsets(filters.flags),
+    groups: Object.fromEntries(
+      Object.entries(filters.groups).map(([group, sets]) => [group, decodeBitsets(sets)])
+    ),
+    width: Math.ceil(pokemonList.length / 8),
+    lastSearch: { query: "", bits: null }
+  };
+}
+
+// ---- FILTER INDEX - SEARCH ----
+
+// Must match normalize_name() in python/pokedex_filters.py
+function normalizeSearch(text) {
+  return text.normalize("NFKD").replace(/\p{M}/gu, "").toLowerCase();
+}
+
+function searchBits(index, query) {
+  // Typing usually extends the last query, so only its matches need testing
+  const previous = index.lastSearch;
+  const candidates = previous.bits && query.startsWith(previous.query) ? previous.bits : null;
+  const bits = new Uint8Array(index.width);
+
+  index.names.forEach((name, i) => {
+    if (candidates && !(candidates[i >> 3] & (1 << (i & 7)))) return;
+    if (name.includes(query)) bits[i >> 3] |= 1 << (i & 7);
+  });
+
+  index.lastSearch = { query, bits };
+  return bits;
+}
+
+// ---- FILTER INDEX - FILTERING ----
+
+function filterWithIndex(index) {
+  const result = new Uint8Array(index.width).fill(0xff);
+  const none = new Uint8Array(index.width);
+
+  const keep = bits => {
+    for (let i = 0; i < result.length; i++) result[i] &= bits[i];
+  };
+  const drop = bits => {
+    for (let i = 0; i < result.length; i++) result[i] &= ~bits[i];
+  };
+  const flag = name => index.flags[name] || none;
+  const group = (name, value) => index.groups[name][value] || none;
+
+  if (activeFilters.search)
+    keep(searchBits(index, normalizeSearch(activeFilters.search)));
+
+  if (activeFilters.ownership === "owned") keep(flag("owned"));
+  if (activeFilters.ownership === "unowned") drop(flag("owned"));
+
+  if (activeFilters.region !== "all") keep(group("region", activeFilters.region));
+  if (activeFilters.type !== "all") keep(group("type", activeFilters.type));
+  if (activeFilters.stage !== "all") keep(group("stage", activeFilters.stage));
+
+  if (activeFilters.line === "complete") keep(flag("line_complete"));
+  if (activeFilters.line === "incomplete") drop(flag("line_complete"));
+
+  if (activeFilters.evolvable === "yes") keep(flag("evolvable_now"));
+  if (activeFilters.evolvable === "no") drop(flag("evolvable_now"));
+
+  // Special values are flag names (legendary, mythic, hatchable, stone, trade, friendship)
+  if (activeFilters.special !== "all" && index.flags[activeFilters.special])
+    keep(flag(activeFilters.special));
+
+  if (activeFilters.friendship === "has") keep(flag("friendship_points"));
+  if (activeFilters.friendship === "none") drop(flag("friendship_points"));
+
+  const filtered = [];
+
+  for (let i = 0; i < index.pokemon.length; i++) {
+    if (result[i >> 3] & (1 << (i & 7))) filtered.push(index.pokemon[i]);
+  }
+
+  return filtered;
+}
+
 // ---- FILTER BAR ----
 
 function applyFilters() {
+  if (filterIndex) {
+    renderPokemon(filterWithIndex(filterIndex));
+    return;
+  }
+
   const filtered = allPokemon.filter(pokemon => {
 
     // Search
@@ -984,13 +1383,23 @@ document.addEventListener("DOMContentLoaded", () => {
 
 // ---- POKEMON LIST ----
 
+// Cards only depend on the loaded data, so each is built once and reused
+const pokemonCards = new WeakMap();
+
 function renderPokemon(pokemonList) {
   const grid = document.getElementById("pokedex-grid");
-  grid.innerHTML = "";
+  const cards = document.createDocumentFragment();
 
   pokemonList.sort((a, b) => a.pokedex_number - b.pokedex_number);
 
   pokemonList.forEach(pokemon => {
+    const cached = pokemonCards.get(pokemon);
+
+    if (cached) {
+      cards.appendChild(cached);
+      return;
+    }
+
     const li = document.createElement("li");
     li.classList.add("pokemon-card");
 
@@ -1028,10 +1437,11 @@ function renderPokemon(pokemonList) {
       </div>
     `;
 
-    grid.appendChild(li);
+    pokemonCards.set(pokemon, li);
+    cards.appendChild(li);
   });
 
-
+  grid.replaceChildren(cards);
 }
 
 // ---- POKEMON CARD ----
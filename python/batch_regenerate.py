@@ -0,0 +1,207 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pokedex_helpers import safe_str
+from pokedex_catalog import load_catalog
+from pokedex_columnar import columnar_available
+from pokedex_output import OUTPUT_FORMATS, COMPRESSED_ENCODINGS
+import user_pokedex_script as pokedex
+
+
+# =========================
+# BATCH REGENERATION
+# =========================
+#
+# Rebuilds every trainer file in one go after a catalog change, instead of
+# firing the Mix It Up command once per trainer. Reads one row of Mix It Up
+# values per trainer (JSONL or CSV, keys named like INPUT_FIELDS with or
+# without the leading "$"), loads the catalog once per worker and fans the
+# builds out over a process pool.
+#
+#   python python/batch_regenerate.py trainers.jsonl --workers 8
+#
+# --incremental patches each existing file instead and leaves files whose
+# content would not change alone, so the watchdog has nothing to push.
+#
+# Files are built the way a Mix It Up run builds them, so with STORE_PATH,
+# PATCH_FEED or EVENTS_PATH set each trainer is also recorded in the store,
+# gets its next revision and patch, and has a "sync" event logged. Stop the
+# daemon first when EVENTS_PATH is set: the log takes one writer at a time.
+
+
+# =========================
+# INPUT EXPORTS
+# =========================
+
+def normalize_inputs(row):
+    return {
+        safe_str(key).lstrip("$"): "" if value is None else value
+        for key, value in row.items()
+        if key
+    }
+
+
+def read_trainer_inputs(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as export_file:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(export_file))
+        else:
+            rows = [json.loads(line) for line in export_file if line.strip()]
+
+    return [normalize_inputs(row) for row in rows]
+
+
+# =========================
+# WORKERS
+# =========================
+
+_worker_catalog = None
+
+
+def init_worker(csv_path, buddy_file_path):
+    global _worker_catalog
+    _worker_catalog = load_catalog(csv_path)
+
+    # Workers may be spawned fresh (Windows), so re-apply overrides here.
+    pokedex.BUDDY_FILE_PATH = buddy_file_path
+
+    # Each worker builds many trainers, so numpy's import cost is paid once (see COLUMNAR_STATS).
+    pokedex.COLUMNAR_STATS = columnar_available()
+
+
+def regenerate_trainer(inputs, data_dir, mode, incremental=False, output_format=None, encodings=None):
+    started = time.perf_counter()
+
+    username = safe_str(inputs.get("username"))
+
+    if not username:
+        raise ValueError("row has no username")
+
+    path = os.path.join(data_dir, pokedex.trainer_file_name(username))
+
+    # Same path as a Mix It Up run, so the store and the patch feed keep up.
+    state = pokedex.parse_trainer_inputs(inputs, _worker_catalog)
+    output, _ = pokedex.build_recorded_document(state, _worker_catalog, path, incremental)
+
+    if output is None:
+        return {
+            "username": username,
+            "path": path,
+            "bytes": 0,
+            "seconds": time.perf_counter() - started,
+            "unchanged": True
+        }
+
+    size = pokedex.write_trainer_document(
+        output, _worker_catalog, path,
+        mode=mode, data_path=data_dir, output_format=output_format, encodings=encodings
+    )
+
+    return {
+        "username": username,
+        "path": path,
+        "bytes": size,
+        "seconds": time.perf_counter() - started,
+        "unchanged": False
+    }
+
+
+# =========================
+# MAIN
+# =========================
+
+def regenerate_all(trainers, csv_path, data_dir, mode=None, workers=None, buddy_file_path=None,
+                   incremental=False, output_format=None, encodings=None):
+    # Compile (or refresh) the snapshot once up front so workers only unpickle it.
+    load_catalog(csv_path)
+
+    results = []
+    failures = []
+
+    # The event log takes one writer at a time, so its sync events go from here, not the workers.
+    if pokedex.EVENTS_PATH:
+        for inputs in trainers:
+            if safe_str(inputs.get("username")):
+                pokedex.record_sync_event(inputs)
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(csv_path, buddy_file_path or pokedex.BUDDY_FILE_PATH)
+    )
+
+    with pool:
+        futures = {}
+
+        for index, inputs in enumerate(trainers):
+            label = safe_str(inputs.get("username")) or f"row {index + 1}"
+            future = pool.submit(
+                regenerate_trainer, inputs, data_dir, mode, incremental, output_format, encodings
+            )
+            futures[future] = label
+
+        for future in as_completed(futures):
+            label = futures[future]
+
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append({"username": label, "error": f"{type(e).__name__}: {e}"})
+                print(f"FAILED {label}: {type(e).__name__}: {e}")
+                continue
+
+            results.append(result)
+
+            if result["unchanged"]:
+                print(f"{result['username']:<30} {result['seconds'] * 1000:8.1f} ms    unchanged")
+            else:
+                print(f"{result['username']:<30} {result['seconds'] * 1000:8.1f} ms {result['bytes'] / 1024:8.1f} KB")
+
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate every trainer's data/*.json in one process.")
+    parser.add_argument("inputs", help="JSONL or CSV export with one row of Mix It Up values per trainer")
+    parser.add_argument("--csv", default=pokedex.POKEMON_CSV_PATH, help="pokemon_list.csv to build against")
+    parser.add_argument("--data-dir", default=pokedex.DATA_PATH, help="where data/<user>.json files are written")
+    parser.add_argument("--buddy-file", default=pokedex.BUDDY_FILE_PATH, help="buddies.txt used for companions")
+    parser.add_argument("--mode", choices=["full", "split"], default=pokedex.OUTPUT_MODE)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--incremental", action="store_true", help="patch existing files and skip unchanged ones")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=pokedex.OUTPUT_FORMAT)
+    parser.add_argument(
+        "--compress", nargs="*", choices=COMPRESSED_ENCODINGS, default=list(pokedex.PRECOMPRESS),
+        help="also write .json.gz / .json.br siblings (br needs the brotli package)"
+    )
+    args = parser.parse_args()
+
+    trainers = read_trainer_inputs(args.inputs)
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    results, failures = regenerate_all(
+        trainers, args.csv, args.data_dir, args.mode, args.workers, args.buddy_file,
+        args.incremental, args.format, tuple(args.compress)
+    )
+    elapsed = time.perf_counter() - started
+
+    print("")
+    unchanged = sum(1 for result in results if result["unchanged"])
+
+    print(f"Regenerated {len(results) - unchanged} / {len(trainers)} trainers in {elapsed:.2f}s ({unchanged} unchanged)")
+
+    if failures:
+        print(f"{len(failures)} failed:")
+        for failure in failures:
+            print(f"  {failure['username']}: {failure['error']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
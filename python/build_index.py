@@ -0,0 +1,337 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pokedex_manifest import INDEX_FILE_NAME, is_trainer_file
+from pokedex_output import atomic_file
+import user_pokedex_script as pokedex
+
+
+# =========================
+# TRAINER INDEX BUILDER
+# =========================
+#
+# Collects the headline trainer_stats numbers of every data/<user>.json
+# into one small data/index.json with precomputed rankings, so a page can
+# list and rank trainers without fetching every 600 KB trainer file.
+#
+# trainer_stats sits before the pokemon list in every trainer file, so
+# each file is only read up to the end of trainer_stats. Rows are reused
+# for files whose mtime and size haven't moved since the last build; those
+# signatures live in .index_cache.json beside data/, which is never
+# published, so touching a file doesn't change index.json. Files that fail
+# to read aren't cached: they are retried, and fail the build, every run
+# until they parse.
+#
+#   python python/build_index.py --workers 4
+
+INDEX_VERSION = 1
+
+# Kept in the folder above data/ (gitignored), not in data/ itself.
+INDEX_CACHE_FILE_NAME = ".index_cache.json"
+# Bumped whenever the rows change shape, so cached rows are read again.
+INDEX_CACHE_VERSION = 2
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Top-level keys the index needs; reading stops once all are seen or
+# "pokemon" (which always comes after them) starts.
+# updated_at is left out on purpose: a rebuild that only restamps it would
+# change every row, and the watchdog would publish index.json for nothing.
+HEADLINE_KEYS = ("user", "trainer_stats")
+
+# metric -> label; higher ranks first for all of them
+RANKED_METRICS = {
+    "completion_percent": "Pokédex completion",
+    "unique_owned": "Species owned",
+    "total_owned": "Pokémon caught",
+    "accuracy_percent": "Ball accuracy",
+    "lines_completed": "Lines completed",
+    "legendary_owned": "Legendaries owned"
+}
+
+
+# =========================
+# STREAMING HEADER READER
+# =========================
+
+def read_headline_values(path):
+    """Read the top-level object of path one key at a time, stopping once HEADLINE_KEYS are in."""
+    decoder = json.JSONDecoder()
+    values = {}
+
+    with open(path, "r", encoding="utf-8") as trainer_file:
+        buffer = ""
+        position = 0
+        at_eof = False
+
+        def fill():
+            nonlocal buffer, at_eof
+            chunk = trainer_file.read(READ_CHUNK_SIZE)
+            at_eof = not chunk
+            buffer += chunk
+            return not at_eof
+
+        def skip_whitespace():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer) or not fill():
+                    return
+
+        def decode():
+            # Values can straddle chunks: keep reading until one parses whole.
+            nonlocal position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+                    continue
+
+                # A number cut off at the chunk edge still parses; make sure it ended.
+                if end == len(buffer) and fill():
+                    continue
+
+                position = end
+                return value
+
+        def expect(character):
+            nonlocal position
+            skip_whitespace()
+            if buffer[position:position + 1] != character:
+                raise ValueError(f"expected {character!r} at offset {position}")
+            position += 1
+
+        expect("{")
+
+        while True:
+            skip_whitespace()
+
+            if buffer[position:position + 1] == "}":
+                break
+
+            key = decode()
+            expect(":")
+            skip_whitespace()
+
+            if key == "pokemon":
+                break
+
+            values[key] = decode()
+
+            if all(name in values for name in HEADLINE_KEYS):
+                break
+
+            skip_whitespace()
+
+            if buffer[position:position + 1] == ",":
+                position += 1
+
+            # Drop what has been consumed so memory stays bounded by one value.
+            buffer = buffer[position:]
+            position = 0
+
+    return values
+
+
+def read_index_row(path):
+    values = read_headline_values(path)
+    stats = values.get("trainer_stats")
+
+    if not isinstance(stats, dict) or "pokedex" not in stats:
+        return None
+
+    user = values.get("user") or {}
+
+    return {
+        "username": user.get("username", ""),
+        "avatar": user.get("avatar", ""),
+        "file": os.path.basename(path),
+
+        "completion_percent": stats["pokedex"]["completion_percent"],
+        "unique_owned": stats["pokedex"]["unique_owned"],
+        "total_owned": stats["pokedex"]["total_owned"],
+        "accuracy_percent": stats["pokeballs"]["accuracy_percent"],
+        "lines_completed": stats["evolution"]["lines_completed"],
+        "total_lines": stats["evolution"]["total_lines"],
+        "legendary_owned": stats["legendary"]["owned"],
+        "legendary_total": stats["legendary"]["total"]
+    }
+
+
+def read_index_row_safely(path):
+    try:
+        return read_index_row(path), None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+# =========================
+# INDEX
+# =========================
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def trainer_files(data_dir):
+    return sorted(name for name in os.listdir(data_dir) if is_trainer_file(name))
+
+
+def default_cache_path(data_dir):
+    return os.path.join(os.path.dirname(os.path.abspath(data_dir)), INDEX_CACHE_FILE_NAME)
+
+
+def load_index(path, version=INDEX_VERSION):
+    try:
+        with open(path, "r", encoding="utf-8") as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+
+    return index if isinstance(index, dict) and index.get("version") == version else None
+
+
+def load_cache(path):
+    # {file name: {"signature": [mtime_ns, size], "row": row or None}}
+    cache = load_index(path, INDEX_CACHE_VERSION)
+
+    return cache["files"] if cache and isinstance(cache.get("files"), dict) else {}
+
+
+def write_cache(files, path):
+    with atomic_file(path) as cache_file:
+        json.dump({"version": INDEX_CACHE_VERSION, "files": files}, cache_file, ensure_ascii=False, separators=(",", ":"))
+
+
+def rank_trainers(rows):
+    # Ties share a rank (1, 2, 2, 4); usernames break them for a stable order.
+    rankings = {}
+
+    for metric in RANKED_METRICS:
+        ordered = sorted(rows, key=lambda row: (-row[metric], row["username"].lower()))
+        ranking = []
+        previous_value = None
+        rank = 0
+
+        for position, row in enumerate(ordered, 1):
+            if row[metric] != previous_value:
+                rank = position
+                previous_value = row[metric]
+
+            ranking.append({"username": row["username"], "value": row[metric], "rank": rank})
+
+        rankings[metric] = ranking
+
+    return rankings
+
+
+def build_index(data_dir, workers=None, full=False, cache_path=None):
+    """Return (index, re-read file names, failures); only changed or failed files are read."""
+    cache_path = cache_path or default_cache_path(data_dir)
+    previous = {} if full else load_cache(cache_path)
+
+    cached = {}
+    stale = []
+
+    for name in trainer_files(data_dir):
+        try:
+            signature = file_signature(os.path.join(data_dir, name))
+        except OSError:
+            continue
+
+        entry = previous.get(name)
+
+        if entry and entry.get("signature") == signature:
+            cached[name] = entry
+        else:
+            cached[name] = {"signature": signature, "row": None}
+            stale.append(name)
+
+    failures = {}
+
+    if stale:
+        paths = [os.path.join(data_dir, name) for name in stale]
+
+        if len(paths) == 1 or workers == 1:
+            results = list(map(read_index_row_safely, paths))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(read_index_row_safely, paths, chunksize=4))
+
+        for name, (row, error) in zip(stale, results):
+            cached[name]["row"] = row
+
+            if error:
+                failures[name] = error
+
+    # Files that aren't trainer documents stay cached with no row, so they aren't
+    # re-read until they change; files that failed stay out and are read again.
+    write_cache({name: entry for name, entry in cached.items() if name not in failures}, cache_path)
+
+    trainer_rows = sorted(
+        (entry["row"] for entry in cached.values() if entry["row"] is not None),
+        key=lambda row: row["username"].lower()
+    )
+
+    index = {
+        "version": INDEX_VERSION,
+        "metrics": RANKED_METRICS,
+        "trainers": trainer_rows,
+        "rankings": rank_trainers(trainer_rows)
+    }
+
+    return index, stale, failures
+
+
+def write_index(index, path):
+    # Skip the write when nothing moved so the watchdog has nothing to publish.
+    previous = load_index(path)
+
+    if previous == json.loads(json.dumps(index, ensure_ascii=False)):
+        return False
+
+    with atomic_file(path) as index_file:
+        json.dump(index, index_file, ensure_ascii=False, separators=(",", ":"))
+
+    return True
+
+
+# =========================
+# MAIN
+# =========================
+
+def main():
+    parser = argparse.ArgumentParser(description="Build data/index.json from every trainer file.")
+    parser.add_argument("--data-dir", default=pokedex.DATA_PATH, help="folder holding data/<user>.json")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="re-read every file instead of only changed ones")
+    parser.add_argument("--cache", default=None, help=f"file signature cache (default: {INDEX_CACHE_FILE_NAME} beside the data folder)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index, rebuilt, failures = build_index(args.data_dir, args.workers, args.full, args.cache)
+    written = write_index(index, os.path.join(args.data_dir, INDEX_FILE_NAME))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Indexed {len(index['trainers'])} trainers ({len(rebuilt)} re-read) in {elapsed:.2f}s"
+        f"{'' if written else ', index unchanged'}"
+    )
+
+    for name, error in sorted(failures.items()):
+        print(f"  skipped {name}: {error}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
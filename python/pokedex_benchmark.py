@@ -0,0 +1,367 @@
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import user_pokedex_script as pokedex
+from pokedex_catalog import compile_catalog, load_catalog
+from pokedex_columnar import columnar_available, columnar_collection_stats
+from pokedex_output import encode_document
+from pokedex_types import TYPE_NAMES
+
+
+# =========================
+# PIPELINE BENCHMARK
+# =========================
+#
+# Times every phase of the trainer pipeline against synthetic catalogs and
+# Mix It Up inputs, so we can see how it scales past the real CSV (more
+# generations, forms, heavy inventories) before we get there. Runs fully
+# offline in a temp folder; no Mix It Up, no Windows paths.
+#
+#   python python/pokedex_benchmark.py --save-baseline bench_baseline.json
+#   python python/pokedex_benchmark.py --compare bench_baseline.json
+
+REGIONS = ("Kanto", "Johto", "Hoenn", "Sinnoh", "Unova", "Kalos", "Alola", "Galar", "Paldea")
+RARITIES = ("common", "uncommon", "rare", "very rare")
+BALLS = ("poke ball", "great ball", "ultra ball", "master ball")
+
+# size -> (species in the catalog, pokedex entries per trainer, extra inventory/pokebag entries)
+SIZES = {
+    "current": (300, 150, 40),
+    "all_gens": (1100, 800, 400),
+    "all_gens_forms": (1400, 1400, 3000)
+}
+
+CSV_HEADER = (
+    "number", "name", "pokedex_number", "form", "primary_type", "secondary_type",
+    "generation", "region", "rarity", "is_legendary", "is_mythic", "is_hatchable",
+    "evolution", "requirement", "quantity_required", "item_required",
+    "evolution_stage", "evolution_line_id",
+    "hp", "attack", "defense", "sp_attack", "sp_defense", "speed",
+    "height", "weight", "pokedex_entry"
+)
+
+# A phase is flagged when it gets this much slower than its baseline.
+DEFAULT_THRESHOLD = 0.20
+
+
+# =========================
+# SYNTHETIC DATA
+# =========================
+
+def generate_catalog_csv(species_count, seed=0):
+    """A pokemon_list.csv shaped like the real one: 1-3 stage lines, megas, forms, all requirement kinds."""
+    rnd = random.Random(seed)
+    output = io.StringIO()
+
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(CSV_HEADER)
+
+    number = 0
+    line_id = 0
+    per_region = max(1, species_count // len(REGIONS))
+
+    while number < species_count:
+        line_id += 1
+        line_length = min(rnd.choice((1, 2, 2, 3, 3)), species_count - number)
+        primary = rnd.choice(TYPE_NAMES).capitalize()
+        secondary = rnd.choice(TYPE_NAMES).capitalize() if rnd.random() < 0.5 else ""
+        legendary = line_length == 1 and rnd.random() < 0.3
+
+        names = [f"Synth{number + offset + 1:05d}" for offset in range(line_length)]
+
+        for stage, name in enumerate(names, 1):
+            number += 1
+            generation = min(len(REGIONS), (number - 1) // per_region + 1)
+
+            if stage < line_length:
+                evolution = names[stage]
+                requirement = rnd.choice(("", "", "", "Fire Stone", "Trade", "High Friendship"))
+                quantity = 0 if requirement else rnd.choice((3, 5, 10))
+                item_required = "yes" if "Stone" in requirement else "no"
+            else:
+                evolution, requirement, quantity, item_required = "", "", "", "no"
+
+            # Every 25th species is a regional form with its own image.
+            form = "alola" if number % 25 == 0 else ""
+            stage_text = "4" if legendary and rnd.random() < 0.2 else str(stage)
+
+            writer.writerow((
+                number, name, number, form, primary, secondary,
+                generation, REGIONS[generation - 1], rnd.choice(RARITIES),
+                str(legendary).lower(), "false", str(stage == 1).lower(),
+                evolution, requirement, quantity, item_required,
+                stage_text, line_id,
+                *(rnd.randint(20, 160) for _ in range(6)),
+                round(rnd.uniform(0.2, 9.0), 1), round(rnd.uniform(1, 400), 1),
+                f"Synthetic entry for {name}, a creature that exists only in benchmarks."
+            ))
+
+    return output.getvalue()
+
+
+def generate_trainer_inputs(catalog, pokedex_entries, extra_entries, seed=0):
+    rnd = random.Random(seed)
+
+    species = [catalog["pokemon_metadata"][key]["name"] for key in catalog["species_order"]]
+    owned = rnd.sample(species, min(pokedex_entries, len(species)))
+    line_ids = list(catalog["evolution"]["lines"])
+
+    inventory = [f"{ball.title()} thrown x{rnd.randint(10, 900)}" for ball in BALLS]
+    inventory += [f"{ball.title()} success x{rnd.randint(1, 9)}" for ball in BALLS]
+    inventory += ["Evolution x12", "Trade x3", "Eggs Hatched x4"]
+    inventory += [f"Tracker {index} x{rnd.randint(1, 50)}" for index in range(extra_entries)]
+
+    inputs = {field: "" for field in pokedex.INPUT_FIELDS}
+
+    inputs.update({
+        "username": f"bench_{pokedex_entries}",
+        "useravatar": "https://example.invalid/avatar.png",
+        "userpokedexall": ", ".join(f"{name} x{rnd.randint(1, 12)}" for name in owned),
+        "usertrackall": ", ".join(inventory),
+        "userpokefriendshipall": ", ".join(
+            f"{line_id} x{rnd.randint(1, 900)}" for line_id in rnd.sample(line_ids, min(50, len(line_ids)))
+        ),
+        "userpokebagall": ", ".join(f"Berry {index} x{rnd.randint(1, 30)}" for index in range(extra_entries)),
+        "userhours": "412",
+        "userfollowage": "2 years",
+        "usertotalcommandsrun": "9001",
+        "usertotalamountdonated": "12.50",
+        "usertrackbuddytimespet": "40",
+        "usertrackbuddyberriesfed": "12"
+    })
+
+    return inputs
+
+
+# =========================
+# PHASES
+# =========================
+
+def pipeline_phases(csv_text, csv_path, inputs):
+    """(name, callable) pairs in pipeline order; each returns what the next one needs."""
+    context = {}
+
+    def compile_phase():
+        context["compiled"] = compile_catalog(csv_text)
+
+    def load_phase():
+        context["catalog"] = load_catalog(csv_path)
+
+    def parse_phase():
+        context["state"] = pokedex.parse_trainer_inputs(inputs, context["catalog"])
+
+    def pokemon_phase():
+        context["pokemon_list"], context["lines"] = pokedex.build_pokemon_list(
+            context["state"], context["catalog"]
+        )
+
+    def collection_phase():
+        context["collection"] = pokedex.build_collection_stats(
+            context["pokemon_list"], context["lines"], context["catalog"]
+        )
+
+    def collection_columnar_phase():
+        # What the daemon and batch workers use; the first run also builds the columns.
+        columnar_collection_stats(context["pokemon_list"], context["lines"], context["catalog"])
+
+    def capture_phase():
+        context["capture"] = pokedex.build_capture_stats(context["state"])
+
+    def companion_phase():
+        context["companion"] = pokedex.build_companion(
+            context["state"], context["pokemon_list"], context["catalog"]
+        )
+
+    def assemble_phase():
+        pokeballs, journey = context["capture"]
+        context["output"] = pokedex.assemble_trainer_document(
+            context["state"],
+            pokedex.assemble_trainer_stats(context["collection"], pokeballs, journey),
+            context["pokemon_list"],
+            context["companion"]
+        )
+
+    def render_pretty_phase():
+        context["text"] = encode_document(context["output"], "pretty")
+
+    def render_compact_phase():
+        encode_document(context["output"], "compact")
+
+    def incremental_noop_phase():
+        previous = json.loads(context["text"])
+        pokedex.incremental_trainer_document(inputs, context["catalog"], previous)
+
+    phases = [
+        ("compile_catalog", compile_phase),
+        ("load_snapshot", load_phase),
+        ("parse_inputs", parse_phase),
+        ("build_pokemon_list", pokemon_phase),
+        ("collection_stats", collection_phase),
+        ("collection_columnar", collection_columnar_phase),
+        ("capture_stats", capture_phase),
+        ("companion", companion_phase),
+        ("assemble", assemble_phase),
+        ("render_pretty", render_pretty_phase),
+        ("render_compact", render_compact_phase),
+        ("incremental_noop", incremental_noop_phase)
+    ]
+
+    if not columnar_available():
+        phases = [(name, phase) for name, phase in phases if name != "collection_columnar"]
+
+    return phases
+
+
+def benchmark_size(size, repeat, workdir):
+    species_count, pokedex_entries, extra_entries = SIZES[size]
+
+    csv_text = generate_catalog_csv(species_count)
+    csv_path = os.path.join(workdir, f"{size}.csv")
+
+    with open(csv_path, "w", encoding="utf-8", newline="") as csv_file:
+        csv_file.write(csv_text)
+
+    # Warm the snapshot so load_snapshot measures the unpickle path.
+    catalog = load_catalog(csv_path)
+    inputs = generate_trainer_inputs(catalog, pokedex_entries, extra_entries)
+
+    buddy_path = os.path.join(workdir, f"{size}_buddies.txt")
+    with open(buddy_path, "w", encoding="utf-8") as buddy_file:
+        buddy_file.write(f"{inputs['username']} 1 {next(iter(catalog['evolution']['lines']))} 0\n")
+
+    pokedex.BUDDY_FILE_PATH = buddy_path
+
+    timings = {}
+
+    for _ in range(repeat):
+        for name, phase in pipeline_phases(csv_text, csv_path, inputs):
+            started = time.perf_counter()
+            phase()
+            timings.setdefault(name, []).append(time.perf_counter() - started)
+
+    # Separate pass for memory: tracemalloc slows everything it watches.
+    memory = {}
+    tracemalloc.start()
+
+    for name, phase in pipeline_phases(csv_text, csv_path, inputs):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        phase()
+        memory[name] = tracemalloc.get_traced_memory()[1] - before
+
+    tracemalloc.stop()
+
+    return {
+        "species": species_count,
+        "pokedex_entries": pokedex_entries,
+        "extra_entries": extra_entries,
+        "phases": {
+            name: {
+                "median_ms": round(statistics.median(samples) * 1000, 3),
+                "peak_kb": round(memory[name] / 1024, 1)
+            }
+            for name, samples in timings.items()
+        }
+    }
+
+
+def run_benchmarks(sizes, repeat):
+    # Nothing below may touch the real data/, store or daemon.
+    pokedex.STORE_PATH = None
+    pokedex.DAEMON_URL = None
+    pokedex.PRECOMPRESS = ()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pokedex.DATA_PATH = workdir
+
+        return {
+            "python": sys.version.split()[0],
+            "repeat": repeat,
+            "sizes": {size: benchmark_size(size, repeat, workdir) for size in sizes}
+        }
+
+
+# =========================
+# REPORT
+# =========================
+
+def compare_results(results, baseline, threshold):
+    """Rows of (size, phase, baseline ms, current ms, ratio, regressed)."""
+    rows = []
+
+    for size, result in results["sizes"].items():
+        baseline_phases = baseline.get("sizes", {}).get(size, {}).get("phases", {})
+
+        for phase, numbers in result["phases"].items():
+            before = baseline_phases.get(phase, {}).get("median_ms")
+
+            if not before:
+                rows.append((size, phase, None, numbers["median_ms"], None, False))
+                continue
+
+            ratio = numbers["median_ms"] / before
+            rows.append((size, phase, before, numbers["median_ms"], ratio, ratio > 1 + threshold))
+
+    return rows
+
+
+def print_results(results):
+    for size, result in results["sizes"].items():
+        print(f"\n{size}: {result['species']} species, {result['pokedex_entries']} owned, "
+              f"{result['extra_entries']} extra inventory entries")
+
+        for phase, numbers in result["phases"].items():
+            print(f"  {phase:<20} {numbers['median_ms']:10.3f} ms {numbers['peak_kb']:10.1f} KB peak")
+
+
+def print_comparison(rows, threshold):
+    print(f"\nCompared with baseline (regression threshold +{threshold:.0%}):")
+
+    for size, phase, before, after, ratio, regressed in rows:
+        if before is None:
+            print(f"  {size:<16} {phase:<20} {'':>10}    {after:10.3f} ms   (new)")
+            continue
+
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {size:<16} {phase:<20} {before:10.3f} -> {after:10.3f} ms  x{ratio:5.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trainer pipeline on synthetic data.")
+    parser.add_argument("--sizes", nargs="*", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per phase (median is kept)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write these results as the new baseline")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat)
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+        rows = compare_results(results, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+
+        if any(row[5] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import csv
+import hashlib
+import io
+import os
+import pickle
+
+from pokedex_helpers import safe_int, safe_float, safe_str
+from pokedex_evolution import build_evolution_graph
+
+
+# =========================
+# CATALOG CONFIG
+# =========================
+
+# Bump whenever the compiled catalog layout changes so stale snapshots rebuild.
+CATALOG_FORMAT_VERSION = 4
+
+IMAGE_BASE_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/dream-world"
+
+
+def catalog_cache_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".catalog.pickle"
+
+
+# =========================
+# COMPILE CATALOG FROM CSV
+# =========================
+
+def compile_catalog(csv_text):
+    pokemon_metadata = {}
+    transition_map = {}
+
+    reader = csv.DictReader(io.StringIO(csv_text, newline=""))
+
+    for row in reader:
+
+        raw_number = safe_float(row.get("number"))
+        is_species_row = raw_number.is_integer()
+
+        name_raw = safe_str(row.get("name")).strip()
+        name_key = name_raw.lower()
+
+        evolution_raw = safe_str(row.get("evolution")).strip()
+        evolution_key = evolution_raw.lower()
+
+        # ---------------------------------------------------
+        # HARVEST TRANSITION (ANY ROW THAT HAS EVOLUTION)
+        # ---------------------------------------------------
+        if evolution_key and evolution_key not in ["null", "none", "false", "0"]:
+
+            transition_map[evolution_key] = {
+                "parent": name_key,
+                "requirement": safe_str(row.get("requirement")).strip(),
+                "quantity_required": safe_int(row.get("quantity_required"), 0),
+                "item_required": safe_str(row.get("item_required"), "no").strip().lower() == "yes"
+            }
+
+        # ---------------------------------------------------
+        # BUILD REAL SPECIES ONLY FROM INTEGER ROWS
+        # ---------------------------------------------------
+        if not is_species_row:
+            continue
+
+        pokedex_number = safe_int(row.get("pokedex_number"))
+        form = safe_str(row.get("form")).lower()
+
+        if form:
+            image_url = f"{IMAGE_BASE_URL}/{pokedex_number}-{form}.svg"
+        else:
+            image_url = f"{IMAGE_BASE_URL}/{pokedex_number}.svg"
+
+        secondary_raw = safe_str(row.get("secondary_type")).lower()
+        secondary_type = None if secondary_raw in ["", "null"] else secondary_raw.capitalize()
+
+        pokemon_metadata[name_key] = {
+            "name": name_raw,
+            "pokedex_number": pokedex_number,
+            "primary_type": safe_str(row.get("primary_type"), "Unknown"),
+            "secondary_type": secondary_type,
+            "generation": safe_int(row.get("generation")),
+            "region": safe_str(row.get("region"), "Unknown"),
+            "rarity": safe_str(row.get("rarity"), "common"),
+            "is_legendary": safe_str(row.get("is_legendary"), "false").lower() == "true",
+            "is_mythic": safe_str(row.get("is_mythic"), "false").lower() == "true",
+            "is_hatchable": safe_str(row.get("is_hatchable"), "false").lower() == "true",
+            "evolution": False,
+            "evolution_stage": safe_str(row.get("evolution_stage"), "unknown"),
+            "evolution_line_id": safe_str(row.get("evolution_line_id"), name_key),
+            "quantity_required": 0,
+            "item_required": False,
+            "requirement": "",
+            "stats": {
+                "hp": safe_int(row.get("hp")),
+                "attack": safe_int(row.get("attack")),
+                "defense": safe_int(row.get("defense")),
+                "sp_attack": safe_int(row.get("sp_attack")),
+                "sp_defense": safe_int(row.get("sp_defense")),
+                "speed": safe_int(row.get("speed")),
+            },
+            "physical": {
+                "height": safe_float(row.get("height")),
+                "weight": safe_float(row.get("weight")),
+            },
+            "pokedex_entry": safe_str(row.get("pokedex_entry")),
+            "image": image_url
+        }
+
+    # ---- SPECIES ORDER (POKEDEX NUMBER, STABLE) ----
+    species_order = sorted(
+        pokemon_metadata,
+        key=lambda key: pokemon_metadata[key]["pokedex_number"]
+    )
+
+    evolution = build_evolution_graph(pokemon_metadata, species_order, transition_map)
+
+    return {
+        "format_version": CATALOG_FORMAT_VERSION,
+        "pokemon_metadata": pokemon_metadata,
+        "transition_map": transition_map,
+        "species_order": species_order,
+        "species_index": {key: index for index, key in enumerate(species_order)},
+        "evolution": evolution,
+        "totals": compile_totals(pokemon_metadata, species_order, evolution)
+    }
+
+
+# =========================
+# CATALOG-WIDE TOTALS
+# =========================
+
+def compile_totals(pokemon_metadata, species_order, evolution):
+    generations = {}
+    stages = {}
+    types = {}
+    rarities = {}
+    legendary = 0
+    total_evolutions_available = 0
+
+    for key in species_order:
+        meta = pokemon_metadata[key]
+
+        gen = meta["generation"]
+
+        if gen > 0:
+            if gen not in generations:
+                generations[gen] = {
+                    "generation": gen,
+                    "region": meta["region"],
+                    "total": 0
+                }
+
+            generations[gen]["total"] += 1
+
+        stage = safe_int(meta["evolution_stage"], 0)
+
+        if stage > 0:
+            total_evolutions_available += 1
+            stages[stage] = stages.get(stage, 0) + 1
+
+        t = meta["primary_type"].lower()
+        types[t] = types.get(t, 0) + 1
+
+        r = meta["rarity"].lower()
+        rarities[r] = rarities.get(r, 0) + 1
+
+        if meta["is_legendary"] or meta["is_mythic"]:
+            legendary += 1
+
+    generations = dict(sorted(generations.items()))
+
+    for gen in generations.values():
+        gen["total_lines"] = len(evolution["region_lines"].get(gen["region"], []))
+
+    return {
+        "total_available": len(species_order),
+        "total_lines": len(evolution["lines"]),
+        "total_evolutions_available": total_evolutions_available,
+        "legendary": legendary,
+        "generations": generations,
+        "stages": stages,
+        "types": types,
+        "rarities": rarities
+    }
+
+
+# =========================
+# CACHED LOAD
+# =========================
+
+def load_catalog(csv_path, cache_path=None):
+    """Return the compiled catalog for csv_path, rebuilding the snapshot only when the CSV changed."""
+    cache_path = cache_path or catalog_cache_path(csv_path)
+
+    stat = os.stat(csv_path)
+    cached = read_snapshot(cache_path)
+
+    # Fast path: same mtime + size as when the snapshot was compiled.
+    if cached and cached["source"]["mtime_ns"] == stat.st_mtime_ns \
+            and cached["source"]["size"] == stat.st_size:
+        return cached
+
+    with open(csv_path, "rb") as csvfile:
+        raw = csvfile.read()
+
+    content_hash = hashlib.sha256(raw).hexdigest()
+
+    # Touched but unchanged (e.g. re-saved from Excel): keep the compiled data.
+    if cached and cached["source"]["sha256"] == content_hash:
+        catalog = cached
+    else:
+        catalog = compile_catalog(raw.decode("utf-8"))
+
+    catalog["source"] = {
+        "path": csv_path,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": content_hash
+    }
+
+    write_snapshot(cache_path, catalog)
+
+    return catalog
+
+
+def read_snapshot(cache_path):
+    try:
+        with open(cache_path, "rb") as cache_file:
+            catalog = pickle.load(cache_file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError):
+        return None
+
+    if not isinstance(catalog, dict) or catalog.get("format_version") != CATALOG_FORMAT_VERSION:
+        return None
+
+    return catalog
+
+
+def write_snapshot(cache_path, catalog):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+
+    try:
+        with open(tmp_path, "wb") as cache_file:
+            pickle.dump(catalog, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only location only costs us the cache, never the run.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,251 @@
+from operator import itemgetter
+
+from pokedex_helpers import safe_int
+
+
+# =========================
+# COLUMNAR CATALOG (OPTIONAL, NEEDS NUMPY)
+# =========================
+#
+# The same catalog as integer-coded columns, so a trainer's collection stats
+# become a few bincount/mask operations over a count vector instead of a
+# Python loop per owned Pokémon; results are identical to
+# pokedex_stats.accumulate_collection_stats.
+#
+# It pays off from about 1000 species (collection_stats vs
+# collection_columnar in python/pokedex_benchmark.py: roughly 3x at 1100,
+# 5x at 1400, no gain at 300), but importing numpy (~120 ms) and building
+# the columns (1-3 ms) are paid once per process, so only long-running
+# processes (daemon, batch workers) use it.
+#
+# numpy is imported on first use, and the columns are built lazily per
+# process (never pickled into the catalog snapshot, so the snapshot still
+# loads without numpy).
+
+np = None
+_numpy_checked = False
+
+_columnar_catalogs = {}
+
+
+def columnar_available():
+    # Imported here so one-shot script runs that never use it don't pay for numpy.
+    global np, _numpy_checked
+
+    if not _numpy_checked:
+        _numpy_checked = True
+
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+
+    return np is not None
+
+
+def encode_column(values, labels=None):
+    """(codes, labels): codes[i] indexes labels; labels keep first-seen order unless given."""
+    if labels is None:
+        labels = list(dict.fromkeys(values))
+
+    positions = {label: index for index, label in enumerate(labels)}
+
+    return np.array([positions.get(value, -1) for value in values], dtype=np.int32), labels
+
+
+def build_columnar_catalog(catalog):
+    pokemon_metadata = catalog["pokemon_metadata"]
+    species_order = catalog["species_order"]
+    evolution = catalog["evolution"]
+    totals = catalog["totals"]
+
+    metas = [pokemon_metadata[key] for key in species_order]
+
+    # ---- CODED COLUMNS ----
+    # Generations and types use the catalog totals' order so outputs line up with them;
+    # generations <= 0 get code -1 and never count.
+    generation_codes, generation_labels = encode_column(
+        [meta["generation"] for meta in metas], list(totals["generations"])
+    )
+    region_codes, region_labels = encode_column([meta["region"] for meta in metas])
+    type_codes, type_labels = encode_column(
+        [meta["primary_type"].lower() for meta in metas], list(totals["types"])
+    )
+    line_codes, line_labels = encode_column(
+        [meta["evolution_line_id"] for meta in metas], list(evolution["lines"])
+    )
+
+    # Raw CSV stage (megas stay 4), as the evolution totals count it
+    stages = np.array([safe_int(meta["evolution_stage"], 0) for meta in metas], dtype=np.int32)
+
+    legendary = np.array([meta["is_legendary"] or meta["is_mythic"] for meta in metas], dtype=bool)
+
+    # ---- PER-LINE / PER-REGION LOOKUPS ----
+    line_sizes = np.bincount(line_codes, minlength=len(line_labels))
+
+    # A line's region is its first member's (same rule as region_lines).
+    line_regions = {}
+
+    for region, line_ids in evolution["region_lines"].items():
+        for line_id in line_ids:
+            line_regions[line_id] = region
+
+    line_region_codes, _ = encode_column([line_regions[line_id] for line_id in line_labels], region_labels)
+
+    return {
+        "size": len(metas),
+        "generation": generation_codes,
+        "generation_labels": generation_labels,
+        "region": region_codes,
+        "region_labels": region_labels,
+        "type": type_codes,
+        "type_labels": type_labels,
+        "line": line_codes,
+        "line_labels": line_labels,
+        "line_sizes": line_sizes,
+        "line_region": line_region_codes,
+        "stage": stages,
+        "legendary": legendary
+    }
+
+
+def columnar_catalog(catalog):
+    # One build per compiled catalog per process.
+    if not columnar_available():
+        raise RuntimeError("pokedex_columnar needs numpy")
+
+    key = catalog["source"]["sha256"]
+    columnar = _columnar_catalogs.get(key)
+
+    if columnar is None:
+        columnar = build_columnar_catalog(catalog)
+        _columnar_catalogs.clear()
+        _columnar_catalogs[key] = columnar
+
+    return columnar
+
+
+# =========================
+# VECTORIZED STATS
+# =========================
+
+def count_vector(catalog, pokemon_list):
+    # map(itemgetter) keeps the one pass over the Pokémon dicts in C.
+    return np.fromiter(
+        map(itemgetter("count"), pokemon_list),
+        dtype=np.int64,
+        count=len(catalog["species_order"])
+    )
+
+
+def completion_percent(owned, total):
+    return round((owned / total) * 100, 2) if total > 0 else 0
+
+
+def grouped_owned(codes, owned, groups):
+    """Owned species per group code; code -1 (unknown) is dropped."""
+    selected = codes[owned]
+    return np.bincount(selected[selected >= 0], minlength=groups)
+
+
+def columnar_line_completion(columnar, owned):
+    """Boolean per line (in line_labels order): every member owned."""
+    owned_per_line = np.bincount(columnar["line"][owned], minlength=len(columnar["line_labels"]))
+    return owned_per_line == columnar["line_sizes"]
+
+
+def columnar_collection_stats(pokemon_list, line_completion_map, catalog):
+    """
+    Same sections as pokedex_stats.accumulate_collection_stats, from vector operations.
+    Line completion comes from the counts, so line_completion_map is not read.
+    """
+    columnar = columnar_catalog(catalog)
+    totals = catalog["totals"]
+
+    counts = count_vector(catalog, pokemon_list)
+    owned = counts > 0
+
+    # ---- POKEDEX ----
+    unique_owned = int(owned.sum())
+
+    pokedex = {
+        "total_available": totals["total_available"],
+        "unique_owned": unique_owned,
+        "total_owned": int(counts[owned].sum()),
+        "completion_percent": completion_percent(unique_owned, totals["total_available"])
+    }
+
+    # ---- LINES ----
+    line_complete = columnar_line_completion(columnar, owned)
+    completed_per_region = np.bincount(
+        columnar["line_region"][line_complete],
+        minlength=len(columnar["region_labels"])
+    )
+    lines_per_region = np.bincount(columnar["line_region"], minlength=len(columnar["region_labels"]))
+    region_index = {region: index for index, region in enumerate(columnar["region_labels"])}
+
+    # ---- GENERATION PROGRESS ----
+    owned_per_generation = grouped_owned(columnar["generation"], owned, len(columnar["generation_labels"]))
+    generation_progress = {}
+
+    for index, gen in enumerate(columnar["generation_labels"]):
+        gen_totals = totals["generations"][gen]
+        gen_owned = int(owned_per_generation[index])
+        region = region_index.get(gen_totals["region"])
+
+        generation_progress[gen] = {
+            "generation": gen,
+            "region": gen_totals["region"],
+            "owned": gen_owned,
+            "total": gen_totals["total"],
+            "completion_percent": completion_percent(gen_owned, gen_totals["total"]),
+            "total_lines": int(lines_per_region[region]) if region is not None else 0,
+            "lines_completed": int(completed_per_region[region]) if region is not None else 0
+        }
+
+    # ---- EVOLUTION ----
+    # stage_owned keys follow the first owned species of each stage, like the loop did.
+    owned_stages = columnar["stage"][owned]
+    owned_stages = owned_stages[owned_stages > 0]
+    stage_values, first_seen, stage_counts = np.unique(owned_stages, return_index=True, return_counts=True)
+
+    stage_owned = {
+        int(stage_values[index]): int(stage_counts[index])
+        for index in np.argsort(first_seen, kind="stable")
+    }
+
+    evolution = {
+        "total_evolutions_owned": int(owned_stages.size),
+        "total_evolutions_available": totals["total_evolutions_available"],
+        "lines_completed": int(line_complete.sum()),
+        "total_lines": totals["total_lines"],
+        "stage_totals": dict(totals["stages"]),
+        "stage_owned": stage_owned
+    }
+
+    # ---- TYPE MASTERY ----
+    owned_per_type = grouped_owned(columnar["type"], owned, len(columnar["type_labels"]))
+
+    types = {
+        t: {
+            "owned": int(owned_per_type[index]),
+            "total": totals["types"][t],
+            "completion_percent": completion_percent(int(owned_per_type[index]), totals["types"][t])
+        }
+        for index, t in enumerate(columnar["type_labels"])
+    }
+
+    # ---- LEGENDARY ----
+    legendary = {
+        "owned": int(columnar["legendary"][owned].sum()),
+        "total": totals["legendary"]
+    }
+
+    return {
+        "pokedex": pokedex,
+        "generation_progress": generation_progress,
+        "evolution": evolution,
+        "types": types,
+        "legendary": legendary
+    }
@@ -0,0 +1,117 @@
+import logging
+import os
+import pickle
+
+from pokedex_helpers import safe_str
+
+
+logger = logging.getLogger("dexforge.companion")
+
+
+# =========================
+# COMPANION STORE
+# =========================
+#
+# buddies.txt (written by Mix It Up, one "<username> ... <line_id> ..." row per
+# trainer) is indexed by lowercase username. The index is kept in memory per
+# process and as a snapshot next to the text file, and rebuilt whenever the
+# text file's mtime or size moves.
+
+BUDDY_INDEX_FORMAT_VERSION = 1
+
+_buddy_indexes = {}
+
+
+def buddy_index_path(buddy_path):
+    return os.path.splitext(buddy_path)[0] + ".index.pickle"
+
+
+def parse_buddy_file(lines):
+    buddies = {}
+
+    for line in lines:
+        parts = line.strip().split()
+
+        if len(parts) < 4:
+            continue
+
+        # First row for a trainer wins, like the old top-to-bottom scan.
+        buddies.setdefault(parts[0].lower(), {
+            "username": parts[0],
+            "line_id": safe_str(parts[2])
+        })
+
+    return buddies
+
+
+def read_buddy_snapshot(index_path):
+    try:
+        with open(index_path, "rb") as index_file:
+            index = pickle.load(index_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError) as e:
+        logger.warning("Ignoring unreadable buddy index %s: %s", index_path, e)
+        return None
+
+    if not isinstance(index, dict) or index.get("format_version") != BUDDY_INDEX_FORMAT_VERSION:
+        return None
+
+    return index
+
+
+def write_buddy_snapshot(index_path, index):
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+
+    try:
+        with open(tmp_path, "wb") as index_file:
+            pickle.dump(index, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        # The in-memory index still works; only the next process pays the parse.
+        logger.warning("Could not write buddy index %s: %s", index_path, e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def load_buddy_index(buddy_path):
+    """Return {lowercase username: buddy record}, rebuilt only when buddies.txt changes."""
+    stat = os.stat(buddy_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    index = _buddy_indexes.get(buddy_path)
+
+    if index is None or index["signature"] != list(signature):
+        index_path = buddy_index_path(buddy_path)
+        index = read_buddy_snapshot(index_path)
+
+        if index is None or index["signature"] != list(signature):
+            with open(buddy_path, "r", encoding="utf-8") as buddy_file:
+                buddies = parse_buddy_file(buddy_file)
+
+            index = {
+                "format_version": BUDDY_INDEX_FORMAT_VERSION,
+                "signature": list(signature),
+                "buddies": buddies
+            }
+            write_buddy_snapshot(index_path, index)
+
+        _buddy_indexes[buddy_path] = index
+
+    return index["buddies"]
+
+
+def find_buddy(buddy_path, username):
+    """Return the trainer's buddy record, or None when they have none or the store can't be read."""
+    try:
+        buddies = load_buddy_index(buddy_path)
+    except FileNotFoundError:
+        logger.warning("Buddy file not found: %s", buddy_path)
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error("Could not read buddy file %s: %s", buddy_path, e)
+        return None
+
+    return buddies.get(username.lower())
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from pokedex_helpers import safe_str
+from pokedex_catalog import load_catalog
+from pokedex_columnar import columnar_available
+from batch_regenerate import normalize_inputs, read_trainer_inputs
+from pokedex_events import EventLog, sync_event
+import user_pokedex_script as pokedex
+
+
+# =========================
+# DEXFORGE DAEMON
+# =========================
+#
+# Keeps the compiled catalog, type tables and evolution graph resident so a
+# chat command only pays for the build itself. Set DAEMON_URL in
+# user_pokedex_script.py and the Mix It Up script forwards its inputs here.
+#
+#   python python/pokedex_daemon.py serve
+#   python python/pokedex_daemon.py bench trainers.jsonl --requests 500
+#
+# POST /render  trainer inputs (JSON) -> trainer document, as the script prints it
+# POST /write   trainer inputs (JSON) -> writes the trainer file, returns {path, bytes}
+# POST /event   one trainer event (see pokedex_events) -> folds it, rewrites the trainer file
+#
+# Trainer files go where the script puts them: OUTPUT_PATH when set, else
+# DATA_PATH/<user>.json (--data-dir).
+# GET  /stats   request count and p50/p99 latency
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+
+# Latency percentiles are taken over this many most recent requests.
+LATENCY_WINDOW = 1000
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0
+
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(samples):
+    return {
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3)
+    }
+
+
+# =========================
+# RESIDENT STATE
+# =========================
+
+class DaemonState:
+    def __init__(self, csv_path, events_path=None):
+        self.csv_path = csv_path
+        self.catalog = load_catalog(csv_path)
+        # Every trainer's folded state, loaded from the last snapshot plus the log since.
+        self.events = EventLog(events_path, self.catalog) if events_path else None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def current_catalog(self):
+        # One stat per request; the snapshot is only reloaded when the CSV moves.
+        try:
+            stat = os.stat(self.csv_path)
+        except OSError:
+            return self.catalog
+
+        source = self.catalog["source"]
+
+        if stat.st_mtime_ns != source["mtime_ns"] or stat.st_size != source["size"]:
+            self.catalog = load_catalog(self.csv_path)
+
+        return self.catalog
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "catalog_sha256": self.catalog["source"]["sha256"],
+            **latency_summary(list(self.latencies))
+        }
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def send_body(self, status, body, content_type="application/json; charset=utf-8"):
+        data = body.encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_body(200, json.dumps(self.state.stats()))
+        else:
+            self.send_body(404, json.dumps({"error": "not found"}))
+
+    def do_POST(self):
+        if self.path not in ("/render", "/write", "/event") \
+                or (self.path == "/event" and self.state.events is None):
+            self.send_body(404, json.dumps({"error": "not found"}))
+            return
+
+        started = time.perf_counter()
+        state = self.state
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            catalog = state.current_catalog()
+
+            if self.path == "/event":
+                trainer = state.events.append(request, catalog)
+                path = pokedex.trainer_output_path(trainer["username"])
+                text = pokedex.generate_state_text(trainer, catalog)
+                pokedex.write_trainer_text(path, text)
+
+                body = json.dumps({"path": path, "bytes": len(text.encode("utf-8"))})
+            else:
+                body = self.build(request, catalog)
+        except Exception as e:
+            state.errors += 1
+            self.send_body(400, json.dumps({"error": f"{type(e).__name__}: {e}"}))
+            return
+
+        state.requests += 1
+        state.latencies.append(time.perf_counter() - started)
+
+        self.send_body(200, body)
+
+    def build(self, request, catalog):
+        inputs = normalize_inputs(request)
+
+        if not safe_str(inputs.get("username")):
+            raise ValueError("inputs have no username")
+
+        if self.state.events is not None:
+            # Keep the folded state in step with what Mix It Up just sent.
+            self.state.events.append(sync_event(inputs), catalog)
+
+        text = pokedex.generate_trainer_text(inputs, catalog)
+
+        if self.path == "/write":
+            path = pokedex.trainer_output_path(inputs["username"])
+            pokedex.write_trainer_text(path, text)
+
+            return json.dumps({"path": path, "bytes": len(text.encode("utf-8"))})
+
+        return text
+
+    def log_message(self, format, *args):
+        # Per-request access lines would drown the console during a raid.
+        pass
+
+
+def serve(host, port, csv_path, events_path=None):
+    # Single-threaded on purpose: requests are milliseconds long, and the
+    # catalog/output writers aren't built for concurrent use.
+    DaemonHandler.state = DaemonState(csv_path, events_path)
+    server = HTTPServer((host, port), DaemonHandler)
+
+    print(f"dexforge daemon listening on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        # A fresh snapshot makes the next start a plain load.
+        if DaemonHandler.state.events is not None:
+            DaemonHandler.state.events.checkpoint()
+
+        print(json.dumps(DaemonHandler.state.stats(), indent=2))
+
+
+# =========================
+# LOCAL CLIENT BENCHMARK
+# =========================
+
+def bench(url, trainers, requests):
+    latencies = []
+
+    for index in range(requests):
+        inputs = trainers[index % len(trainers)]
+
+        request = urllib.request.Request(
+            f"{url.rstrip('/')}/render",
+            data=json.dumps(inputs).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+
+        started = time.perf_counter()
+
+        with urllib.request.urlopen(request) as response:
+            response.read()
+
+        latencies.append(time.perf_counter() - started)
+
+    with urllib.request.urlopen(f"{url.rstrip('/')}/stats") as response:
+        server_stats = json.loads(response.read())
+
+    client = latency_summary(latencies)
+
+    print(f"{requests} requests over {len(trainers)} trainers")
+    print(f"client  p50 {client['p50_ms']:8.2f} ms   p99 {client['p99_ms']:8.2f} ms")
+    print(f"server  p50 {server_stats['p50_ms']:8.2f} ms   p99 {server_stats['p99_ms']:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident dexforge build service.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="run the daemon")
+    serve_parser.add_argument("--host", default=DAEMON_HOST)
+    serve_parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    serve_parser.add_argument("--csv", default=pokedex.POKEMON_CSV_PATH)
+    serve_parser.add_argument("--data-dir", default=pokedex.DATA_PATH)
+    serve_parser.add_argument("--buddy-file", default=pokedex.BUDDY_FILE_PATH)
+    serve_parser.add_argument("--events", default=pokedex.EVENTS_PATH, help="event log folder (default: EVENTS_PATH)")
+
+    bench_parser = commands.add_parser("bench", help="time requests against a running daemon")
+    bench_parser.add_argument("inputs", help="JSONL or CSV export with one row of Mix It Up values per trainer")
+    bench_parser.add_argument("--url", default=f"http://{DAEMON_HOST}:{DAEMON_PORT}")
+    bench_parser.add_argument("--requests", type=int, default=200)
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        pokedex.DATA_PATH = args.data_dir
+        pokedex.BUDDY_FILE_PATH = args.buddy_file
+        # Resident, so numpy's import cost is paid once (see COLUMNAR_STATS).
+        pokedex.COLUMNAR_STATS = columnar_available()
+        serve(args.host, args.port, args.csv, args.events)
+    else:
+        bench(args.url, read_trainer_inputs(args.inputs), args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,639 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from pokedex_helpers import safe_int, safe_float, safe_str
+from pokedex_output import atomic_file
+
+
+# =========================
+# TRAINER EVENT LOG
+# =========================
+#
+# Chat actions don't need Mix It Up to hand over a trainer's whole state:
+# each one becomes a small event appended to events/events.<segment>.jsonl
+# and folded into that trainer's parse_trainer_inputs() state, so its cost
+# follows the event, not the Pokédex.
+#
+#   {"type": "caught", "user": "ash", "species": "pikachu", "count": 1, "at": ...}
+#
+# The daemon keeps every trainer's folded state resident (POST /event) and
+# rewrites the trainer file from it. Without a daemon, "send" replays the
+# log itself and writes the file:
+#
+#   python python/pokedex_events.py send ash caught --species Pikachu
+#   python python/pokedex_events.py send ash ball_thrown --ball great
+#   python python/pokedex_events.py replay --write
+#   python python/pokedex_events.py compact
+#
+# Every SNAPSHOT_INTERVAL events the folded states go to events/snapshot.json
+# and the log moves on to a new segment; segments the snapshot covers are
+# deleted, so replay is the snapshot plus one short segment. A "sync" event
+# carries full Mix It Up inputs and replaces the trainer's state; the first
+# event for a trainer the log has never seen is preceded by one rebuilt from
+# their current trainer file.
+#
+# One process appends at a time: the daemon while it runs, otherwise the
+# script and "send". Don't run "compact" next to a running daemon.
+
+EVENT_LOG_VERSION = 1
+SNAPSHOT_FILE_NAME = "snapshot.json"
+SNAPSHOT_INTERVAL = 1000
+
+SEGMENT_PATTERN = re.compile(r"events\.(\d+)\.jsonl")
+
+BALLS = ("poke ball", "great ball", "ultra ball", "master ball")
+
+logger = logging.getLogger("dexforge")
+
+
+def segment_file_name(segment):
+    return f"events.{segment:06d}.jsonl"
+
+
+def list_segments(path):
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return []
+
+    return sorted(
+        int(match.group(1))
+        for match in map(SEGMENT_PATTERN.fullmatch, names)
+        if match
+    )
+
+
+def append_line(path, event):
+    # One write per event; fsync because the log, not the trainer file, is the record.
+    with open(path, "a", encoding="utf-8") as log_file:
+        log_file.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+        log_file.flush()
+        os.fsync(log_file.fileno())
+
+
+def append_event(path, event):
+    """Append an already normalized event to the newest segment in path."""
+    os.makedirs(path, exist_ok=True)
+    segments = list_segments(path)
+
+    append_line(os.path.join(path, segment_file_name(segments[-1] if segments else 0)), event)
+
+
+def read_segment(path):
+    try:
+        with open(path, "r", encoding="utf-8") as log_file:
+            lines = log_file.read().split("\n")
+    except FileNotFoundError:
+        return
+
+    # The last piece is "" unless an append was cut off; that event never happened.
+    for number, line in enumerate(lines[:-1], 1):
+        try:
+            yield json.loads(line)
+        except ValueError:
+            logger.warning("Skipping unreadable event %s:%d", path, number)
+
+    if lines[-1]:
+        logger.warning("Skipping partial event at the end of %s", path)
+
+
+# =========================
+# EVENTS
+# =========================
+
+def sync_event(inputs):
+    return {
+        "type": "sync",
+        "user": safe_str(inputs.get("username")),
+        "inputs": dict(inputs),
+        "at": time.time()
+    }
+
+
+def resolve_species(name, catalog):
+    index = catalog["species_index"].get(safe_str(name).lower())
+
+    if index is None:
+        raise ValueError(f"unknown species {name!r}")
+
+    return catalog["species_order"][index]
+
+
+def evolution_cost(event, catalog):
+    """Copies of event["from"] one evolution uses up, as is_evolvable_now() counts them."""
+    transition = catalog["transition_map"].get(event.get("species"))
+
+    if transition and transition["parent"] == event["from"] and transition["quantity_required"] > 0:
+        return transition["quantity_required"]
+
+    # No (matching) evolved species: the cheapest evolution, as the node records it.
+    return catalog["evolution"]["nodes"][event["from"]]["quantity_required"] or 1
+
+
+def normalize_event(event, catalog):
+    """Validate a raw event (CLI, daemon request) into the form the log stores."""
+    kind = safe_str(event.get("type"))
+    user = safe_str(event.get("user") or event.get("username"))
+
+    if kind not in EVENT_FOLDS:
+        raise ValueError(f"unknown event type {kind!r}")
+
+    if not user:
+        raise ValueError("event has no user")
+
+    normalized = {"type": kind, "user": user}
+
+    if kind == "sync":
+        if not isinstance(event.get("inputs"), dict):
+            raise ValueError("sync event has no inputs")
+
+        normalized["inputs"] = event["inputs"]
+    else:
+        normalized["count"] = safe_int(event.get("count"), 1)
+
+    for field in ("species", "from"):
+        if event.get(field):
+            normalized[field] = resolve_species(event[field], catalog)
+
+    if "from" in normalized:
+        # Copies of "from" given up in total; evolutions use the CSV's quantity_required each.
+        per_event = evolution_cost(normalized, catalog) if kind == "evolved" else 1
+        normalized["consumed"] = safe_int(event.get("consumed"), normalized["count"] * per_event)
+
+    if kind in ("ball_thrown", "ball_success"):
+        ball = safe_str(event.get("ball")).lower()
+
+        if not ball:
+            raise ValueError(f"{kind} event has no ball")
+
+        normalized["ball"] = ball if ball.endswith(" ball") else f"{ball} ball"
+
+    if kind == "friendship_gained":
+        if event.get("line"):
+            normalized["line"] = safe_str(event["line"])
+        elif "species" in normalized:
+            normalized["line"] = safe_str(
+                catalog["pokemon_metadata"][normalized["species"]]["evolution_line_id"]
+            )
+        else:
+            raise ValueError("friendship_gained event needs a line or a species")
+
+    if kind == "caught" and "species" not in normalized:
+        raise ValueError("caught event has no species")
+
+    normalized["at"] = event.get("at") or time.time()
+
+    return normalized
+
+
+# =========================
+# FOLDING
+# =========================
+
+def add_count(counts, key, amount):
+    counts[key] = max(counts.get(key, 0) + amount, 0)
+
+
+def fold_catch(state, event):
+    add_count(state["owned_counts"], event["species"], event["count"])
+
+
+def fold_ball(suffix):
+    def fold(state, event):
+        add_count(state["inventory_stats"], f"{event['ball']} {suffix}", event["count"])
+
+    return fold
+
+
+def fold_counter(item):
+    # Evolutions, trades and hatches may also say what was gained ("species", one
+    # per count) and lost ("from", "consumed" copies in all; see normalize_event).
+    def fold(state, event):
+        add_count(state["inventory_stats"], item, event["count"])
+
+        if "from" in event:
+            add_count(state["owned_counts"], event["from"], -event.get("consumed", event["count"]))
+
+        if "species" in event:
+            add_count(state["owned_counts"], event["species"], event["count"])
+
+    return fold
+
+
+def fold_friendship(state, event):
+    add_count(state["friendship_map"], event["line"], event["count"])
+
+
+def fold_buddy(field):
+    def fold(state, event):
+        state[field] = max(state[field] + event["count"], 0)
+
+    return fold
+
+
+def fold_sync(state, event):
+    # Replaced wholesale in apply_event.
+    pass
+
+
+# Event type -> fold(state, event), mutating state in place.
+EVENT_FOLDS = {
+    "sync": fold_sync,
+    "caught": fold_catch,
+    "ball_thrown": fold_ball("thrown"),
+    "ball_success": fold_ball("success"),
+    "evolved": fold_counter("evolution"),
+    "traded": fold_counter("trade"),
+    "egg_hatched": fold_counter("eggs hatched"),
+    "friendship_gained": fold_friendship,
+    "buddy_fed": fold_buddy("buddy_times_fed"),
+    "buddy_pet": fold_buddy("buddy_times_pet")
+}
+
+
+def blank_state(username):
+    import user_pokedex_script as pokedex
+
+    return trainer_state(pokedex.parse_trainer_inputs({"username": username}))
+
+
+def trainer_state(state):
+    # The parse report describes the inputs, not the trainer; it isn't folded or snapshotted.
+    state.pop("input_report", None)
+    return state
+
+
+def apply_event(trainers, event, catalog):
+    """Fold event into trainers ({trainer key: state}); returns the trainer's state."""
+    import user_pokedex_script as pokedex
+
+    key = event["user"].lower()
+
+    if event["type"] == "sync":
+        trainers[key] = trainer_state(pokedex.parse_trainer_inputs(event["inputs"], catalog))
+        return trainers[key]
+
+    state = trainers.get(key)
+
+    if state is None:
+        state = trainers[key] = blank_state(event["user"])
+
+    EVENT_FOLDS[event["type"]](state, event)
+
+    return state
+
+
+# =========================
+# SEEDING FROM TRAINER FILES
+# =========================
+
+# (Mix It Up input, state field) for the scalar inputs, as parse_trainer_inputs() reads them.
+STATE_INPUT_FIELDS = (
+    ("username", "username"),
+    ("useravatar", "avatar"),
+    ("userhours", "user_hours"),
+    ("userfollowage", "follow_age"),
+    ("usersubage", "sub_age"),
+    ("usertotalcommandsrun", "total_commands"),
+    ("usertotalsubsgifted", "user_subs_gifted"),
+    ("userbitslifetimeamount", "user_bits_lifetime"),
+    ("usertotalamountdonated", "user_total_donated"),
+    ("usertotalmonthssubbed", "user_sub_months"),
+    ("userprimaryrole", "user_primary_role"),
+    ("usersubtier", "user_sub_tier"),
+    ("usertotalstreamswatched", "user_streams_watched"),
+    ("usertotalchatmessagessent", "user_chat_messages"),
+    ("usertotaltimestagged", "user_times_tagged"),
+    ("usertrackbuddytimespet", "buddy_times_pet"),
+    ("usertrackbuddyberriesfed", "buddy_times_fed")
+)
+
+
+def format_counts(counts):
+    return ", ".join(f"{name} x{count}" for name, count in counts.items())
+
+
+def state_inputs(state):
+    """Mix It Up inputs that parse back into state."""
+    inputs = {key: safe_str(state[field]) for key, field in STATE_INPUT_FIELDS}
+
+    inputs["userpokedexall"] = format_counts(state["owned_counts"])
+    inputs["usertrackall"] = format_counts(state["inventory_stats"])
+    inputs["userpokefriendshipall"] = format_counts(state["friendship_map"])
+    inputs["userpokebagall"] = format_counts(state["pokebag_contents"])
+
+    return inputs
+
+
+def state_from_document(document, catalog):
+    """
+    A state that builds document again (up to updated_at), from a full or split
+    trainer file; None when the file doesn't fit the catalog. Companions come
+    from buddies.txt, so only the pet/fed counters are taken from it.
+    """
+    import user_pokedex_script as pokedex
+
+    pokemon_state = pokedex.previous_pokemon_state(document, catalog)
+
+    if pokemon_state is None:
+        return None
+
+    counts, friendship = pokemon_state
+
+    pokeballs = document["trainer_stats"]["pokeballs"]
+    journey = document["trainer_stats"]["journey"]
+    companion = document.get("companion") or {}
+
+    inventory = {}
+
+    for ball in BALLS:
+        detail = pokeballs["details"][ball]
+        inventory[f"{ball} thrown"] = detail["thrown"]
+        inventory[f"{ball} success"] = detail["success"]
+
+    # Other balls only show up in the totals; one made-up ball keeps those right.
+    other_thrown = pokeballs["thrown"] - sum(pokeballs["details"][ball]["thrown"] for ball in BALLS)
+    other_success = pokeballs["success"] - sum(pokeballs["details"][ball]["success"] for ball in BALLS)
+
+    if other_thrown:
+        inventory["other ball thrown"] = other_thrown
+
+    if other_success:
+        inventory["other ball success"] = other_success
+
+    inventory["evolution"] = journey["times_evolved"]
+    inventory["trade"] = journey["times_traded"]
+    inventory["eggs hatched"] = journey["times_eggs_hatched"]
+
+    return {
+        "username": document["user"]["username"],
+        "avatar": document["user"]["avatar"],
+
+        "user_hours": journey["watch_hours"],
+        "follow_age": journey["follow_age"],
+        "sub_age": journey["sub_age"],
+        "total_commands": journey["commands_run"],
+
+        "user_subs_gifted": journey["subs_gifted"],
+        "user_bits_lifetime": journey["bits_donated"],
+        "user_total_donated": safe_float(journey["total_donated"]),
+        "user_sub_months": journey["sub_months"],
+
+        "user_primary_role": journey["primary_role"],
+        "user_sub_tier": journey["sub_tier"],
+        "user_streams_watched": journey["streams_watched"],
+        "user_chat_messages": journey["chat_messages"],
+        "user_times_tagged": journey["times_tagged"],
+
+        "buddy_times_pet": companion.get("times_pet", 0),
+        "buddy_times_fed": companion.get("times_fed", 0),
+
+        "friendship_map": {line_id: points for line_id, points in friendship.items() if points},
+        "owned_counts": {
+            key: count for key, count in zip(catalog["species_order"], counts) if count
+        },
+        "inventory_stats": inventory,
+        "pokebag_contents": dict(journey["pokebag"])
+    }
+
+
+def seed_event(username, catalog):
+    """A sync event rebuilt from username's trainer file, or None if there isn't a usable one."""
+    import user_pokedex_script as pokedex
+
+    previous, _ = pokedex.read_previous_document(pokedex.trainer_output_path(username), catalog)
+    state = state_from_document(previous, catalog) if previous is not None else None
+
+    if state is None:
+        return None
+
+    return sync_event(state_inputs(state))
+
+
+# =========================
+# LOG + SNAPSHOTS
+# =========================
+
+class EventLog:
+    def __init__(self, path, catalog, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.trainers = {}
+        self.segment = 0
+        self.pending = 0
+
+        os.makedirs(path, exist_ok=True)
+        self.load(catalog)
+
+    def segment_path(self, segment):
+        return os.path.join(self.path, segment_file_name(segment))
+
+    def load(self, catalog):
+        try:
+            with open(os.path.join(self.path, SNAPSHOT_FILE_NAME), "r", encoding="utf-8") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except (OSError, ValueError):
+            snapshot = None
+
+        if isinstance(snapshot, dict) and snapshot.get("version") == EVENT_LOG_VERSION:
+            self.trainers = snapshot["trainers"]
+            self.segment = snapshot["segment"]
+
+        # Segments before the snapshot's are already folded in (their delete may not have happened).
+        for segment in list_segments(self.path):
+            if segment < self.segment:
+                continue
+
+            for event in read_segment(self.segment_path(segment)):
+                try:
+                    apply_event(self.trainers, event, catalog)
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning("Skipping event %s: %s", json.dumps(event, ensure_ascii=False), e)
+                    continue
+
+                self.pending += 1
+
+            self.segment = segment
+
+    def append(self, event, catalog):
+        """Validate, log and fold event; returns the trainer's state (don't mutate it)."""
+        event = normalize_event(event, catalog)
+
+        if event["user"].lower() not in self.trainers and event["type"] != "sync":
+            seed = seed_event(event["user"], catalog)
+
+            if seed is not None:
+                self.record(seed, catalog)
+
+        state = self.record(event, catalog)
+
+        if self.pending >= self.snapshot_interval:
+            self.checkpoint()
+
+        return state
+
+    def record(self, event, catalog):
+        append_line(self.segment_path(self.segment), event)
+        self.pending += 1
+
+        return apply_event(self.trainers, event, catalog)
+
+    def checkpoint(self):
+        """Snapshot every trainer, start a new segment and drop the ones the snapshot covers."""
+        segment = self.segment + 1
+
+        # Created first: append_event() writes to the newest segment it finds.
+        open(self.segment_path(segment), "a").close()
+
+        with atomic_file(os.path.join(self.path, SNAPSHOT_FILE_NAME)) as snapshot_file:
+            json.dump(
+                {"version": EVENT_LOG_VERSION, "segment": segment, "trainers": self.trainers},
+                snapshot_file,
+                ensure_ascii=False,
+                separators=(",", ":")
+            )
+
+        self.segment = segment
+        self.pending = 0
+
+        for old in list_segments(self.path):
+            if old < segment:
+                try:
+                    os.remove(self.segment_path(old))
+                except OSError:
+                    pass
+
+
+# =========================
+# MAIN
+# =========================
+
+def send_to_daemon(url, event, timeout):
+    """The daemon's answer, or None when nothing is listening (the caller logs it itself)."""
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/event",
+        data=json.dumps(event).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise ValueError(json.loads(e.read()).get("error", e.reason))
+    except urllib.error.URLError as e:
+        # A daemon that is up but slow may still fold the event; only a refused
+        # connection means it's safe to log it here instead.
+        if isinstance(e.reason, ConnectionRefusedError):
+            return None
+        raise
+
+
+def write_state(state, catalog):
+    import user_pokedex_script as pokedex
+
+    path = pokedex.trainer_output_path(state["username"])
+    pokedex.write_trainer_text(path, pokedex.generate_state_text(state, catalog))
+
+    return path
+
+
+def main():
+    # The script imports this module; only the CLI needs the script's settings.
+    import user_pokedex_script as pokedex
+    from pokedex_catalog import load_catalog
+
+    parser = argparse.ArgumentParser(description="Trainer event log: send events, replay, compact.")
+    parser.add_argument("--events", default=pokedex.EVENTS_PATH, help="event log folder (default: EVENTS_PATH)")
+    parser.add_argument("--csv", default=pokedex.POKEMON_CSV_PATH, help="pokemon_list.csv to build against")
+    parser.add_argument("--data-dir", default=pokedex.DATA_PATH, help="where data/<user>.json files are written")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    send_parser = commands.add_parser("send", help="record one event and rewrite the trainer's file")
+    send_parser.add_argument("user")
+    send_parser.add_argument("type", choices=[kind for kind in EVENT_FOLDS if kind != "sync"])
+    send_parser.add_argument("--species", help="species caught, evolved into, traded for or hatched")
+    send_parser.add_argument("--from", dest="source", help="species given up (evolved, traded)")
+    send_parser.add_argument("--ball", help="ball for ball_thrown / ball_success, e.g. great")
+    send_parser.add_argument("--line", help="evolution line id for friendship_gained")
+    send_parser.add_argument("--count", type=int, default=1)
+    send_parser.add_argument(
+        "--consumed", type=int,
+        help="copies of --from given up in all (default: count, times quantity_required for evolved)"
+    )
+    send_parser.add_argument("--url", default=pokedex.DAEMON_URL, help="daemon to send to (default: DAEMON_URL)")
+
+    replay_parser = commands.add_parser("replay", help="fold the log and report what it holds")
+    replay_parser.add_argument("--write", action="store_true", help="rewrite every trainer file from the log")
+
+    commands.add_parser("compact", help="snapshot now and drop the folded segments")
+
+    args = parser.parse_args()
+    pokedex.configure_logging()
+
+    if not args.events:
+        parser.error("no event log folder: set EVENTS_PATH or pass --events")
+
+    pokedex.DATA_PATH = args.data_dir
+
+    if args.command == "send":
+        event = {
+            "type": args.type,
+            "user": args.user,
+            "species": args.species,
+            "from": args.source,
+            "ball": args.ball,
+            "line": args.line,
+            "count": args.count,
+            "consumed": args.consumed
+        }
+
+        if args.url:
+            try:
+                answer = send_to_daemon(args.url, event, pokedex.DAEMON_TIMEOUT)
+            except (OSError, ValueError) as e:
+                print(f"Daemon failed: {e}")
+                sys.exit(1)
+
+            if answer is not None:
+                print(f"{args.type} -> {answer['path']}")
+                return
+
+    catalog = load_catalog(args.csv)
+
+    started = time.perf_counter()
+    log = EventLog(args.events, catalog)
+    loaded = time.perf_counter() - started
+
+    if args.command == "send":
+        try:
+            state = log.append(event, catalog)
+        except ValueError as e:
+            print(f"Rejected: {e}")
+            sys.exit(1)
+
+        print(f"{args.type} -> {write_state(state, catalog)}")
+    elif args.command == "replay":
+        print(
+            f"{len(log.trainers)} trainers, {log.pending} events past the snapshot "
+            f"(segment {log.segment}), loaded in {loaded * 1000:.1f} ms"
+        )
+
+        if args.write:
+            for state in log.trainers.values():
+                print(f"  {write_state(state, catalog)}")
+    else:
+        log.checkpoint()
+        print(f"Snapshot of {len(log.trainers)} trainers written, log continues at segment {log.segment}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+from pokedex_helpers import safe_int, safe_str
+
+
+# =========================
+# EVOLUTION GRAPH
+# =========================
+#
+# Built once per compiled catalog. transition_map is keyed by child
+# (requirement lives on the child); the graph adds the reverse
+# parent -> children index so parent-side checks (quantity, evolvable)
+# are lookups instead of scans over every transition.
+
+def build_evolution_graph(pokemon_metadata, species_order, transition_map):
+    # ---- PARENT -> CHILDREN ADJACENCY (BRANCHING LINES LIKE EEVEE) ----
+    children = {}
+
+    for child_key, transition in transition_map.items():
+        children.setdefault(transition["parent"], []).append(child_key)
+
+    # ---- PER-SPECIES NODES ----
+    nodes = {}
+
+    for key in species_order:
+        meta = pokemon_metadata[key]
+        transition = transition_map.get(key)
+
+        requirement = transition["requirement"] if transition else ""
+        requirement_text = safe_str(requirement).strip().lower()
+
+        # Use MINIMUM quantity required across children
+        child_quantities = [
+            transition_map[child_key]["quantity_required"]
+            for child_key in children.get(key, [])
+            if transition_map[child_key]["quantity_required"] > 0
+        ]
+
+        # Normalize stage to int (important for filtering)
+        stage_int = safe_int(meta["evolution_stage"], 0)
+
+        nodes[key] = {
+            "stage": "mega" if stage_int == 4 else stage_int,
+            "parent": transition["parent"] if transition else None,
+            "children": children.get(key, []),
+            "requirement": requirement,
+            "item_required": transition["item_required"] if transition else False,
+            "requires_stone": "stone" in requirement_text,
+            "requires_trade": "trade" in requirement_text,
+            "requires_friendship": "friendship" in requirement_text,
+            "quantity_required": min(child_quantities) if child_quantities else 0
+        }
+
+    # ---- EVOLUTION LINES ----
+    # Members stay in pokedex order; the display entries are sorted by stage.
+    lines = {}
+
+    for key in species_order:
+        line_id = pokemon_metadata[key]["evolution_line_id"]
+        lines.setdefault(line_id, []).append(key)
+
+    line_entries = {}
+
+    for line_id, keys in lines.items():
+        line = sorted(
+            (pokemon_metadata[key] for key in keys),
+            key=lambda x: safe_int(x["evolution_stage"], 0)
+        )
+
+        line_entries[line_id] = [
+            {
+                "name": evo["name"],
+                "pokedex_number": evo["pokedex_number"],
+                "image": evo["image"],
+                "evolution_stage": evo["evolution_stage"]
+            }
+            for evo in line
+        ]
+
+    # ---- LINE REPRESENTATIVES ----
+    # Companions show a line's lowest pokedex number member. Keyed by the
+    # line id as text, the way buddies.txt stores it.
+    line_representatives = {}
+
+    for line_id, keys in lines.items():
+        line_representatives.setdefault(safe_str(line_id), keys[0])
+
+    # ---- REGION EVOLUTION LINES ----
+    # A line belongs to the region of its lowest pokedex number member.
+    region_lines = {}
+
+    for line_id, keys in lines.items():
+        region = pokemon_metadata[keys[0]]["region"]
+        region_lines.setdefault(region, []).append(line_id)
+
+    return {
+        "nodes": nodes,
+        "children": children,
+        "lines": lines,
+        "line_entries": line_entries,
+        "line_representatives": line_representatives,
+        "region_lines": region_lines
+    }
+
+
+# =========================
+# LOOKUPS
+# =========================
+
+def is_evolvable_now(node, count):
+    required = node["quantity_required"]
+    return count > 0 and required > 0 and count >= required
+
+
+def line_is_complete(graph, line_id, owned_counts):
+    return all(owned_counts.get(key, 0) > 0 for key in graph["lines"].get(line_id, []))
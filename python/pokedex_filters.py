@@ -0,0 +1,99 @@
+import base64
+import unicodedata
+
+
+# =========================
+# FILTER INDEX
+# =========================
+#
+# Precomputed membership bitsets for every filter on the Pokédex page, so
+# js/pokedex.js answers a filter change by AND-ing a few byte arrays instead
+# of re-running its predicate over every Pokémon. Bit i stands for the
+# document's pokemon[i] (catalog order, in both output modes); bytes are
+# least significant bit first and base64 encoded.
+#
+#   "flags"  -> {flag: bitset}
+#   "groups" -> {"region" | "type" | "stage": {value: bitset}}
+#   "names"  -> normalized names (lowercase, accents stripped) for search
+
+FILTER_INDEX_VERSION = 1
+
+# Flag -> test on a full document entry; mirrors applyFilters() in js/pokedex.js.
+FLAG_FILTERS = {
+    "owned": lambda p: p["owned"],
+    "line_complete": lambda p: p.get("line_complete"),
+    "evolvable_now": lambda p: p.get("evolvable_now"),
+    "legendary": lambda p: p.get("is_legendary"),
+    "mythic": lambda p: p.get("is_mythic"),
+    "hatchable": lambda p: p.get("is_hatchable"),
+    "stone": lambda p: p.get("requires_stone"),
+    "trade": lambda p: p.get("requires_trade"),
+    "friendship": lambda p: p.get("friendship_requirement"),
+    "friendship_points": lambda p: p.get("friendship_points", 0) > 0
+}
+
+
+def normalize_name(name):
+    # Same as normalizeSearch() on the page: NFKD, drop combining marks, lowercase.
+    decomposed = unicodedata.normalize("NFKD", name)
+
+    return "".join(
+        character for character in decomposed
+        if not unicodedata.category(character).startswith("M")
+    ).lower()
+
+
+def group_values(p):
+    types = [p["primary_type"].lower()]
+    secondary = p.get("secondary_type")
+
+    if secondary and secondary.lower() != "null":
+        types.append(secondary.lower())
+
+    return (
+        ("region", (p["region"],)),
+        ("type", types),
+        # String(evolution_stage) on the page: 1 -> "1", "mega" -> "mega"
+        ("stage", (str(p["evolution_stage"]),))
+    )
+
+
+def encode_bitset(bits):
+    return base64.b64encode(bytes(bits)).decode("ascii")
+
+
+def build_filter_index(pokemon_list):
+    width = (len(pokemon_list) + 7) // 8
+
+    flags = {name: bytearray(width) for name in FLAG_FILTERS}
+    groups = {"region": {}, "type": {}, "stage": {}}
+    names = []
+
+    for index, p in enumerate(pokemon_list):
+        position, bit = index >> 3, 1 << (index & 7)
+
+        for name, test in FLAG_FILTERS.items():
+            if test(p):
+                flags[name][position] |= bit
+
+        for group, values in group_values(p):
+            for value in values:
+                bits = groups[group].get(value)
+
+                if bits is None:
+                    bits = groups[group][value] = bytearray(width)
+
+                bits[position] |= bit
+
+        names.append(normalize_name(p["name"]))
+
+    return {
+        "version": FILTER_INDEX_VERSION,
+        "size": len(pokemon_list),
+        "flags": {name: encode_bitset(bits) for name, bits in flags.items()},
+        "groups": {
+            group: {value: encode_bitset(bits) for value, bits in sets.items()}
+            for group, sets in groups.items()
+        },
+        "names": names
+    }
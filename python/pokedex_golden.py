@@ -0,0 +1,627 @@
+import argparse
+import csv
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import user_pokedex_script as pokedex
+from pokedex_catalog import load_catalog
+from pokedex_columnar import columnar_available
+from pokedex_events import state_from_document, state_inputs
+from pokedex_manifest import is_trainer_file
+from pokedex_tokenizer import new_report, tokenize_counts, walk_counts
+from pokedex_split import SPLIT_FORMAT, CATALOG_FILE_NAME, TRAINER_POKEMON_FIELDS, build_catalog_document
+
+
+# =========================
+# GOLDEN OUTPUT HARNESS
+# =========================
+#
+# Proves a change to the pipeline leaves the trainer files alone. Every
+# trainer document in data/ is turned back into the Mix It Up inputs that
+# built it (plus a pokemon_list.csv per CSV revision found in data/ and a
+# buddies.txt, rebuilt from the documents themselves), run through each
+# engine, and deep-diffed against the stored document. updated_at and the
+# other fixture-dependent keys below are ignored. Timings are best-of
+# --repeat per trainer, with speedups against the first engine.
+#
+#   python python/pokedex_golden.py
+#   python python/pokedex_golden.py --engines run build columnar
+#   python python/pokedex_golden.py --script old/user_pokedex_script.py --work golden_fixtures
+#
+# Engines: "run" is run() in this process; "build" and "incremental" call
+# the document builders directly; "columnar" forces the numpy stats path.
+# --script runs a script file the way Mix It Up does (placeholders filled
+# in, one process per trainer), so its times include interpreter start-up;
+# it keeps its own output settings, so point it at files written the same way.
+# The count-blob cases below run first, through both tokenizer paths.
+# Exits 1 on any mismatch, so it can gate a change.
+
+# Top-level keys that legitimately differ from the stored documents.
+# "catalog" carries the CSV's hash, and the fixture CSV isn't the original.
+IGNORED_KEYS = ("updated_at", "revision", "catalog")
+
+# The committed documents, not DATA_PATH (that points at the streamer's site).
+REPO_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+CSV_HEADER = (
+    "number", "name", "pokedex_number", "form", "primary_type", "secondary_type",
+    "generation", "region", "rarity", "is_legendary", "is_mythic", "is_hatchable",
+    "evolution", "requirement", "quantity_required", "item_required",
+    "evolution_stage", "evolution_line_id",
+    "hp", "attack", "defense", "sp_attack", "sp_defense", "speed",
+    "height", "weight", "pokedex_entry"
+)
+
+# Per-species fields that come from the trainer rather than the CSV.
+TRAINER_FIELDS = TRAINER_POKEMON_FIELDS + ("owned",)
+
+# Mismatching paths printed per trainer and engine.
+DIFF_LIMIT = 8
+
+
+# =========================
+# FIXTURES
+# =========================
+
+def read_trainer_documents(data_dir):
+    """([(name, text, document)], [(name, reason)]) for data_dir's trainer files."""
+    documents = []
+    skipped = []
+
+    for name in sorted(os.listdir(data_dir)):
+        if not is_trainer_file(name):
+            continue
+
+        try:
+            with open(os.path.join(data_dir, name), "r", encoding="utf-8") as trainer_file:
+                text = trainer_file.read()
+
+            document = json.loads(text)
+        except (OSError, ValueError):
+            skipped.append((name, "not readable JSON"))
+            continue
+
+        if not isinstance(document, dict) or not isinstance(document.get("trainer_stats"), dict):
+            skipped.append((name, "not a trainer document"))
+            continue
+
+        documents.append((name, text, document))
+
+    return documents, skipped
+
+
+def species_entries(document):
+    # A full trainer file's species data with the trainer left out.
+    return [
+        {field: value for field, value in p.items() if field not in TRAINER_FIELDS}
+        for p in document["pokemon"]
+    ]
+
+
+def group_by_catalog(data_dir, documents):
+    """
+    ([(species, documents)], skipped): trainer files grouped by the species table
+    they were built with. data/ spans several CSV revisions, and each file is
+    checked against its own.
+    """
+    groups = {}
+    skipped = []
+
+    try:
+        with open(os.path.join(data_dir, CATALOG_FILE_NAME), "r", encoding="utf-8") as catalog_file:
+            catalog_document = json.load(catalog_file)
+    except (OSError, ValueError):
+        catalog_document = None
+
+    for entry in documents:
+        name, _, document = entry
+
+        if document.get("format") == SPLIT_FORMAT:
+            # Split files can only be rebuilt against the catalog.json they were written for.
+            if not catalog_document or document.get("catalog", {}).get("version") != catalog_document.get("version"):
+                skipped.append((name, f"written for another {CATALOG_FILE_NAME}"))
+                continue
+
+            species = catalog_document["pokemon"]
+        elif isinstance(document.get("pokemon"), list):
+            species = species_entries(document)
+        else:
+            skipped.append((name, "no species list"))
+            continue
+
+        key = json.dumps(species, ensure_ascii=False, sort_keys=True)
+        groups.setdefault(key, (species, []))[1].append(entry)
+
+    return list(groups.values()), skipped
+
+
+def csv_flag(value):
+    return str(bool(value)).lower()
+
+
+def fixture_csv_rows(species):
+    """pokemon_list.csv rows that compile back into the catalog species was built from."""
+    lines = {}
+
+    for p in species:
+        lines.setdefault(p["evolution_line_id"], []).append(p)
+
+    # Each species past stage 1 evolves from the first species one stage below it in its line.
+    children = {}
+
+    for p in species:
+        stage = p["evolution_stage"]
+
+        if not isinstance(stage, int) or stage <= 1:
+            continue
+
+        parents = [q for q in lines[p["evolution_line_id"]] if q["evolution_stage"] == stage - 1]
+
+        if parents:
+            children.setdefault(parents[0]["name"], []).append(p)
+
+    rows = []
+
+    for p in species:
+        # "https://.../25-alola.svg" -> "alola"
+        image_name = p["image"].rsplit("/", 1)[-1].rsplit(".", 1)[0]
+        form = image_name.split("-", 1)[1] if "-" in image_name else ""
+
+        base = {
+            "name": p["name"],
+            "pokedex_number": p["pokedex_number"],
+            "form": form,
+            "primary_type": p["primary_type"],
+            "secondary_type": p["secondary_type"] or "null",
+            "generation": p["generation"],
+            "region": p["region"],
+            "rarity": p["rarity"],
+            "is_legendary": csv_flag(p["is_legendary"]),
+            "is_mythic": csv_flag(p["is_mythic"]),
+            "is_hatchable": csv_flag(p["is_hatchable"]),
+            "evolution_stage": p["evolution_stage"],
+            "evolution_line_id": p["evolution_line_id"],
+            "height": p["physical"]["height"],
+            "weight": p["physical"]["weight"],
+            "pokedex_entry": p["pokedex_entry"],
+            **p["stats"]
+        }
+
+        evolutions = children.get(p["name"], [])
+
+        if not evolutions:
+            rows.append({
+                **base, "number": p["pokedex_number"],
+                "evolution": "null", "requirement": "", "quantity_required": 0, "item_required": "no"
+            })
+            continue
+
+        # The species row names the first evolution; "N.1", "N.2" rows add branches.
+        for branch, child in enumerate(evolutions):
+            rows.append({
+                **base,
+                "number": p["pokedex_number"] if branch == 0 else f"{p['pokedex_number']}.{branch}",
+                "evolution": child["name"],
+                "requirement": child["requirement"],
+                "quantity_required": p["quantity_required"],
+                "item_required": "yes" if child["item_required"] else "no"
+            })
+
+    return rows
+
+
+def write_catalog_csv(path, species):
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_HEADER)
+        writer.writeheader()
+        writer.writerows(fixture_csv_rows(species))
+
+
+def write_buddy_file(path, documents):
+    # "<username> ... <line_id> ..." rows, as pokedex_companion reads them
+    with open(path, "w", encoding="utf-8") as buddy_file:
+        for _, _, document in documents:
+            companion = document.get("companion")
+
+            if companion:
+                buddy_file.write(f"{document['user']['username']} x {companion['evolution_line_id']} x\n")
+
+
+def rebuilds_species(catalog, species, split):
+    # Older scripts put some fields where no CSV can put them today (e.g. stone
+    # requirements on the species that evolves); those files can't be golden.
+    if split:
+        rebuilt = build_catalog_document(catalog, pokedex.FRIENDSHIP_REQUIREMENT)["pokemon"]
+    else:
+        rebuilt = species_entries(pokedex.build_trainer_document({"username": ""}, catalog))
+
+    return json.loads(json.dumps(rebuilt)) == species
+
+
+def build_cases(groups, work_dir):
+    """
+    Trainer cases with reconstructed inputs, each with the catalog compiled from
+    its group's fixture CSV. The inputs are also saved as inputs.jsonl (one per
+    catalog) for batch_regenerate and the daemon benchmark.
+    """
+    cases = []
+    skipped = []
+
+    for number, (species, documents) in enumerate(groups, 1):
+        csv_path = os.path.join(work_dir, f"pokemon_list.{number}.csv")
+        write_catalog_csv(csv_path, species)
+        catalog = load_catalog(csv_path)
+
+        if not rebuilds_species(catalog, species, documents[0][2].get("format") == SPLIT_FORMAT):
+            skipped.extend((name, "its species table can't be rebuilt as a CSV") for name, _, _ in documents)
+            continue
+
+        with open(os.path.join(work_dir, f"inputs.{number}.jsonl"), "w", encoding="utf-8") as inputs_file:
+            for name, text, document in documents:
+                state = state_from_document(document, catalog)
+
+                if state is None:
+                    skipped.append((name, "doesn't match its rebuilt catalog"))
+                    continue
+
+                inputs = state_inputs(state)
+                inputs_file.write(json.dumps(inputs, ensure_ascii=False) + "\n")
+
+                cases.append({
+                    "name": name,
+                    "text": text,
+                    "document": document,
+                    "inputs": inputs,
+                    "csv_path": csv_path,
+                    "catalog": catalog
+                })
+
+    return cases, skipped
+
+
+def configure_fixture(work_dir, buddy_path):
+    # Nothing below may touch the real data/, store, event log or daemon.
+    pokedex.BUDDY_FILE_PATH = buddy_path
+    pokedex.DATA_PATH = os.path.join(work_dir, "data")
+    pokedex.STORE_PATH = None
+    pokedex.EVENTS_PATH = None
+    pokedex.DAEMON_URL = None
+    pokedex.OUTPUT_PATH = None
+    pokedex.INCREMENTAL_MODE = False
+    pokedex.PATCH_FEED = False
+    pokedex.PRECOMPRESS = ()
+    pokedex.METRICS_ENABLED = False
+
+    os.makedirs(pokedex.DATA_PATH, exist_ok=True)
+
+
+def configure_case(case):
+    # Rebuild in the stored file's own output settings.
+    document = case["document"]
+
+    pokedex.POKEMON_CSV_PATH = case["csv_path"]
+    pokedex.OUTPUT_MODE = SPLIT_FORMAT if document.get("format") == SPLIT_FORMAT else "full"
+    pokedex.OUTPUT_FORMAT = "compact" if "schema_version" in document else "pretty"
+    pokedex.FILTER_INDEX = "filters" in document
+
+
+# =========================
+# ENGINES
+# =========================
+#
+# engine(case) -> the trainer file's text
+
+def run_engine(case):
+    pokedex.mix_it_up_inputs = lambda: dict(case["inputs"])
+    return pokedex.run()
+
+
+def build_engine(case):
+    catalog = case["catalog"]
+    return pokedex.render_trainer_document(pokedex.build_trainer_document(case["inputs"], catalog), catalog)
+
+
+def incremental_engine(case):
+    # As if Mix It Up resent the inputs the stored file was built from.
+    catalog = case["catalog"]
+    previous = json.loads(case["text"])
+    output = pokedex.incremental_trainer_document(case["inputs"], catalog, previous)
+
+    return case["text"] if output is None else pokedex.render_trainer_document(output, catalog)
+
+
+def columnar_engine(case):
+    settings = pokedex.COLUMNAR_STATS, pokedex.COLUMNAR_STATS_MIN_SPECIES
+    pokedex.COLUMNAR_STATS, pokedex.COLUMNAR_STATS_MIN_SPECIES = True, 0
+
+    try:
+        return build_engine(case)
+    finally:
+        pokedex.COLUMNAR_STATS, pokedex.COLUMNAR_STATS_MIN_SPECIES = settings
+
+
+ENGINES = {
+    "run": run_engine,
+    "build": build_engine,
+    "incremental": incremental_engine,
+    "columnar": columnar_engine
+}
+
+
+def script_engine(script_path, work_dir):
+    """Run script_path like Mix It Up: placeholders filled in, one fresh process per trainer."""
+    with open(script_path, "r", encoding="utf-8") as script_file:
+        source = script_file.read()
+
+    # Point the script's hard-coded paths at the fixtures (older scripts keep them inline).
+    source = re.sub(r'r"[^"\n]*buddies\.txt"', lambda _: repr(pokedex.BUDDY_FILE_PATH), source)
+    source = re.sub(r"^DEXFORGE_PATH = .*$", lambda _: f"DEXFORGE_PATH = {work_dir!r}", source, flags=re.M)
+
+    run_path = os.path.join(work_dir, "golden_run.py")
+    environment = {
+        **os.environ,
+        "PYTHONPATH": os.path.dirname(os.path.abspath(__file__)),
+        "PYTHONIOENCODING": "utf-8"
+    }
+
+    def engine(case):
+        text = re.sub(r'r"[^"\n]*pokemon_list\.csv"', lambda _: repr(case["csv_path"]), source)
+
+        for key in case["inputs"]:
+            text = text.replace(f'"${key}"', json.dumps(case["inputs"][key]))
+
+        with open(run_path, "w", encoding="utf-8") as run_file:
+            run_file.write(text)
+
+        result = subprocess.run(
+            [sys.executable, run_path], capture_output=True, text=True, encoding="utf-8",
+            cwd=work_dir, env=environment
+        )
+
+        # Mix It Up would have saved stderr into the trainer file too.
+        if result.returncode or result.stderr:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no output")
+
+        return result.stdout
+
+    return engine
+
+
+# =========================
+# DIFF
+# =========================
+
+def diff_documents(expected, actual, path="$"):
+    """Yield a line per difference; ints and floats count as different types."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in expected:
+            if key not in actual:
+                yield f"{path}.{key}: missing"
+            else:
+                yield from diff_documents(expected[key], actual[key], f"{path}.{key}")
+
+        for key in actual:
+            if key not in expected:
+                yield f"{path}.{key}: unexpected"
+
+        if expected.keys() == actual.keys() and list(expected) != list(actual):
+            yield f"{path}: key order differs"
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            yield f"{path}: {len(expected)} items != {len(actual)}"
+
+        for index, (old, new) in enumerate(zip(expected, actual)):
+            yield from diff_documents(old, new, f"{path}[{index}]")
+    elif type(expected) is not type(actual) or expected != actual:
+        yield f"{path}: {json.dumps(expected, ensure_ascii=False)[:80]} != {json.dumps(actual, ensure_ascii=False)[:80]}"
+
+
+def comparable(document):
+    return {key: value for key, value in document.items() if key not in IGNORED_KEYS}
+
+
+# =========================
+# TOKENIZER CASES
+# =========================
+
+# (blob, fold_case, expected counts, expected malformed). Every case must give
+# the same result through tokenize_counts() and the walk alone, so one bad
+# entry in a blob can't change how the others parse.
+TOKENIZER_CASES = [
+    ("Poke Ball x3, Great Ball x1", True, {"poke ball": 3, "great ball": 1}, []),
+    # " X" is not a count marker, with or without a bad entry next to it.
+    ("Poke Ball Thrown X3", True, {}, ["Poke Ball Thrown X3"]),
+    ("Poke Ball Thrown X3, bad entry", True, {}, ["Poke Ball Thrown X3", "bad entry"]),
+    ("Poke Ball Thrown x3, Great X2", True, {"poke ball thrown": 3}, ["Great X2"]),
+    ("Pikachu x2, bad entry", False, {"Pikachu": 2}, ["bad entry"])
+]
+
+
+def check_tokenizer():
+    """Print and return the mismatching tokenizer cases."""
+    failures = []
+
+    for raw, fold_case, expected, malformed in TOKENIZER_CASES:
+        counts, report = tokenize_counts(raw, fold_case=fold_case)
+        walked = walk_counts(raw, fold_case, None, None, new_report())
+
+        if counts != expected or report["malformed"] != malformed or walked != counts:
+            failures.append(raw)
+            print(f"  tokenizer {raw!r}: {counts} {report['malformed']} (walk {walked})")
+
+    print(f"{len(TOKENIZER_CASES)} tokenizer cases, {len(failures)} failed")
+
+    return failures
+
+
+# =========================
+# HARNESS
+# =========================
+
+def time_engine(engine, case, repeat):
+    best = None
+    text = None
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = engine(case)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return text, best
+
+
+def check_case(case, engines, repeat):
+    """{engine: {"seconds", "diffs"} or {"error"}} for one trainer."""
+    configure_case(case)
+    expected = comparable(case["document"])
+    results = {}
+
+    for name, engine in engines.items():
+        try:
+            text, seconds = time_engine(engine, case, repeat)
+            diffs = list(diff_documents(expected, comparable(json.loads(text))))
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+
+        results[name] = {"seconds": seconds, "diffs": diffs}
+
+    return results
+
+
+def print_case(case, results, reference):
+    columns = []
+    base = results.get(reference, {}).get("seconds")
+
+    for name, result in results.items():
+        if "error" in result:
+            columns.append(f"{name} ERROR")
+            continue
+
+        speedup = f" x{base / result['seconds']:5.2f}" if base and name != reference else ""
+        flag = "" if not result["diffs"] else " DIFF"
+        columns.append(f"{name} {result['seconds'] * 1000:8.2f} ms{speedup}{flag}")
+
+    print(f"{case['name'][:-len('.json')]:<30} " + "   ".join(columns))
+
+    for name, result in results.items():
+        if "error" in result:
+            print(f"    {name}: {result['error']}")
+            continue
+
+        for line in result["diffs"][:DIFF_LIMIT]:
+            print(f"    {name}: {line}")
+
+        if len(result["diffs"]) > DIFF_LIMIT:
+            print(f"    {name}: ... {len(result['diffs']) - DIFF_LIMIT} more")
+
+
+def print_summary(all_results, reference):
+    names = list(all_results[0])
+    width = max(len(name) for name in names + ["engine"])
+
+    print("")
+    print(f"{'engine':<{width}} {'trainers':>8} {'failed':>7} {'total ms':>10} {'median x vs ' + reference:>18}")
+
+    for name in names:
+        results = [case_results[name] for case_results in all_results]
+        failed = sum(1 for result in results if "error" in result or result["diffs"])
+        seconds = [result["seconds"] for result in results if "seconds" in result]
+
+        speedups = [
+            case_results[reference]["seconds"] / case_results[name]["seconds"]
+            for case_results in all_results
+            if "seconds" in case_results.get(reference, {}) and "seconds" in case_results[name]
+        ]
+
+        median = f"x{statistics.median(speedups):.2f}" if speedups and name != reference else "-"
+        print(f"{name:<{width}} {len(results):>8} {failed:>7} {sum(seconds) * 1000:>10.1f} {median:>18}")
+
+
+def check_all(args, documents, groups, skipped, engine_names, work_dir):
+    """Build the fixtures in work_dir, check every trainer; True if anything failed."""
+    buddy_path = os.path.join(work_dir, "buddies.txt")
+    write_buddy_file(buddy_path, documents)
+    configure_fixture(work_dir, buddy_path)
+
+    cases, unmatched = build_cases(groups, work_dir)
+    skipped += unmatched
+
+    engines = {name: ENGINES[name] for name in engine_names}
+
+    for script_path in args.script:
+        engines[f"script:{os.path.basename(script_path)}"] = script_engine(script_path, work_dir)
+
+    print(f"{len(cases)} trainers over {len(groups)} catalog revisions from {args.data_dir}")
+
+    for name, reason in skipped:
+        print(f"  skipped {name}: {reason}")
+
+    print("")
+
+    if not cases:
+        return True
+
+    reference = next(iter(engines))
+    all_results = []
+
+    for case in cases:
+        results = check_case(case, engines, args.repeat)
+        print_case(case, results, reference)
+        all_results.append(results)
+
+    print_summary(all_results, reference)
+
+    return any("error" in result or result["diffs"] for results in all_results for result in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check engines against the stored trainer files and time them.")
+    parser.add_argument("--data-dir", default=REPO_DATA_PATH, help="folder holding the golden <user>.json files (default: the repo's data/)")
+    parser.add_argument(
+        "--engines", nargs="*", choices=list(ENGINES), default=None,
+        help="in-process engines, first is the speed reference (default: run build incremental [columnar])"
+    )
+    parser.add_argument("--script", action="append", default=[], help="also run this script file like Mix It Up does")
+    parser.add_argument("--trainers", nargs="*", help="only these usernames")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per trainer and engine (best is kept)")
+    parser.add_argument("--work", help="keep the fixtures (CSV, buddies.txt, inputs.jsonl) in this folder")
+    args = parser.parse_args()
+
+    engine_names = args.engines or ["run", "build", "incremental"] + (["columnar"] if columnar_available() else [])
+
+    if "columnar" in engine_names and not columnar_available():
+        parser.error("the columnar engine needs numpy")
+
+    tokenizer_failed = bool(check_tokenizer())
+    print("")
+
+    documents, skipped = read_trainer_documents(args.data_dir)
+
+    if args.trainers:
+        wanted = {pokedex.trainer_file_name(username) for username in args.trainers}
+        documents = [entry for entry in documents if entry[0] in wanted]
+
+    groups, unmatched = group_by_catalog(args.data_dir, documents)
+    skipped += unmatched
+
+    if args.work:
+        os.makedirs(args.work, exist_ok=True)
+        failed = check_all(args, documents, groups, skipped, engine_names, args.work)
+    else:
+        with tempfile.TemporaryDirectory(prefix="dexforge_golden_") as work_dir:
+            failed = check_all(args, documents, groups, skipped, engine_names, work_dir)
+
+    if failed or tokenizer_failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# =========================
+# SAFE HELPERS
+# =========================
+
+def safe_int(value, default=0):
+    try:
+        return int(value)
+    except:
+        return default
+
+
+def safe_float(value, default=0.0):
+    try:
+        return float(value)
+    except:
+        return default
+
+
+def safe_str(value, default=""):
+    if value is None:
+        return default
+    return str(value).strip()
@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from pokedex_output import COMPRESSED_ENCODINGS, atomic_file, write_atomically
+from pokedex_patches import PATCH_FEED_SUFFIX
+from pokedex_split import CATALOG_FILE_NAME
+
+
+# =========================
+# CONTENT-HASHED TRAINER FILES
+# =========================
+#
+# data/<user>.json keeps being written in place; publishing also copies it to
+# data/v/<user>.<hash>.json, a URL that never changes content and can be
+# cached forever, and points data/manifest.json at it:
+#
+#   {"version": 1, "trainers": {"<user>": {"file": "v/<user>.<hash>.json",
+#                                          "hash": ..., "bytes": ..., "encodings": [...]}}}
+#
+# The page fetches only the manifest with cache busting. The previous hashed
+# copy is kept so a page holding the old manifest can still load it.
+# watchdog_push.py runs this for every published batch (it is the only writer);
+# to (re)build everything by hand:
+#
+#   python python/pokedex_manifest.py
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+INDEX_FILE_NAME = "index.json"
+
+HASHED_DIR_NAME = "v"
+HASH_LENGTH = 12
+
+# Files in data/ that aren't trainers.
+NON_TRAINER_FILES = (CATALOG_FILE_NAME, INDEX_FILE_NAME, MANIFEST_FILE_NAME)
+
+
+def is_trainer_file(name):
+    # Patch feeds are polled directly and never get hashed copies.
+    return name.endswith(".json") and name not in NON_TRAINER_FILES \
+        and not name.endswith(PATCH_FEED_SUFFIX)
+
+
+def load_manifest(data_dir):
+    try:
+        with open(os.path.join(data_dir, MANIFEST_FILE_NAME), "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        manifest = None
+
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION, "trainers": {}}
+
+    return manifest
+
+
+def write_manifest(data_dir, manifest):
+    # Sorted keys keep the committed diff down to the trainers that moved.
+    with atomic_file(os.path.join(data_dir, MANIFEST_FILE_NAME)) as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def remove_hashed_copies(data_dir, user, keep=()):
+    hashed_dir = os.path.join(data_dir, HASHED_DIR_NAME)
+
+    try:
+        names = os.listdir(hashed_dir)
+    except OSError:
+        return
+
+    keep = {os.path.basename(file) for file in keep}
+    # "<user>.<hash>.json" and its compressed siblings
+    pattern = re.compile(rf"({re.escape(user)}\.[0-9a-f]{{{HASH_LENGTH}}}\.json)(\.\w+)?")
+
+    for name in names:
+        match = pattern.fullmatch(name)
+
+        if match and match.group(1) not in keep:
+            try:
+                os.remove(os.path.join(hashed_dir, name))
+            except OSError:
+                pass
+
+
+def publish_trainer(data_dir, manifest, name):
+    """Bring manifest up to date with data/<name>; True when its entry changed."""
+    user = name[:-len(".json")]
+    trainers = manifest["trainers"]
+    path = os.path.join(data_dir, name)
+
+    try:
+        with open(path, "rb") as trainer_file:
+            data = trainer_file.read()
+    except FileNotFoundError:
+        if user not in trainers:
+            return False
+
+        del trainers[user]
+        remove_hashed_copies(data_dir, user)
+        return True
+
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    previous = trainers.get(user)
+
+    if previous and previous["hash"] == digest:
+        return False
+
+    file = f"{HASHED_DIR_NAME}/{user}.{digest}.json"
+    hashed_path = os.path.join(data_dir, file)
+
+    os.makedirs(os.path.dirname(hashed_path), exist_ok=True)
+    write_atomically(hashed_path, data)
+
+    encodings = []
+
+    for encoding in COMPRESSED_ENCODINGS:
+        try:
+            with open(f"{path}.{encoding}", "rb") as sibling_file:
+                write_atomically(f"{hashed_path}.{encoding}", sibling_file.read())
+        except FileNotFoundError:
+            continue
+
+        encodings.append(encoding)
+
+    remove_hashed_copies(data_dir, user, keep=[file] + ([previous["file"]] if previous else []))
+
+    trainers[user] = {
+        "file": file,
+        "hash": digest,
+        "bytes": len(data),
+        "encodings": encodings
+    }
+
+    return True
+
+
+def sync_manifest(data_dir, names=None):
+    """Publish names (default: every trainer file and every manifest entry); True if the manifest changed."""
+    manifest = load_manifest(data_dir)
+
+    if names is None:
+        names = {name for name in os.listdir(data_dir) if is_trainer_file(name)}
+        names.update(f"{user}.json" for user in manifest["trainers"])
+
+    changed = False
+
+    for name in sorted(names):
+        if is_trainer_file(name):
+            changed = publish_trainer(data_dir, manifest, name) or changed
+
+    if changed or not os.path.exists(os.path.join(data_dir, MANIFEST_FILE_NAME)):
+        write_manifest(data_dir, manifest)
+
+    return changed
+
+
+# =========================
+# MAIN
+# =========================
+
+def main():
+    # The watchdog imports this module; only the CLI needs the script's settings.
+    import user_pokedex_script as pokedex
+
+    parser = argparse.ArgumentParser(description="Publish content-hashed trainer files and data/manifest.json.")
+    parser.add_argument("--data-dir", default=pokedex.DATA_PATH, help="folder holding data/<user>.json")
+    args = parser.parse_args()
+
+    changed = sync_manifest(args.data_dir)
+    manifest = load_manifest(args.data_dir)
+
+    print(
+        f"{len(manifest['trainers'])} trainers in {MANIFEST_FILE_NAME}"
+        f"{'' if changed else ', nothing changed'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
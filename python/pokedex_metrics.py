@@ -0,0 +1,200 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+logger = logging.getLogger("dexforge.metrics")
+
+
+# =========================
+# PHASE METRICS
+# =========================
+#
+# Opt-in per-phase timing for one trainer build. Enable with METRICS_ENABLED
+# in user_pokedex_script.py or DEXFORGE_METRICS=1; every run then appends one
+# JSON line (wall ms + allocated KB per phase) to the metrics log.
+# DEXFORGE_PROFILE=<path.prof> additionally dumps a cProfile of that run.
+#
+#   python python/pokedex_metrics.py logs/metrics.jsonl
+#   python python/pokedex_metrics.py logs/metrics.jsonl --last 200
+
+METRICS_ENV_VAR = "DEXFORGE_METRICS"
+PROFILE_ENV_VAR = "DEXFORGE_PROFILE"
+
+_run = None
+
+
+def env_flag(name):
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def metrics_enabled(configured=False):
+    return configured or env_flag(METRICS_ENV_VAR)
+
+
+def profile_path():
+    return os.environ.get(PROFILE_ENV_VAR) or None
+
+
+def start_run(track_allocations=True):
+    global _run
+
+    _run = {
+        "started": time.perf_counter(),
+        "phases": {},
+        "stack": [],
+        "tracing": track_allocations and not tracemalloc.is_tracing()
+    }
+
+    if _run["tracing"]:
+        tracemalloc.start()
+
+
+@contextmanager
+def phase(name):
+    """
+    Time the block as phase name (repeats add up); a no-op unless a run was started.
+    Phases opened inside another are recorded as "outer/inner".
+    """
+    if _run is None:
+        yield
+        return
+
+    stack = _run["stack"]
+    nested = bool(stack)
+    key = "/".join(stack + [name])
+    tracing = tracemalloc.is_tracing()
+
+    if tracing:
+        # Only the outermost phase owns the peak; nested ones count net allocations.
+        if not nested:
+            tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+
+    stack.append(name)
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stack.pop()
+
+        record = _run["phases"].setdefault(key, {"ms": 0.0, "alloc_kb": 0.0})
+        record["ms"] += elapsed * 1000
+
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            record["alloc_kb"] += max(0, (current if nested else peak) - before) / 1024
+
+
+def finish_run(log_path, **fields):
+    """Stop the current run and append its record to log_path; returns the record."""
+    global _run
+
+    if _run is None:
+        return None
+
+    run, _run = _run, None
+
+    if run["tracing"]:
+        tracemalloc.stop()
+
+    record = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        **fields,
+        "total_ms": round((time.perf_counter() - run["started"]) * 1000, 3),
+        "phases": {
+            name: {"ms": round(numbers["ms"], 3), "alloc_kb": round(numbers["alloc_kb"], 1)}
+            for name, numbers in run["phases"].items()
+        }
+    }
+
+    try:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+
+        with open(log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning("Could not append metrics to %s: %s", log_path, e)
+
+    return record
+
+
+# =========================
+# REPORT
+# =========================
+
+def read_records(log_path, last=None):
+    records = []
+
+    with open(log_path, "r", encoding="utf-8") as log_file:
+        for line in log_file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+
+    return records[-last:] if last else records
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(records):
+    """phase -> {runs, p50_ms, p95_ms, p50_alloc_kb}, phases in first-seen order, total last."""
+    times = defaultdict(list)
+    allocations = defaultdict(list)
+
+    for record in records:
+        for name, numbers in record.get("phases", {}).items():
+            times[name].append(numbers["ms"])
+            allocations[name].append(numbers["alloc_kb"])
+
+        times["total"].append(record["total_ms"])
+        allocations["total"].append(0.0)
+
+    return {
+        name: {
+            "runs": len(samples),
+            "p50_ms": percentile(samples, 0.50),
+            "p95_ms": percentile(samples, 0.95),
+            "p50_alloc_kb": statistics.median(allocations[name])
+        }
+        for name, samples in sorted(times.items(), key=lambda item: item[0] == "total")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize per-phase metrics across runs.")
+    parser.add_argument("log", help="metrics JSONL written with DEXFORGE_METRICS=1")
+    parser.add_argument("--last", type=int, default=None, help="only the most recent N runs")
+    args = parser.parse_args()
+
+    records = read_records(args.log, args.last)
+
+    if not records:
+        print("No runs recorded.")
+        return
+
+    print(f"{len(records)} runs from {records[0]['at']} to {records[-1]['at']}")
+    print(f"{'phase':<22} {'runs':>6} {'p50 ms':>10} {'p95 ms':>10} {'p50 alloc KB':>14}")
+
+    for name, summary in summarize(records).items():
+        print(
+            f"{name:<22} {summary['runs']:>6} {summary['p50_ms']:>10.2f} "
+            f"{summary['p95_ms']:>10.2f} {summary['p50_alloc_kb']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
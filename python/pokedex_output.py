@@ -0,0 +1,148 @@
+import gzip
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# =========================
+# OUTPUT FORMATS
+# =========================
+#
+# "pretty"  -> indent=2, exactly what the script has always printed
+# "compact" -> minified, stamped with schema_version (+ encodings when
+#              .json.gz / .json.br siblings are written next to it)
+#
+# js/pokedex.js reads schema_version/encodings from the plain .json and
+# switches to the smallest sibling it can decode on later loads.
+
+SCHEMA_VERSION = 2
+OUTPUT_FORMATS = ("pretty", "compact")
+
+# Sibling suffix -> compressor. "br" needs the optional brotli package.
+COMPRESSED_ENCODINGS = ("gz", "br")
+
+
+def available_encodings(encodings):
+    return tuple(
+        encoding for encoding in encodings
+        if encoding == "gz" or (encoding == "br" and brotli is not None)
+    )
+
+
+def versioned_document(document, encodings=()):
+    header = {"schema_version": SCHEMA_VERSION}
+
+    if encodings:
+        header["encodings"] = list(encodings)
+
+    return {**header, **document}
+
+
+def encode_document(document, output_format="pretty", encodings=()):
+    if output_format == "pretty":
+        return json.dumps(document, indent=2, ensure_ascii=False)
+
+    return json.dumps(
+        versioned_document(document, available_encodings(encodings)),
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+
+# =========================
+# ATOMIC WRITES
+# =========================
+#
+# Files under data/ are written to "<name>.<pid>.tmp" in the same folder,
+# fsynced, then renamed over the target, so the watchdog, git and the page
+# only ever see complete files. watchdog_push.py only queues .json names.
+
+TEMP_SUFFIX = ".tmp"
+
+
+def temp_path(path):
+    return f"{path}.{os.getpid()}{TEMP_SUFFIX}"
+
+
+@contextmanager
+def atomic_file(path, binary=False):
+    tmp_path = temp_path(path)
+
+    try:
+        with open(tmp_path, "wb" if binary else "w", encoding=None if binary else "utf-8") as tmp_file:
+            yield tmp_file
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_atomically(path, data):
+    with atomic_file(path, binary=isinstance(data, bytes)) as output_file:
+        output_file.write(data)
+
+
+# =========================
+# STREAMING WRITER
+# =========================
+
+def write_document(document, path, output_format="compact", encodings=()):
+    """Encode document straight into path (atomically) and refresh its compressed siblings."""
+    encodings = available_encodings(encodings)
+
+    with atomic_file(path) as output_file:
+        if output_format == "pretty":
+            json.dump(document, output_file, indent=2, ensure_ascii=False)
+        else:
+            json.dump(
+                versioned_document(document, encodings),
+                output_file,
+                ensure_ascii=False,
+                separators=(",", ":")
+            )
+
+    if encodings or any(os.path.exists(f"{path}.{encoding}") for encoding in COMPRESSED_ENCODINGS):
+        with open(path, "rb") as output_file:
+            write_compressed_siblings(path, output_file.read(), encodings)
+
+    return os.path.getsize(path)
+
+
+# =========================
+# PRECOMPRESSED SIBLINGS
+# =========================
+
+def compress(data, encoding):
+    if encoding == "gz":
+        # mtime=0 keeps the bytes stable, so unchanged data doesn't look changed to git.
+        return gzip.compress(data, compresslevel=9, mtime=0)
+
+    return brotli.compress(data)
+
+
+def write_compressed_siblings(path, data, encodings):
+    # Siblings that are no longer wanted are removed so the page can't load a stale one.
+    encodings = available_encodings(encodings)
+
+    for encoding in COMPRESSED_ENCODINGS:
+        sibling_path = f"{path}.{encoding}"
+
+        if encoding not in encodings:
+            try:
+                os.remove(sibling_path)
+            except OSError:
+                pass
+            continue
+
+        write_atomically(sibling_path, compress(data, encoding))
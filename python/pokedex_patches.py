@@ -0,0 +1,217 @@
+import copy
+import json
+import os
+
+from pokedex_output import atomic_file
+from pokedex_split import SPLIT_FORMAT
+
+
+# =========================
+# PATCH FEED
+# =========================
+#
+# Live overlays follow a trainer through data/<user>.patches.json instead of
+# re-fetching the whole trainer file after every catch:
+#
+#   {"version": 1, "revision": 42, "patches": [
+#       {"from": 41, "to": 42, "at": <updated_at>,
+#        "pokemon": {"<species key>": {"count": 3, "owned": true, ...}},
+#        "stats": [[["pokedex", "unique_owned"], 120], ...],
+#        "sections": {"companion": {...}}}
+#   ]}
+#
+# The trainer file carries the "revision" it was written at. A client at
+# revision N applies the patches from N onward; if N has fallen out of the
+# ring (or the ring restarted) it reloads the full file. Regenerations that
+# change nothing but updated_at keep the revision and add no patch.
+
+PATCH_FEED_VERSION = 1
+PATCH_FEED_SUFFIX = ".patches.json"
+
+# Per-species fields a regeneration can change, with the value split files
+# leave out (owned is added from count).
+POKEMON_FIELD_DEFAULTS = {
+    "count": 0,
+    "line_complete": False,
+    "evolvable_now": False,
+    "friendship_points": 0,
+    "friendship_progress_percent": 0
+}
+
+# Top-level sections sent whole when they change. "filters" is left out: the
+# page updates its bitsets from the patched Pokémon.
+PATCH_SECTIONS = ("user", "companion")
+
+
+def patch_feed_path(trainer_path):
+    return os.path.splitext(trainer_path)[0] + PATCH_FEED_SUFFIX
+
+
+def load_patch_feed(path):
+    try:
+        with open(path, "r", encoding="utf-8") as feed_file:
+            feed = json.load(feed_file)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(feed, dict) or feed.get("version") != PATCH_FEED_VERSION:
+        return None
+
+    return feed
+
+
+# =========================
+# SNAPSHOTS + DIFFS
+# =========================
+
+def pokemon_fields(document, catalog):
+    """{species key: {field: value}} for a full or split document; None when it doesn't fit the catalog."""
+    species_order = catalog["species_order"]
+    pokemon = document.get("pokemon")
+
+    if document.get("format") == SPLIT_FORMAT:
+        if not isinstance(pokemon, dict):
+            return None
+
+        # Slim entries leave out zeros and falses.
+        entries = [pokemon.get(key, {}) for key in species_order]
+    else:
+        if not isinstance(pokemon, list) or len(pokemon) != len(species_order):
+            return None
+
+        entries = pokemon
+
+    fields = {}
+
+    for key, p in zip(species_order, entries):
+        values = {field: p.get(field, default) for field, default in POKEMON_FIELD_DEFAULTS.items()}
+        values["owned"] = values["count"] > 0
+
+        fields[key] = values
+
+    return fields
+
+
+def patch_snapshot(previous, catalog):
+    """What the previous file held, taken before incremental mode patches it in place."""
+    if not isinstance(previous, dict) or not isinstance(previous.get("trainer_stats"), dict):
+        return None
+
+    fields = pokemon_fields(previous, catalog)
+
+    if fields is None:
+        return None
+
+    return {
+        "revision": previous.get("revision"),
+        "pokemon": fields,
+        "trainer_stats": copy.deepcopy(previous["trainer_stats"]),
+        "sections": {name: copy.deepcopy(previous.get(name)) for name in PATCH_SECTIONS}
+    }
+
+
+def diff_values(old, new, path=()):
+    """[[path, new value], ...] for the leaves that changed; dicts whose keys moved are sent whole."""
+    if old == new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict) and old.keys() == new.keys():
+        changes = []
+
+        for key, value in new.items():
+            changes.extend(diff_values(old[key], value, path + (key,)))
+
+        return changes
+
+    return [[list(path), new]]
+
+
+def json_form(value):
+    # As it will read back from the file (int keys become strings and so on).
+    return json.loads(json.dumps(value, ensure_ascii=False))
+
+
+def build_patch(snapshot, output, catalog):
+    new_fields = pokemon_fields(output, catalog)
+    pokemon = {}
+
+    for key, fields in new_fields.items():
+        old = snapshot["pokemon"][key]
+        changed = {field: value for field, value in fields.items() if old[field] != value}
+
+        if changed:
+            pokemon[key] = changed
+
+    patch = {}
+
+    if pokemon:
+        patch["pokemon"] = pokemon
+
+    stats = diff_values(snapshot["trainer_stats"], json_form(output["trainer_stats"]))
+
+    if stats:
+        patch["stats"] = stats
+
+    sections = {
+        name: value
+        for name, value in json_form({name: output.get(name) for name in PATCH_SECTIONS}).items()
+        if value != snapshot["sections"][name]
+    }
+
+    if sections:
+        patch["sections"] = sections
+
+    return patch
+
+
+# =========================
+# RING
+# =========================
+
+def record_revision(trainer_path, snapshot, output, catalog, ring_size):
+    """
+    Stamp output with its revision and append the patch from the previous file to the ring.
+    Returns the stamped document (output itself is not modified).
+    """
+    feed_path = patch_feed_path(trainer_path)
+    feed = load_patch_feed(feed_path)
+
+    revision = feed["revision"] if feed else 0
+
+    # The previous file must be the one the ring ends at, or the diff would skip a step.
+    if feed and snapshot is not None and snapshot["revision"] == revision:
+        patch = build_patch(snapshot, output, catalog)
+
+        if not patch:
+            return {**output, "revision": revision}
+
+        patches = feed["patches"] + [{"from": revision, "to": revision + 1, "at": output["updated_at"], **patch}]
+    else:
+        # Nothing to diff against: restart the ring so older clients reload in full.
+        patches = []
+
+    revision += 1
+
+    with atomic_file(feed_path) as feed_file:
+        json.dump(
+            {
+                "version": PATCH_FEED_VERSION,
+                "revision": revision,
+                "patches": patches[-ring_size:] if ring_size > 0 else []
+            },
+            feed_file,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+
+    return {**output, "revision": revision}
+
+
+def stamp_revision(trainer_path, output):
+    """
+    Stamp output with the feed's current revision without recording anything,
+    for a build whose patch is left to another writer. Unchanged without a feed.
+    """
+    feed = load_patch_feed(patch_feed_path(trainer_path))
+
+    return {**output, "revision": feed["revision"]} if feed else output
@@ -0,0 +1,153 @@
+import json
+import re
+
+from pokedex_catalog import CATALOG_FORMAT_VERSION
+from pokedex_output import atomic_file
+from pokedex_types import calculate_type_matchups
+
+
+# =========================
+# SPLIT OUTPUT MODE
+# =========================
+#
+# "split" mode publishes the catalog-invariant species data once as
+# data/catalog.json and keeps each data/<user>.json down to what is
+# actually trainer-specific. js/pokedex.js joins the two on load.
+
+SPLIT_FORMAT = "split"
+CATALOG_FILE_NAME = "catalog.json"
+
+# Per-species fields that depend on the trainer; everything else lives in catalog.json.
+TRAINER_POKEMON_FIELDS = (
+    "count",
+    "line_complete",
+    "evolvable_now",
+    "friendship_points",
+    "friendship_progress_percent"
+)
+
+
+def catalog_version(catalog):
+    return f"{CATALOG_FORMAT_VERSION}-{catalog['source']['sha256'][:12]}"
+
+
+# =========================
+# SHARED CATALOG DOCUMENT
+# =========================
+
+def build_catalog_document(catalog, friendship_requirement):
+    pokemon_metadata = catalog["pokemon_metadata"]
+    evolution = catalog["evolution"]
+
+    species = []
+
+    for key in catalog["species_order"]:
+        meta = pokemon_metadata[key]
+        node = evolution["nodes"][key]
+
+        strengths, weaknesses = calculate_type_matchups(
+            meta["primary_type"],
+            meta["secondary_type"]
+        )
+
+        entry = {
+            "name": meta["name"],
+            "pokedex_number": meta["pokedex_number"],
+            "primary_type": meta["primary_type"],
+            "secondary_type": meta["secondary_type"],
+
+            "generation": meta["generation"],
+            "region": meta["region"],
+            "rarity": meta["rarity"],
+            "is_legendary": meta["is_legendary"],
+            "is_mythic": meta["is_mythic"],
+            "is_hatchable": meta["is_hatchable"],
+
+            "evolution": meta["evolution"],
+            "evolution_stage": node["stage"],
+            "evolution_line_id": meta["evolution_line_id"],
+
+            "quantity_required": node["quantity_required"],
+            "item_required": node["item_required"],
+            "requirement": node["requirement"],
+            "requires_stone": node["requires_stone"],
+            "requires_trade": node["requires_trade"],
+
+            "stats": meta["stats"],
+            "physical": meta["physical"],
+            "pokedex_entry": meta["pokedex_entry"],
+
+            "image": meta["image"],
+
+            "strengths": strengths,
+            "weaknesses": weaknesses
+        }
+
+        if node["requires_friendship"]:
+            entry["friendship_requirement"] = friendship_requirement
+
+        species.append(entry)
+
+    # version stays the first key so publish_catalog_document can sniff it cheaply
+    return {
+        "version": catalog_version(catalog),
+        "pokemon": species,
+        "evolution_lines": evolution["line_entries"]
+    }
+
+
+def published_catalog_version(path):
+    try:
+        with open(path, "r", encoding="utf-8") as catalog_file:
+            head = catalog_file.read(256)
+    except OSError:
+        return None
+
+    match = re.match(r'\{"version":\s*"([^"]*)"', head)
+    return match.group(1) if match else None
+
+
+def publish_catalog_document(catalog, path, friendship_requirement):
+    # Only rewrite catalog.json when the compiled catalog actually changed.
+    if published_catalog_version(path) == catalog_version(catalog):
+        return False
+
+    document = build_catalog_document(catalog, friendship_requirement)
+
+    with atomic_file(path) as catalog_file:
+        json.dump(document, catalog_file, ensure_ascii=False, separators=(",", ":"))
+
+    return True
+
+
+# =========================
+# SLIM TRAINER DOCUMENT
+# =========================
+
+def build_slim_document(output, catalog):
+    # Only species the trainer has touched are listed; the page fills in
+    # zero counts and false flags for the rest.
+    pokemon = {}
+
+    for key, p in zip(catalog["species_order"], output["pokemon"]):
+        entry = {
+            field: p[field]
+            for field in TRAINER_POKEMON_FIELDS
+            if p.get(field)
+        }
+
+        if entry:
+            pokemon[key] = entry
+
+    return {
+        "format": SPLIT_FORMAT,
+        "catalog": {
+            "file": CATALOG_FILE_NAME,
+            "version": catalog_version(catalog)
+        },
+        "user": output["user"],
+        "updated_at": output["updated_at"],
+        "trainer_stats": output["trainer_stats"],
+        "pokemon": pokemon,
+        "companion": output["companion"]
+    }
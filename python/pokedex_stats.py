@@ -0,0 +1,180 @@
+from pokedex_helpers import safe_int
+
+
+# =========================
+# COLLECTION STATS ACCUMULATOR
+# =========================
+#
+# trainer_stats sections that depend on what the trainer owns are built in a
+# single walk over the owned Pokémon. Each section is a dimension:
+#
+#   "start"  (catalog)                              -> fresh accumulator
+#   "add"    (acc, p, meta)                         -> called once per owned Pokémon
+#   "finish" (acc, catalog, line_completion_map)    -> the section's output value
+#
+# Adding a stat means adding a dimension, not another pass over pokemon_list.
+
+def completion_percent(owned, total):
+    return round((owned / total) * 100, 2) if total > 0 else 0
+
+
+# ---- POKEDEX ----
+
+def start_pokedex(catalog):
+    return {"unique_owned": 0, "total_owned": 0}
+
+
+def add_pokedex(acc, p, meta):
+    acc["unique_owned"] += 1
+    acc["total_owned"] += p["count"]
+
+
+def finish_pokedex(acc, catalog, line_completion_map):
+    total_available = catalog["totals"]["total_available"]
+
+    return {
+        "total_available": total_available,
+        "unique_owned": acc["unique_owned"],
+        "total_owned": acc["total_owned"],
+        "completion_percent": completion_percent(acc["unique_owned"], total_available)
+    }
+
+
+# ---- GENERATION PROGRESS ----
+
+def start_generations(catalog):
+    return {
+        gen: {
+            "generation": gen,
+            "region": totals["region"],
+            "owned": 0,
+            "total": totals["total"]
+        }
+        for gen, totals in catalog["totals"]["generations"].items()
+    }
+
+
+def add_generations(acc, p, meta):
+    gen = p["generation"]
+
+    # Skip invalid or unknown generations
+    if gen > 0:
+        acc[gen]["owned"] += 1
+
+
+def finish_generations(acc, catalog, line_completion_map):
+    region_lines = catalog["evolution"]["region_lines"]
+
+    for gen in acc.values():
+        gen["completion_percent"] = completion_percent(gen["owned"], gen["total"])
+
+        lines = region_lines.get(gen["region"], [])
+
+        gen["total_lines"] = len(lines)
+        gen["lines_completed"] = sum(
+            1 for line_id in lines if line_completion_map[line_id]
+        )
+
+    return acc
+
+
+# ---- EVOLUTION ----
+
+def start_evolution(catalog):
+    return {"total_evolutions_owned": 0, "stage_owned": {}}
+
+
+def add_evolution(acc, p, meta):
+    # Raw CSV stage, so megas (4) still count here like they always have
+    stage = safe_int(meta["evolution_stage"], 0)
+
+    if stage > 0:
+        acc["total_evolutions_owned"] += 1
+        acc["stage_owned"][stage] = acc["stage_owned"].get(stage, 0) + 1
+
+
+def finish_evolution(acc, catalog, line_completion_map):
+    catalog_totals = catalog["totals"]
+
+    return {
+        "total_evolutions_owned": acc["total_evolutions_owned"],
+        "total_evolutions_available": catalog_totals["total_evolutions_available"],
+        "lines_completed": sum(
+            1 for is_complete in line_completion_map.values() if is_complete
+        ),
+        "total_lines": catalog_totals["total_lines"],
+        "stage_totals": dict(catalog_totals["stages"]),
+        "stage_owned": acc["stage_owned"]
+    }
+
+
+# ---- TYPE MASTERY ----
+
+def start_types(catalog):
+    return {
+        t: {"owned": 0, "total": total}
+        for t, total in catalog["totals"]["types"].items()
+    }
+
+
+def add_types(acc, p, meta):
+    acc[p["primary_type"].lower()]["owned"] += 1
+
+
+def finish_types(acc, catalog, line_completion_map):
+    for data in acc.values():
+        data["completion_percent"] = completion_percent(data["owned"], data["total"])
+
+    return acc
+
+
+# ---- LEGENDARY ----
+
+def start_legendary(catalog):
+    return {"owned": 0}
+
+
+def add_legendary(acc, p, meta):
+    if p.get("is_legendary") or p.get("is_mythic"):
+        acc["owned"] += 1
+
+
+def finish_legendary(acc, catalog, line_completion_map):
+    return {
+        "owned": acc["owned"],
+        "total": catalog["totals"]["legendary"]
+    }
+
+
+COLLECTION_DIMENSIONS = (
+    {"name": "pokedex", "start": start_pokedex, "add": add_pokedex, "finish": finish_pokedex},
+    {"name": "generation_progress", "start": start_generations, "add": add_generations, "finish": finish_generations},
+    {"name": "evolution", "start": start_evolution, "add": add_evolution, "finish": finish_evolution},
+    {"name": "types", "start": start_types, "add": add_types, "finish": finish_types},
+    {"name": "legendary", "start": start_legendary, "add": add_legendary, "finish": finish_legendary}
+)
+
+
+def accumulate_collection_stats(pokemon_list, line_completion_map, catalog, dimensions=COLLECTION_DIMENSIONS):
+    """One pass over the owned Pokémon feeding every dimension; returns {dimension name: section}."""
+    pokemon_metadata = catalog["pokemon_metadata"]
+
+    accumulators = [dimension["start"](catalog) for dimension in dimensions]
+    adders = [
+        (dimension["add"], acc)
+        for dimension, acc in zip(dimensions, accumulators)
+    ]
+
+    for key, p in zip(catalog["species_order"], pokemon_list):
+        if not p["owned"]:
+            continue
+
+        meta = pokemon_metadata[key]
+
+        for add, acc in adders:
+            add(acc, p, meta)
+
+    return {
+        dimension["name"]: dimension["finish"](acc, catalog, line_completion_map)
+        for dimension, acc in zip(dimensions, accumulators)
+    }
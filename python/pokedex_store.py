@@ -0,0 +1,289 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing, contextmanager
+
+
+# =========================
+# TRAINER STORE
+# =========================
+#
+# Every trainer the script parses is recorded here in normalized tables, so
+# cross-trainer work (bulk regeneration, leaderboards, audits) runs as SQL
+# over one small file instead of re-reading every data/*.json.
+#
+#   python python/pokedex_store.py import trainers.jsonl
+#   python python/pokedex_store.py regenerate --data-dir data
+#   python python/pokedex_store.py top --limit 10
+#   python python/pokedex_store.py owners pikachu
+
+STORE_SCHEMA_VERSION = 1
+
+# Scalar trainer fields, named like the keys parse_trainer_inputs() returns.
+TRAINER_COLUMNS = (
+    ("username", "TEXT NOT NULL"),
+    ("avatar", "TEXT NOT NULL"),
+    ("user_hours", "INTEGER NOT NULL"),
+    ("follow_age", "TEXT NOT NULL"),
+    ("sub_age", "TEXT NOT NULL"),
+    ("total_commands", "INTEGER NOT NULL"),
+    ("user_subs_gifted", "INTEGER NOT NULL"),
+    ("user_bits_lifetime", "INTEGER NOT NULL"),
+    ("user_total_donated", "REAL NOT NULL"),
+    ("user_sub_months", "INTEGER NOT NULL"),
+    ("user_primary_role", "TEXT NOT NULL"),
+    ("user_sub_tier", "TEXT NOT NULL"),
+    ("user_streams_watched", "INTEGER NOT NULL"),
+    ("user_chat_messages", "INTEGER NOT NULL"),
+    ("user_times_tagged", "INTEGER NOT NULL"),
+    ("buddy_times_pet", "INTEGER NOT NULL"),
+    ("buddy_times_fed", "INTEGER NOT NULL")
+)
+
+TRAINER_FIELDS = tuple(name for name, _ in TRAINER_COLUMNS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS trainers (
+    trainer_key TEXT PRIMARY KEY,
+    {", ".join(f"{name} {column_type}" for name, column_type in TRAINER_COLUMNS)},
+    recorded_at REAL NOT NULL
+);
+
+-- species_key is the lowercased species name, like the catalog keys
+CREATE TABLE IF NOT EXISTS ownership (
+    trainer_key TEXT NOT NULL REFERENCES trainers(trainer_key) ON DELETE CASCADE,
+    species_key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (trainer_key, species_key)
+);
+CREATE INDEX IF NOT EXISTS ownership_species ON ownership(species_key, count);
+
+-- usertrackall counters ("poke ball thrown", "evolution", ...), lowercased
+CREATE TABLE IF NOT EXISTS inventory (
+    trainer_key TEXT NOT NULL REFERENCES trainers(trainer_key) ON DELETE CASCADE,
+    item TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (trainer_key, item)
+);
+
+-- pokebag keeps its original casing and order for the journey card
+CREATE TABLE IF NOT EXISTS pokebag (
+    trainer_key TEXT NOT NULL REFERENCES trainers(trainer_key) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (trainer_key, item)
+);
+
+CREATE TABLE IF NOT EXISTS friendship (
+    trainer_key TEXT NOT NULL REFERENCES trainers(trainer_key) ON DELETE CASCADE,
+    line_id TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (trainer_key, line_id)
+);
+"""
+
+
+def trainer_key(username):
+    return username.lower()
+
+
+# =========================
+# CONNECTION
+# =========================
+
+@contextmanager
+def open_store(path):
+    """Open (and if needed create) the store; commits on success, rolls back on error."""
+    with closing(sqlite3.connect(path, timeout=5.0)) as connection:
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA journal_mode = WAL")
+
+        if connection.execute("PRAGMA user_version").fetchone()[0] != STORE_SCHEMA_VERSION:
+            connection.executescript(SCHEMA)
+            connection.execute(f"PRAGMA user_version = {STORE_SCHEMA_VERSION}")
+
+        with connection:
+            yield connection
+
+
+# =========================
+# WRITE
+# =========================
+
+def save_trainer_state(connection, state):
+    """Replace everything recorded for state's trainer with state."""
+    key = trainer_key(state["username"])
+
+    connection.execute("DELETE FROM trainers WHERE trainer_key = ?", (key,))
+
+    connection.execute(
+        f"INSERT INTO trainers (trainer_key, {', '.join(TRAINER_FIELDS)}, recorded_at) "
+        f"VALUES (?, {', '.join('?' for _ in TRAINER_FIELDS)}, ?)",
+        (key, *(state[name] for name in TRAINER_FIELDS), time.time())
+    )
+
+    connection.executemany(
+        "INSERT INTO ownership (trainer_key, species_key, count) VALUES (?, ?, ?)",
+        ((key, species_key, count) for species_key, count in state["owned_counts"].items())
+    )
+
+    connection.executemany(
+        "INSERT INTO inventory (trainer_key, item, count) VALUES (?, ?, ?)",
+        ((key, item, count) for item, count in state["inventory_stats"].items())
+    )
+
+    connection.executemany(
+        "INSERT INTO pokebag (trainer_key, position, item, count) VALUES (?, ?, ?, ?)",
+        (
+            (key, position, item, count)
+            for position, (item, count) in enumerate(state["pokebag_contents"].items())
+        )
+    )
+
+    connection.executemany(
+        "INSERT INTO friendship (trainer_key, line_id, points) VALUES (?, ?, ?)",
+        ((key, line_id, points) for line_id, points in state["friendship_map"].items())
+    )
+
+
+# =========================
+# READ
+# =========================
+
+def load_trainer_state(connection, username):
+    """Rebuild the parse_trainer_inputs() state for username, or None if never recorded."""
+    key = trainer_key(username)
+
+    row = connection.execute(
+        f"SELECT {', '.join(TRAINER_FIELDS)} FROM trainers WHERE trainer_key = ?",
+        (key,)
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    state = dict(zip(TRAINER_FIELDS, row))
+
+    state["friendship_map"] = dict(connection.execute(
+        "SELECT line_id, points FROM friendship WHERE trainer_key = ?", (key,)
+    ))
+    state["owned_counts"] = dict(connection.execute(
+        "SELECT species_key, count FROM ownership WHERE trainer_key = ?", (key,)
+    ))
+    state["inventory_stats"] = dict(connection.execute(
+        "SELECT item, count FROM inventory WHERE trainer_key = ?", (key,)
+    ))
+    state["pokebag_contents"] = dict(connection.execute(
+        "SELECT item, count FROM pokebag WHERE trainer_key = ? ORDER BY position", (key,)
+    ))
+
+    return state
+
+
+def trainer_usernames(connection):
+    return [row[0] for row in connection.execute("SELECT username FROM trainers ORDER BY trainer_key")]
+
+
+def species_leaderboard(connection, limit=10):
+    """(username, species owned, total caught) for the trainers with the most species."""
+    return connection.execute(
+        """
+        SELECT t.username, COUNT(o.species_key), COALESCE(SUM(o.count), 0)
+        FROM trainers t
+        LEFT JOIN ownership o ON o.trainer_key = t.trainer_key AND o.count > 0
+        GROUP BY t.trainer_key
+        ORDER BY COUNT(o.species_key) DESC, SUM(o.count) DESC, t.trainer_key
+        LIMIT ?
+        """,
+        (limit,)
+    ).fetchall()
+
+
+def species_owners(connection, species_key):
+    """(username, count) for everyone holding species_key, most first."""
+    return connection.execute(
+        """
+        SELECT t.username, o.count
+        FROM ownership o
+        JOIN trainers t ON t.trainer_key = o.trainer_key
+        WHERE o.species_key = ? AND o.count > 0
+        ORDER BY o.count DESC, t.trainer_key
+        """,
+        (species_key.lower(),)
+    ).fetchall()
+
+
+# =========================
+# MAIN
+# =========================
+
+def main():
+    # Imported here: the script imports this module for recording.
+    import user_pokedex_script as pokedex
+    from batch_regenerate import read_trainer_inputs
+    from pokedex_catalog import load_catalog
+
+    parser = argparse.ArgumentParser(description="Query and rebuild from the dexforge trainer store.")
+    parser.add_argument("--store", default=pokedex.STORE_PATH, help="SQLite store path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="record trainers from a Mix It Up export")
+    import_parser.add_argument("inputs", help="JSONL or CSV export with one row of Mix It Up values per trainer")
+
+    regenerate_parser = commands.add_parser("regenerate", help="rebuild data/*.json from the store")
+    regenerate_parser.add_argument("--csv", default=pokedex.POKEMON_CSV_PATH)
+    regenerate_parser.add_argument("--data-dir", default=pokedex.DATA_PATH)
+    regenerate_parser.add_argument("--buddy-file", default=pokedex.BUDDY_FILE_PATH)
+    regenerate_parser.add_argument("--mode", choices=["full", "split"], default=pokedex.OUTPUT_MODE)
+
+    top_parser = commands.add_parser("top", help="trainers with the most species")
+    top_parser.add_argument("--limit", type=int, default=10)
+
+    owners_parser = commands.add_parser("owners", help="who holds a species")
+    owners_parser.add_argument("species")
+
+    args = parser.parse_args()
+
+    if not args.store:
+        sys.exit("No store configured (STORE_PATH is None); pass --store")
+
+    with open_store(args.store) as connection:
+        if args.command == "import":
+            trainers = read_trainer_inputs(args.inputs)
+
+            for inputs in trainers:
+                save_trainer_state(connection, pokedex.parse_trainer_inputs(inputs))
+
+            print(f"Recorded {len(trainers)} trainers in {args.store}")
+
+        elif args.command == "regenerate":
+            pokedex.BUDDY_FILE_PATH = args.buddy_file
+            catalog = load_catalog(args.csv)
+            os.makedirs(args.data_dir, exist_ok=True)
+
+            usernames = trainer_usernames(connection)
+
+            for username in usernames:
+                path = os.path.join(args.data_dir, pokedex.trainer_file_name(username))
+                # Keeps the patch feed in step; the store already holds this state.
+                output, _ = pokedex.build_recorded_document(
+                    load_trainer_state(connection, username), catalog, path, record_store=False
+                )
+                pokedex.write_trainer_document(output, catalog, path, mode=args.mode, data_path=args.data_dir)
+
+            print(f"Regenerated {len(usernames)} trainers from {args.store}")
+
+        elif args.command == "top":
+            for rank, (username, species, caught) in enumerate(species_leaderboard(connection, args.limit), 1):
+                print(f"{rank:>3}. {username:<30} {species:>5} species {caught:>7} caught")
+
+        else:
+            for username, count in species_owners(connection, args.species):
+                print(f"{username:<30} x{count}")
+
+
+if __name__ == "__main__":
+    main()
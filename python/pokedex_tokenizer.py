@@ -0,0 +1,148 @@
+# =========================
+# MIX IT UP COUNT STRINGS
+# =========================
+#
+# $userpokedexall, $usertrackall, $userpokefriendshipall and $userpokebagall
+# all arrive as "Name xN, Other Name xN, ..." blobs. tokenize_counts() reads
+# a blob in one walk over the string and returns the counts plus a report of
+# everything it had to guess at, instead of dropping entries silently.
+#
+# Rules (the old split/rsplit loops gave the same result on good input):
+#   - entries are separated by commas; the count follows the last " x"
+#   - names are trimmed; an entry with an empty name is malformed
+#   - a later duplicate overwrites an earlier one, first-seen order is kept
+#   - a count that isn't an integer is kept as 0 and reported
+#   - with a catalog, a piece without " x" is joined to the following piece
+#     when that makes a known species name ("Name, With Comma x1",
+#     rejoined with ", ")
+#   - any other piece without " x" is reported as malformed and skipped
+#
+# Almost every blob is well formed, so clean_counts() first reads it with
+# none of the checks above; walk_counts() only runs, from the start, when
+# that pass meets anything it would have to report or rejoin. Both split the
+# raw text and lowercase only the name, so " X3" is never a count marker.
+
+
+def new_report():
+    return {"unknown_names": [], "bad_counts": [], "malformed": []}
+
+
+def report_has_issues(report):
+    return any(report.values())
+
+
+def clean_counts(raw, fold_case, species_index, species_order):
+    """counts for a blob with nothing to report, or None when it needs the walk."""
+    counts = {}
+
+    for piece in raw.split(","):
+        # A piece without " x" comes back with an empty name, like an unnamed one.
+        name, _, count_text = piece.rpartition(" x")
+        name = name.strip()
+
+        if not name:
+            return None
+
+        if fold_case:
+            name = name.lower()
+
+        try:
+            count = int(count_text)
+        except ValueError:
+            return None
+
+        if species_index is not None:
+            index = species_index.get(name)
+
+            if index is None:
+                return None
+
+            name = species_order[index]
+
+        counts[name] = count
+
+    return counts
+
+
+def tokenize_counts(raw, fold_case=False, catalog=None, report=None):
+    """
+    Parse a "Name xN, ..." blob -> (counts, report).
+
+    fold_case lowercases names. With a catalog, names resolve through its
+    species_index to the catalog's own key strings (so later lookups hit the
+    same objects) and names it doesn't know go to report["unknown_names"].
+    """
+    if report is None:
+        report = new_report()
+
+    if catalog is not None:
+        species_index = catalog["species_index"]
+        species_order = catalog["species_order"]
+    else:
+        species_index = species_order = None
+
+    counts = clean_counts(raw, fold_case, species_index, species_order) if raw else {}
+
+    if counts is None:
+        counts = walk_counts(raw, fold_case, species_index, species_order, report)
+
+    return counts, report
+
+
+def walk_counts(raw, fold_case, species_index, species_order, report):
+    """counts for any blob, with everything it had to guess at added to report."""
+    counts = {}
+    pending = []
+
+    for piece in raw.split(","):
+        name, marker, count_text = piece.rpartition(" x")
+
+        if not marker:
+            piece = piece.strip()
+
+            if not piece:
+                continue
+            elif species_index is None:
+                report["malformed"].append(piece)
+            else:
+                pending.append(piece)
+            continue
+
+        name = name.strip()
+
+        if pending:
+            # Earlier comma-split pieces may be the start of this name.
+            joined_name = ", ".join(pending + [name])
+
+            if (joined_name.lower() if fold_case else joined_name) in species_index:
+                name = joined_name
+            else:
+                report["malformed"].extend(pending)
+
+            pending = []
+
+        if not name:
+            report["malformed"].append(piece.strip())
+            continue
+
+        key = name.lower() if fold_case else name
+
+        try:
+            count = int(count_text)
+        except ValueError:
+            count = 0
+            report["bad_counts"].append(piece.strip())
+
+        if species_index is not None:
+            index = species_index.get(key)
+
+            if index is None:
+                report["unknown_names"].append(name)
+            else:
+                key = species_order[index]
+
+        counts[key] = count
+
+    report["malformed"].extend(pending)
+
+    return counts
@@ -0,0 +1,144 @@
+TYPE_CHART = {
+    "normal":  {"weak": ["fighting"], "resist": [], "immune": ["ghost"]},
+    "fire":    {"weak": ["water", "ground", "rock"], "resist": ["fire", "grass", "ice", "bug", "steel", "fairy"], "immune": []},
+    "water":   {"weak": ["electric", "grass"], "resist": ["fire", "water", "ice", "steel"], "immune": []},
+    "grass":   {"weak": ["fire", "ice", "poison", "flying", "bug"], "resist": ["water", "electric", "grass", "ground"], "immune": []},
+    "electric":{"weak": ["ground"], "resist": ["electric", "flying", "steel"], "immune": []},
+    "ice":     {"weak": ["fire", "fighting", "rock", "steel"], "resist": ["ice"], "immune": []},
+    "fighting":{"weak": ["flying", "psychic", "fairy"], "resist": ["bug", "rock", "dark"], "immune": []},
+    "poison":  {"weak": ["ground", "psychic"], "resist": ["grass", "fighting", "poison", "bug", "fairy"], "immune": []},
+    "ground":  {"weak": ["water", "grass", "ice"], "resist": ["poison", "rock"], "immune": ["electric"]},
+    "flying":  {"weak": ["electric", "ice", "rock"], "resist": ["grass", "fighting", "bug"], "immune": ["ground"]},
+    "psychic": {"weak": ["bug", "ghost", "dark"], "resist": ["fighting", "psychic"], "immune": []},
+    "bug":     {"weak": ["fire", "flying", "rock"], "resist": ["grass", "fighting", "ground"], "immune": []},
+    "rock":    {"weak": ["water", "grass", "fighting", "ground", "steel"], "resist": ["normal", "fire", "poison", "flying"], "immune": []},
+    "ghost":   {"weak": ["ghost", "dark"], "resist": ["poison", "bug"], "immune": ["normal", "fighting"]},
+    "dragon":  {"weak": ["ice", "dragon", "fairy"], "resist": ["fire", "water", "electric", "grass"], "immune": []},
+    "dark":    {"weak": ["fighting", "bug", "fairy"], "resist": ["ghost", "dark"], "immune": ["psychic"]},
+    "steel":   {"weak": ["fire", "fighting", "ground"], "resist": ["normal", "grass", "ice", "flying", "psychic", "bug", "rock", "dragon", "steel", "fairy"], "immune": ["poison"]},
+    "fairy":   {"weak": ["poison", "steel"], "resist": ["fighting", "bug", "dark"], "immune": ["dragon"]}
+}
+
+
+# =========================
+# COMPILED TYPE TABLE
+# =========================
+
+# Integer type IDs follow TYPE_CHART order, which is also the output order
+# of strengths/weaknesses.
+TYPE_NAMES = list(TYPE_CHART)
+TYPE_IDS = {name: type_id for type_id, name in enumerate(TYPE_NAMES)}
+
+
+def compile_type_table(type_chart):
+    # table[defense_id][attack_id] -> damage multiplier
+    names = list(type_chart)
+    table = []
+
+    for defense_type in names:
+        chart = type_chart[defense_type]
+        row = []
+
+        for attack_type in names:
+            if attack_type in chart["weak"]:
+                row.append(2.0)
+            elif attack_type in chart["resist"]:
+                row.append(0.5)
+            elif attack_type in chart["immune"]:
+                row.append(0.0)
+            else:
+                row.append(1.0)
+
+        table.append(row)
+
+    return table
+
+
+TYPE_TABLE = compile_type_table(TYPE_CHART)
+
+
+def type_id(type_name):
+    # Unknown, empty and "null" types don't take part in matchups.
+    if not type_name:
+        return None
+
+    return TYPE_IDS.get(type_name.lower())
+
+
+# =========================
+# MEMOIZED MATCHUPS
+# =========================
+
+# (defense_id, defense_id | None) -> (strengths, weaknesses)
+# Cached lists are shared between Pokémon, so callers must not mutate them.
+_matchup_cache = {}
+
+
+def matchup_key(primary_id, secondary_id=None):
+    # Multipliers commute, so (a, b) and (b, a) share one entry.
+    if primary_id is None:
+        return (secondary_id, None)
+
+    if secondary_id is not None and secondary_id < primary_id:
+        return (secondary_id, primary_id)
+
+    return (primary_id, secondary_id)
+
+
+def compute_matchups(key):
+    primary_id, secondary_id = key
+
+    if primary_id is None:
+        multipliers = [1.0] * len(TYPE_NAMES)
+    elif secondary_id is None:
+        multipliers = TYPE_TABLE[primary_id]
+    else:
+        multipliers = [a * b for a, b in zip(TYPE_TABLE[primary_id], TYPE_TABLE[secondary_id])]
+
+    strengths = []
+    weaknesses = []
+
+    for attack_type, multiplier in zip(TYPE_NAMES, multipliers):
+        if multiplier > 1:
+            weaknesses.append({"type": attack_type, "multiplier": multiplier})
+        elif multiplier < 1:
+            strengths.append({"type": attack_type, "multiplier": multiplier})
+
+    return strengths, weaknesses
+
+
+def matchups_for_ids(primary_id, secondary_id=None):
+    key = matchup_key(primary_id, secondary_id)
+    cached = _matchup_cache.get(key)
+
+    if cached is None:
+        cached = _matchup_cache[key] = compute_matchups(key)
+
+    return cached
+
+
+def calculate_type_matchups(primary, secondary=None):
+    primary_id = type_id(primary)
+    secondary_id = type_id(secondary) if secondary and secondary.lower() != "null" else None
+
+    return matchups_for_ids(primary_id, secondary_id)
+
+
+def calculate_batch_matchups(pokemon_list):
+    """Return (strengths, weaknesses) for every Pokémon in pokemon_list, in order."""
+    # Type indices are resolved once per distinct (primary, secondary) spelling
+    # and each distinct pair is computed once; a full catalog has a few hundred
+    # species but well under 200 pairs.
+    type_pairs = [(p["primary_type"], p["secondary_type"]) for p in pokemon_list]
+    pair_matchups = {}
+
+    for primary, secondary in set(type_pairs):
+        key = matchup_key(type_id(primary), type_id(secondary))
+        cached = _matchup_cache.get(key)
+
+        if cached is None:
+            cached = _matchup_cache[key] = compute_matchups(key)
+
+        pair_matchups[primary, secondary] = cached
+
+    return [pair_matchups[pair] for pair in type_pairs]
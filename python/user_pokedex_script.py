@@ -1,52 +1,39 @@
-import csv
+import cProfile
 import json
+import logging
+import os
+import sqlite3
+import sys
+import urllib.error
+import urllib.request
 from datetime import datetime, timezone
 
 
 # =========================
-# SAFE HELPERS
+# DEXFORGE CONFIG
 # =========================
 
-def safe_int(value, default=0):
-    try:
-        return int(value)
-    except:
-        return default
-
-
-def safe_float(value, default=0.0):
-    try:
-        return float(value)
-    except:
-        return default
-
-
-def safe_str(value, default=""):
-    if value is None:
-        return default
-    return str(value).strip()
-
-
-TYPE_CHART = {
-    "normal":  {"weak": ["fighting"], "resist": [], "immune": ["ghost"]},
-    "fire":    {"weak": ["water", "ground", "rock"], "resist": ["fire", "grass", "ice", "bug", "steel", "fairy"], "immune": []},
-    "water":   {"weak": ["electric", "grass"], "resist": ["fire", "water", "ice", "steel"], "immune": []},
-    "grass":   {"weak": ["fire", "ice", "poison", "flying", "bug"], "resist": ["water", "electric", "grass", "ground"], "immune": []},
-    "electric":{"weak": ["ground"], "resist": ["electric", "flying", "steel"], "immune": []},
-    "ice":     {"weak": ["fire", "fighting", "rock", "steel"], "resist": ["ice"], "immune": []},
-    "fighting":{"weak": ["flying", "psychic", "fairy"], "resist": ["bug", "rock", "dark"], "immune": []},
-    "poison":  {"weak": ["ground", "psychic"], "resist": ["grass", "fighting", "poison", "bug", "fairy"], "immune": []},
-    "ground":  {"weak": ["water", "grass", "ice"], "resist": ["poison", "rock"], "immune": ["electric"]},
-    "flying":  {"weak": ["electric", "ice", "rock"], "resist": ["grass", "fighting", "bug"], "immune": ["ground"]},
-    "psychic": {"weak": ["bug", "ghost", "dark"], "resist": ["fighting", "psychic"], "immune": []},
-    "bug":     {"weak": ["fire", "flying", "rock"], "resist": ["grass", "fighting", "ground"], "immune": []},
-    "rock":    {"weak": ["water", "grass", "fighting", "ground", "steel"], "resist": ["normal", "fire", "poison", "flying"], "immune": []},
-    "ghost":   {"weak": ["ghost", "dark"], "resist": ["poison", "bug"], "immune": ["normal", "fighting"]},
-    "dragon":  {"weak": ["ice", "dragon", "fairy"], "resist": ["fire", "water", "electric", "grass"], "immune": []},
-    "dark":    {"weak": ["fighting", "bug", "fairy"], "resist": ["ghost", "dark"], "immune": ["psychic"]},
-    "steel":   {"weak": ["fire", "fighting", "ground"], "resist": ["normal", "grass", "ice", "flying", "psychic", "bug", "rock", "dragon", "steel", "fairy"], "immune": ["poison"]},
-    "fairy":   {"weak": ["poison", "steel"], "resist": ["fighting", "bug", "dark"], "immune": ["dragon"]}
-}
+# Mix It Up runs a temp copy of this script, so point it back at the repo's python/ folder.
+DEXFORGE_PATH = r"C:\Users\sebas\Desktop\Stream Stuff\Pokemon System\dexforge"
+sys.path.insert(0, os.path.join(DEXFORGE_PATH, "python"))
+
+from pokedex_helpers import safe_int, safe_float, safe_str
+from pokedex_tokenizer import new_report, report_has_issues, tokenize_counts
+from pokedex_catalog import load_catalog
+from pokedex_types import calculate_batch_matchups
+from pokedex_companion import find_buddy
+from pokedex_evolution import is_evolvable_now, line_is_complete
+from pokedex_metrics import metrics_enabled, profile_path, start_run, phase, finish_run
+from pokedex_output import encode_document, write_document, write_atomically, write_compressed_siblings
+from pokedex_store import open_store, save_trainer_state
+from pokedex_stats import accumulate_collection_stats
+from pokedex_columnar import columnar_available, columnar_collection_stats
+from pokedex_filters import build_filter_index
+from pokedex_patches import patch_snapshot, record_revision, stamp_revision
+from pokedex_events import append_event, sync_event
+from pokedex_split import (
+    SPLIT_FORMAT, CATALOG_FILE_NAME, catalog_version, publish_catalog_document, build_slim_document
+)
 
 
 # =========================
@@ -57,208 +44,251 @@ FRIENDSHIP_REQUIREMENT = 600
 BUDDY_FILE_PATH = r"C:\Users\sebas\Desktop\Stream Stuff\Pokemon System\Text Files\buddies.txt"
 
 
-def calculate_type_matchups(primary, secondary=None):
-    primary = primary.lower()
-    secondary = secondary.lower() if secondary and secondary.lower() != "null" else None
+# =========================
+# LOGGING CONFIG
+# =========================
 
-    all_types = TYPE_CHART.keys()
-    results = {}
+# Mix It Up captures stderr into the trainer file, so problems go here instead.
+ERROR_LOG_PATH = os.path.join(DEXFORGE_PATH, "logs", "dexforge_errors.log")
 
-    for attack_type in all_types:
-        multiplier = 1.0
+# Per-phase timings, one JSON line per run (also switched on by DEXFORGE_METRICS=1).
+# Summarize with: python python/pokedex_metrics.py logs/metrics.jsonl
+METRICS_ENABLED = False
+METRICS_LOG_PATH = os.path.join(DEXFORGE_PATH, "logs", "metrics.jsonl")
 
-        for defense_type in [primary, secondary]:
-            if not defense_type:
-                continue
+logger = logging.getLogger("dexforge")
 
-            if defense_type not in TYPE_CHART:
-                continue
 
-            chart = TYPE_CHART[defense_type]
+# =========================
+# OUTPUT CONFIG
+# =========================
+
+# "full"  -> every trainer file carries the whole Pokédex (original format)
+# "split" -> species data goes to data/catalog.json once, trainer files stay slim
+OUTPUT_MODE = "full"
+DATA_PATH = os.path.join(DEXFORGE_PATH, "data")
+
+# "pretty"  -> indent=2 (original format)
+# "compact" -> minified, with a schema_version the page checks
+OUTPUT_FORMAT = "pretty"
 
-            if attack_type in chart["weak"]:
-                multiplier *= 2
-            elif attack_type in chart["resist"]:
-                multiplier *= 0.5
-            elif attack_type in chart["immune"]:
-                multiplier *= 0
+# Also write data/<user>.json.gz (and .json.br with the brotli package) for the page.
+PRECOMPRESS = ()
 
-        if multiplier != 1:
-            results[attack_type] = multiplier
+# Add a "filters" section (membership bitsets + search names) the page can filter
+# with instead of testing every Pokémon on each keystroke. See pokedex_filters.
+FILTER_INDEX = False
 
-    weaknesses = []
-    strengths = []
+# Stamp each trainer file with a revision and keep the last PATCH_RING_SIZE
+# changes in data/<user>.patches.json, so live overlays can apply small patches
+# instead of re-fetching the whole file. See pokedex_patches.
+PATCH_FEED = False
+PATCH_RING_SIZE = 50
 
-    for t, mult in results.items():
-        if mult > 1:
-            weaknesses.append({"type": t, "multiplier": mult})
-        elif mult < 1:
-            strengths.append({"type": t, "multiplier": mult})
+# Write the trainer file from the script (temp file + fsync + rename) instead of
+# printing it for Mix It Up to save, so nothing ever reads a half-written file.
+# A folder means <folder>/<user>.json, e.g. OUTPUT_PATH = DATA_PATH. Turn off
+# Mix It Up's own "save output to file" when this is set.
+OUTPUT_PATH = None
 
-    return strengths, weaknesses
+# Patch the trainer's previous data/<user>.json instead of rebuilding it, and
+# hand back the old file untouched when nothing meaningful changed.
+INCREMENTAL_MODE = False
 
 
 # =========================
-# MAIN SCRIPT
+# STORE CONFIG
 # =========================
 
-def run():
-    # === MIX IT UP INPUTS ===
-    raw_pokedex = "$userpokedexall"
-    raw_inventory = "$usertrackall"
-    raw_friendship = "$userpokefriendshipall"
+# SQLite file every parsed trainer is recorded into (None to disable).
+# Cross-trainer tools query it instead of re-reading data/*.json; it costs
+# each run a database open and a rewrite of the trainer's rows.
+# e.g. STORE_PATH = os.path.join(DEXFORGE_PATH, "dexforge.sqlite3")
+STORE_PATH = None
 
-    username = "$username"
-    avatar = "$useravatar"
 
-    user_hours = safe_int("$userhours")
-    follow_age = safe_str("$userfollowage")
-    sub_age = safe_str("$usersubage")
-    total_commands = safe_int("$usertotalcommandsrun")
+# =========================
+# EVENT LOG CONFIG
+# =========================
+
+# Folder for the trainer event log (None to disable). Chat actions send small
+# events through python/pokedex_events.py; full runs that don't go through the
+# daemon append a "sync" event so the log keeps up with Mix It Up.
+# e.g. EVENTS_PATH = os.path.join(DEXFORGE_PATH, "events")
+EVENTS_PATH = None
 
-    user_subs_gifted = safe_int("$usertotalsubsgifted")
-    user_bits_lifetime = safe_int("$userbitslifetimeamount")
-    user_total_donated = safe_float("$usertotalamountdonated")
-    user_sub_months = safe_int("$usertotalmonthssubbed")
 
-    user_primary_role = safe_str("$userprimaryrole")
-    user_sub_tier = safe_str("$usersubtier")
-    user_streams_watched = safe_int("$usertotalstreamswatched")
-    user_chat_messages = safe_int("$usertotalchatmessagessent")
-    user_times_tagged = safe_int("$usertotaltimestagged")
-    raw_pokebag = "$userpokebagall"
+# =========================
+# DAEMON CONFIG
+# =========================
 
-    buddy_times_pet = safe_int("$usertrackbuddytimespet")
-    buddy_times_fed = safe_int("$usertrackbuddyberriesfed")
+# Point this at a running python/pokedex_daemon.py (e.g. "http://127.0.0.1:8765")
+# to skip the catalog load and build. When nothing is listening the script
+# builds in-process as usual. When the daemon is up but times out or errors,
+# it may already have recorded the request, so the script still builds the
+# file but leaves the store, patch feed and event log to the daemon.
+DAEMON_URL = None
+DAEMON_TIMEOUT = 2.0
 
-    # === CSV PATH ===
-    pokemon_csv = r"C:\Users\sebas\Desktop\Stream Stuff\Pokemon System\pokemon_list.csv"
 
-    # =========================
-    # LOAD POKEMON METADATA + TRANSITIONS
-    # =========================
+# =========================
+# CATALOG CONFIG
+# =========================
 
-    pokemon_metadata = {}
-    transition_map = {}
-
-    with open(pokemon_csv, newline="", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-
-        for row in reader:
-
-            raw_number = safe_float(row.get("number"))
-            is_species_row = raw_number.is_integer()
-
-            name_raw = safe_str(row.get("name")).strip()
-            name_key = name_raw.lower()
-
-            evolution_raw = safe_str(row.get("evolution")).strip()
-            evolution_key = evolution_raw.lower()
-
-            # ---------------------------------------------------
-            # HARVEST TRANSITION (ANY ROW THAT HAS EVOLUTION)
-            # ---------------------------------------------------
-            if evolution_key and evolution_key not in ["null", "none", "false", "0"]:
-
-                transition_map[evolution_key] = {
-                    "parent": name_key,
-                    "requirement": safe_str(row.get("requirement")).strip(),
-                    "quantity_required": safe_int(row.get("quantity_required"), 0),
-                    "item_required": safe_str(row.get("item_required"), "no").strip().lower() == "yes"
-                }
-
-            # ---------------------------------------------------
-            # BUILD REAL SPECIES ONLY FROM INTEGER ROWS
-            # ---------------------------------------------------
-            if not is_species_row:
-                continue
-
-            pokedex_number = safe_int(row.get("pokedex_number"))
-            form = safe_str(row.get("form")).lower()
-
-            base_url = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/dream-world"
-
-            if form:
-                image_url = f"{base_url}/{pokedex_number}-{form}.svg"
-            else:
-                image_url = f"{base_url}/{pokedex_number}.svg"
-
-            secondary_raw = safe_str(row.get("secondary_type")).lower()
-            secondary_type = None if secondary_raw in ["", "null"] else secondary_raw.capitalize()
-
-            pokemon_metadata[name_key] = {
-                "name": name_raw,
-                "pokedex_number": pokedex_number,
-                "primary_type": safe_str(row.get("primary_type"), "Unknown"),
-                "secondary_type": secondary_type,
-                "generation": safe_int(row.get("generation")),
-                "region": safe_str(row.get("region"), "Unknown"),
-                "rarity": safe_str(row.get("rarity"), "common"),
-                "is_legendary": safe_str(row.get("is_legendary"), "false").lower() == "true",
-                "is_mythic": safe_str(row.get("is_mythic"), "false").lower() == "true",
-                "is_hatchable": safe_str(row.get("is_hatchable"), "false").lower() == "true",
-                "evolution": False,
-                "evolution_stage": safe_str(row.get("evolution_stage"), "unknown"),
-                "evolution_line_id": safe_str(row.get("evolution_line_id"), name_key),
-                "quantity_required": 0,
-                "item_required": False,
-                "requirement": "",
-                "stats": {
-                    "hp": safe_int(row.get("hp")),
-                    "attack": safe_int(row.get("attack")),
-                    "defense": safe_int(row.get("defense")),
-                    "sp_attack": safe_int(row.get("sp_attack")),
-                    "sp_defense": safe_int(row.get("sp_defense")),
-                    "speed": safe_int(row.get("speed")),
-                },
-                "physical": {
-                    "height": safe_float(row.get("height")),
-                    "weight": safe_float(row.get("weight")),
-                },
-                "pokedex_entry": safe_str(row.get("pokedex_entry")),
-                "image": image_url
-            }
+POKEMON_CSV_PATH = r"C:\Users\sebas\Desktop\Stream Stuff\Pokemon System\pokemon_list.csv"
 
-    # =========================
-    # PARSE FRIENDSHIP
-    # =========================
+# Collection stats from numpy column operations (pokedex_columnar) instead of
+# the Python loop, for catalogs of at least COLUMNAR_STATS_MIN_SPECIES. A
+# one-shot Mix It Up run pays more to import numpy (~120 ms) than it saves,
+# so the daemon and batch workers switch it on for themselves when numpy is
+# installed. Below ~1000 species the loop is as fast or faster.
+COLUMNAR_STATS = False
+COLUMNAR_STATS_MIN_SPECIES = 1000
 
-    friendship_map = {}
-    friendship_entries = [f.strip() for f in raw_friendship.split(",") if " x" in f]
 
-    for entry in friendship_entries:
-        try:
-            line_part, points_part = entry.split(" x", 1)
-            friendship_map[safe_str(line_part)] = safe_int(points_part)
-        except:
-            continue
+# =========================
+# MIX IT UP INPUTS
+# =========================
+
+# Keys are the Mix It Up special identifiers without the leading "$".
+# Mix It Up substitutes the values into this script's text; the batch
+# tools feed the same keys from an export instead.
+INPUT_FIELDS = (
+    "userpokedexall",
+    "usertrackall",
+    "userpokefriendshipall",
+    "username",
+    "useravatar",
+    "userhours",
+    "userfollowage",
+    "usersubage",
+    "usertotalcommandsrun",
+    "usertotalsubsgifted",
+    "userbitslifetimeamount",
+    "usertotalamountdonated",
+    "usertotalmonthssubbed",
+    "userprimaryrole",
+    "usersubtier",
+    "usertotalstreamswatched",
+    "usertotalchatmessagessent",
+    "usertotaltimestagged",
+    "userpokebagall",
+    "usertrackbuddytimespet",
+    "usertrackbuddyberriesfed"
+)
+
+
+def mix_it_up_inputs():
+    return {
+        "userpokedexall": "$userpokedexall",
+        "usertrackall": "$usertrackall",
+        "userpokefriendshipall": "$userpokefriendshipall",
+        "username": "$username",
+        "useravatar": "$useravatar",
+        "userhours": "$userhours",
+        "userfollowage": "$userfollowage",
+        "usersubage": "$usersubage",
+        "usertotalcommandsrun": "$usertotalcommandsrun",
+        "usertotalsubsgifted": "$usertotalsubsgifted",
+        "userbitslifetimeamount": "$userbitslifetimeamount",
+        "usertotalamountdonated": "$usertotalamountdonated",
+        "usertotalmonthssubbed": "$usertotalmonthssubbed",
+        "userprimaryrole": "$userprimaryrole",
+        "usersubtier": "$usersubtier",
+        "usertotalstreamswatched": "$usertotalstreamswatched",
+        "usertotalchatmessagessent": "$usertotalchatmessagessent",
+        "usertotaltimestagged": "$usertotaltimestagged",
+        "userpokebagall": "$userpokebagall",
+        "usertrackbuddytimespet": "$usertrackbuddytimespet",
+        "usertrackbuddyberriesfed": "$usertrackbuddyberriesfed"
+    }
 
 
+# =========================
+# PARSE TRAINER INPUTS
+# =========================
+
+def parse_trainer_inputs(inputs, catalog=None):
+    # === TRAINER INPUTS ===
+    raw_pokedex = inputs.get("userpokedexall", "")
+    raw_inventory = inputs.get("usertrackall", "")
+    raw_friendship = inputs.get("userpokefriendshipall", "")
+    raw_pokebag = inputs.get("userpokebagall", "")
+
+    state = {
+        "username": inputs.get("username", ""),
+        "avatar": inputs.get("useravatar", ""),
+
+        "user_hours": safe_int(inputs.get("userhours")),
+        "follow_age": safe_str(inputs.get("userfollowage")),
+        "sub_age": safe_str(inputs.get("usersubage")),
+        "total_commands": safe_int(inputs.get("usertotalcommandsrun")),
+
+        "user_subs_gifted": safe_int(inputs.get("usertotalsubsgifted")),
+        "user_bits_lifetime": safe_int(inputs.get("userbitslifetimeamount")),
+        "user_total_donated": safe_float(inputs.get("usertotalamountdonated")),
+        "user_sub_months": safe_int(inputs.get("usertotalmonthssubbed")),
+
+        "user_primary_role": safe_str(inputs.get("userprimaryrole")),
+        "user_sub_tier": safe_str(inputs.get("usersubtier")),
+        "user_streams_watched": safe_int(inputs.get("usertotalstreamswatched")),
+        "user_chat_messages": safe_int(inputs.get("usertotalchatmessagessent")),
+        "user_times_tagged": safe_int(inputs.get("usertotaltimestagged")),
+
+        "buddy_times_pet": safe_int(inputs.get("usertrackbuddytimespet")),
+        "buddy_times_fed": safe_int(inputs.get("usertrackbuddyberriesfed"))
+    }
+
     # =========================
-    # PARSE USER POKEDEX
+    # PARSE COUNT STRINGS
     # =========================
 
-    owned_counts = {}
+    # One shared tokenizer and report for all four blobs; only the Pokédex
+    # names are checked against the catalog (when there is one).
+    report = new_report()
 
-    entries = [e.strip() for e in raw_pokedex.split(",") if " x" in e]
+    friendship_map, _ = tokenize_counts(raw_friendship, report=report)
+    owned_counts, _ = tokenize_counts(raw_pokedex, fold_case=True, catalog=catalog, report=report)
+    inventory_stats, _ = tokenize_counts(raw_inventory, fold_case=True, report=report)
+    pokebag_contents, _ = tokenize_counts(raw_pokebag, report=report)
 
-    for entry in entries:
-        try:
-            name_part, count_part = entry.rsplit(" x", 1)
-            name = safe_str(name_part)
-            count = safe_int(count_part)
+    if report_has_issues(report):
+        logger.warning("Input problems for %s: %s", state["username"], json.dumps(report, ensure_ascii=False))
 
-            owned_counts[name.lower()] = count
-        except:
-            continue
+    state["friendship_map"] = friendship_map
+    state["owned_counts"] = owned_counts
+    state["inventory_stats"] = inventory_stats
+    state["pokebag_contents"] = pokebag_contents
+    state["input_report"] = report
+
+    return state
 
-    # =========================
-    # BUILD FULL POKEDEX
-    # =========================
+
+# =========================
+# BUILD FULL POKEDEX
+# =========================
+
+def build_pokemon_list(state, catalog):
+    with phase("species_entries"):
+        pokemon_list = build_species_entries(state, catalog)
+
+    with phase("matchups"):
+        attach_matchups(pokemon_list, catalog)
+
+    with phase("enrichment"):
+        line_completion_map = enrich_pokemon(pokemon_list, state, catalog)
+
+    return pokemon_list, line_completion_map
+
+
+def build_species_entries(state, catalog):
+    pokemon_metadata = catalog["pokemon_metadata"]
+    owned_counts = state["owned_counts"]
 
     pokemon_list = []
 
-    for key, meta in pokemon_metadata.items():
+    for key in catalog["species_order"]:
+        meta = pokemon_metadata[key]
         count = owned_counts.get(key, 0)
 
         pokemon_list.append({
@@ -293,67 +323,107 @@ def run():
 
         })
 
-    pokemon_list.sort(key=lambda x: x["pokedex_number"])
-
-    # ---- FULL EVOLUTION LINES ----
-
-    evolution_line_map = {}
-
-    for p in pokemon_list:
-        line_id = p["evolution_line_id"]
-        evolution_line_map.setdefault(line_id, []).append(p)
-
-    # sort each line by stage
-    for line_id, line in evolution_line_map.items():
-        evolution_line_map[line_id] = sorted(
-            line,
-            key=lambda x: safe_int(x["evolution_stage"], 0)
-        )
+    return pokemon_list
 
 
+def attach_matchups(pokemon_list, catalog):
     # ---- MATCHUPS & EVOLUTION LINE DATA TO EACH POKEMON ----
 
-    for p in pokemon_list:
+    evolution_line_entries = catalog["evolution"]["line_entries"]
 
-        strengths, weaknesses = calculate_type_matchups(
-            p["primary_type"],
-            p["secondary_type"]
-        )
+    matchups = calculate_batch_matchups(pokemon_list)
+
+    for p, (strengths, weaknesses) in zip(pokemon_list, matchups):
 
         p["strengths"] = strengths
         p["weaknesses"] = weaknesses
 
-        line = evolution_line_map.get(p["evolution_line_id"], [])
+        p["evolution_line"] = evolution_line_entries.get(p["evolution_line_id"], [])
 
-        p["evolution_line"] = [
-            {
-                "name": evo["name"],
-                "pokedex_number": evo["pokedex_number"],
-                "image": evo["image"],
-                "evolution_stage": evo["evolution_stage"]
-            }
-            for evo in line
-        ]
 
+def enrich_pokemon(pokemon_list, state, catalog):
+    evolution = catalog["evolution"]
+    owned_counts = state["owned_counts"]
+    friendship_map = state["friendship_map"]
 
+    # Line completion is needed by the totals, the region cards and every Pokémon
+    line_completion_map = {}
+
+    for line_id in evolution["lines"]:
+        line_completion_map[line_id] = line_is_complete(evolution, line_id, owned_counts)
 
     # =========================
-    # PARSE INVENTORY STATS
+    # ENRICH POKEMON WITH EVOLUTION FLAGS
     # =========================
 
-    inventory_stats = {}
+    evolution_nodes = evolution["nodes"]
 
-    inventory_entries = [i.strip() for i in raw_inventory.split(",") if " x" in i]
+    for key, p in zip(catalog["species_order"], pokemon_list):
+        node = evolution_nodes[key]
 
-    for item in inventory_entries:
-        try:
-            name_part, count_part = item.rsplit(" x", 1)
-            name = safe_str(name_part).lower()
-            count = safe_int(count_part)
+        p["evolution_stage"] = node["stage"]
+
+
+        # Line complete flag
+        p["line_complete"] = line_completion_map.get(
+            p["evolution_line_id"], False
+        )
 
-            inventory_stats[name] = count
-        except:
-            continue
+
+        # =========================
+        # INJECT TRANSITION REQUIREMENT (CHILD-SIDE)
+        # =========================
+
+        # CHILD LOGIC → requirement lives on the child
+        p["requirement"] = node["requirement"]
+        p["item_required"] = node["item_required"]
+
+        # PARENT LOGIC → quantity + evolvable live here
+        p["quantity_required"] = node["quantity_required"]
+        p["evolvable_now"] = is_evolvable_now(node, p["count"])
+
+        p["requires_stone"] = node["requires_stone"]
+        p["requires_trade"] = node["requires_trade"]
+
+        # =========================
+        # FRIENDSHIP ENRICHMENT
+        # =========================
+
+        line_id = safe_str(p["evolution_line_id"])
+        apply_friendship(p, friendship_map.get(line_id, 0), node["requires_friendship"])
+
+    return line_completion_map
+
+
+def apply_friendship(p, friendship_points, requires_friendship):
+    p["friendship_points"] = friendship_points
+
+    if requires_friendship:
+
+        percent = round(
+            min((friendship_points / FRIENDSHIP_REQUIREMENT) * 100, 100),
+            2
+        ) if FRIENDSHIP_REQUIREMENT > 0 else 0
+
+        p["friendship_requirement"] = FRIENDSHIP_REQUIREMENT
+        p["friendship_progress_percent"] = percent
+
+
+# =========================
+# TRAINER STATS
+# =========================
+
+def build_collection_stats(pokemon_list, line_completion_map, catalog):
+    # pokedex / generation_progress / evolution / types / legendary
+    if COLUMNAR_STATS and len(catalog["species_order"]) >= COLUMNAR_STATS_MIN_SPECIES \
+            and columnar_available():
+        return columnar_collection_stats(pokemon_list, line_completion_map, catalog)
+
+    return accumulate_collection_stats(pokemon_list, line_completion_map, catalog)
+
+
+def build_capture_stats(state):
+    inventory_stats = state["inventory_stats"]
 
     # ---- BALLS ----
     total_balls_thrown = sum(
@@ -429,408 +499,595 @@ def run():
     # ---- TRADES ----
     times_traded = inventory_stats.get("trade", 0)
 
-        # ---- EGGS HATCHED ----
+    # ---- EGGS HATCHED ----
     times_eggs_hatched = inventory_stats.get("eggs hatched", 0)
 
+    pokeballs = {
+        "thrown": total_balls_thrown,
+        "success": total_success,
+        "accuracy_percent": accuracy,
+        "most_used": most_used_ball,
+        "details": {
+            "poke ball": poke_ball,
+            "great ball": great_ball,
+            "ultra ball": ultra_ball,
+            "master ball": master_ball
+        }
+    }
+
+    journey = {
+        "watch_hours": state["user_hours"],
+        "follow_age": state["follow_age"] or "Unknown",
+        "sub_age": state["sub_age"] or "Not Subscribed",
+        "sub_months": state["user_sub_months"],
+        "subs_gifted": state["user_subs_gifted"],
+        "bits_donated": state["user_bits_lifetime"],
+        "total_donated": state["user_total_donated"],
+        "primary_role": state["user_primary_role"],
+        "sub_tier": state["user_sub_tier"],
+        "streams_watched": state["user_streams_watched"],
+        "chat_messages": state["user_chat_messages"],
+        "commands_run": state["total_commands"],
+        "times_tagged": state["user_times_tagged"],
+        "times_evolved": times_evolved,
+        "times_traded": times_traded,
+        "times_eggs_hatched": times_eggs_hatched,
+        "ball_distribution": ball_distribution,
+        "pokebag": state["pokebag_contents"]
+    }
 
-    # ---- POKEBAG CONTENTS ----
+    return pokeballs, journey
 
-    pokebag_contents = {}
 
-    bag_entries = [i.strip() for i in raw_pokebag.split(",") if " x" in i]
+def assemble_trainer_stats(collection_stats, pokeballs, journey):
+    # ---- FINAL TRAINER STATS OBJECT ----
+    return {
+        "pokedex": collection_stats["pokedex"],
+        "generation_progress": collection_stats["generation_progress"],
+        "evolution": collection_stats["evolution"],
+        "types": collection_stats["types"],
+        "legendary": collection_stats["legendary"],
+        "pokeballs": pokeballs,
+        "journey": journey
+    }
 
-    for item in bag_entries:
-        try:
-            name_part, count_part = item.rsplit(" x", 1)
-            name = safe_str(name_part)
-            count = safe_int(count_part)
 
-            pokebag_contents[name] = count
-        except:
-            continue
+# =========================
+# BUILD COMPANION OBJECT
+# =========================
+
+def build_companion(state, pokemon_list, catalog):
+    buddy = find_buddy(BUDDY_FILE_PATH, state["username"])
+
+    if buddy is None:
+        return None
+
+    representative = catalog["evolution"]["line_representatives"].get(buddy["line_id"])
+
+    if representative is None:
+        logger.warning(
+            "%s's buddy line %s is not in the catalog", state["username"], buddy["line_id"]
+        )
+        return None
+
+    p = pokemon_list[catalog["species_index"][representative]]
+
+    companion = {
+        "name": p["name"],
+        "pokedex_number": p["pokedex_number"],
+        "image": p["image"],
+        "primary_type": p["primary_type"],
+        "secondary_type": p["secondary_type"],
+        "evolution_line_id": buddy["line_id"],
+        "friendship_points": p["friendship_points"],
+        "times_pet": state["buddy_times_pet"],
+        "times_fed": state["buddy_times_fed"]
+    }
+
+    if "friendship_requirement" in p:
+        companion["friendship_requirement"] = p["friendship_requirement"]
+        companion["friendship_progress_percent"] = p["friendship_progress_percent"]
+
+    return companion
+
+
+# =========================
+# BUILD TRAINER DOCUMENT
+# =========================
+
+def build_trainer_document(inputs, catalog):
+    return build_state_document(parse_trainer_inputs(inputs, catalog), catalog)
+
+
+def build_state_document(state, catalog):
+    pokemon_list, line_completion_map = build_pokemon_list(state, catalog)
+
+    with phase("collection_stats"):
+        collection_stats = build_collection_stats(pokemon_list, line_completion_map, catalog)
+
+    with phase("capture_stats"):
+        pokeballs, journey = build_capture_stats(state)
+
+    with phase("companion"):
+        companion = build_companion(state, pokemon_list, catalog)
+
+    return assemble_trainer_document(
+        state,
+        assemble_trainer_stats(collection_stats, pokeballs, journey),
+        pokemon_list,
+        companion
+    )
 
 
+def assemble_trainer_document(state, trainer_stats, pokemon_list, companion):
     # =========================
-    # TRAINER STATS
+    # FINAL OUTPUT
     # =========================
 
-    total_available = len(pokemon_list)
+    return {
+        "user": {
+            "username": state["username"],
+            "avatar": state["avatar"]
+        },
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "trainer_stats": trainer_stats,
+        "pokemon": pokemon_list,
+        "companion": companion
+    }
 
-    owned_pokemon = [p for p in pokemon_list if p["owned"]]
-    unique_owned = len(owned_pokemon)
-    total_owned = sum(p["count"] for p in owned_pokemon)
 
-    completion_percent = round(
-        (unique_owned / total_available) * 100, 2
-    ) if total_available > 0 else 0
+def prepare_trainer_document(output, catalog, mode=None, data_path=None):
+    mode = mode or OUTPUT_MODE
+    data_path = data_path or DATA_PATH
 
+    # Built from the full entries, before split mode slims them down.
+    filters = build_filter_index(output["pokemon"]) if FILTER_INDEX else None
+    revision = output.get("revision")
 
-    # ---- GENERATION PROGRESS ----
-    generation_progress = {}
+    if mode == SPLIT_FORMAT:
+        publish_catalog_document(
+            catalog,
+            os.path.join(data_path, CATALOG_FILE_NAME),
+            FRIENDSHIP_REQUIREMENT
+        )
+        output = build_slim_document(output, catalog)
 
-    for p in pokemon_list:
-        gen = p["generation"]
+    if revision is not None and "revision" not in output:
+        output = {**output, "revision": revision}
 
-        # Skip invalid or unknown generations
-        if gen <= 0:
-            continue
+    if filters is not None:
+        output = {**output, "filters": filters}
 
-        if gen not in generation_progress:
-            generation_progress[gen] = {
-                "generation": gen,
-                "region": p["region"],
-                "owned": 0,
-                "total": 0
-            }
+    return output
 
-        generation_progress[gen]["total"] += 1
-        if p["owned"]:
-            generation_progress[gen]["owned"] += 1
 
+def render_trainer_document(output, catalog, mode=None, data_path=None, output_format=None):
+    document = prepare_trainer_document(output, catalog, mode, data_path)
 
-    for gen in generation_progress:
-        owned = generation_progress[gen]["owned"]
-        total = generation_progress[gen]["total"]
+    return encode_document(document, output_format or OUTPUT_FORMAT, PRECOMPRESS)
 
-        generation_progress[gen]["completion_percent"] = round(
-            (owned / total) * 100, 2
-        ) if total > 0 else 0
 
-    generation_progress = dict(sorted(generation_progress.items()))
+def write_trainer_document(output, catalog, path, mode=None, data_path=None,
+                           output_format=None, encodings=None):
+    # Streams straight to disk instead of building the whole string first.
+    document = prepare_trainer_document(output, catalog, mode, data_path)
 
+    return write_document(
+        document,
+        path,
+        output_format or OUTPUT_FORMAT,
+        PRECOMPRESS if encodings is None else encodings
+    )
 
 
+# =========================
+# INCREMENTAL REGENERATION
+# =========================
 
-    # ---- EVOLUTION PROGRESS ----
-    evolution_lines = {}
-    evolvable_owned = 0
+def trainer_file_name(username):
+    return f"{safe_str(username).lower()}.json"
 
-    for p in pokemon_list:
-        line_id = p["evolution_line_id"]
-        evolution_lines.setdefault(line_id, []).append(p)
 
-        if p["owned"] and p["quantity_required"] > 0 and p["count"] >= p["quantity_required"]:
-            evolvable_owned += 1
+def trainer_output_path(username):
+    # Where this trainer's file lives: OUTPUT_PATH when set, else where Mix It Up saves it.
+    if OUTPUT_PATH and not os.path.isdir(OUTPUT_PATH):
+        return OUTPUT_PATH
 
-    total_evolution_lines = len(evolution_lines)
+    return os.path.join(OUTPUT_PATH or DATA_PATH, trainer_file_name(username))
 
-    lines_completed = 0
 
-    for line in evolution_lines.values():
-        if all(p["owned"] for p in line):
-            lines_completed += 1
+def read_previous_document(path, catalog):
+    # A file older than the CSV was built against another catalog; rebuild it.
+    try:
+        if os.stat(path).st_mtime_ns < catalog["source"]["mtime_ns"]:
+            return None, None
 
-    evolution_stage_counts = {}
+        with open(path, "r", encoding="utf-8") as previous_file:
+            text = previous_file.read()
 
-    for p in owned_pokemon:
-        stage = p["evolution_stage"]
-        evolution_stage_counts[stage] = evolution_stage_counts.get(stage, 0) + 1
+        return json.loads(text), text
+    except (OSError, ValueError):
+        return None, None
 
-    stage_totals = {}
-    stage_owned = {}
 
-    total_evolutions_available = 0
-    total_evolutions_owned = 0
+def previous_pokemon_state(previous, catalog):
+    """Recover per-species counts and per-line friendship from a previous document."""
+    species_order = catalog["species_order"]
+    lines = catalog["evolution"]["lines"]
 
-    for p in pokemon_list:
-        stage = safe_int(p["evolution_stage"], 0)
+    if not isinstance(previous, dict) or not isinstance(previous.get("trainer_stats"), dict):
+        return None
 
-        if stage > 0:
-            total_evolutions_available += 1
-            stage_totals[stage] = stage_totals.get(stage, 0) + 1
+    pokemon = previous.get("pokemon")
 
-            if p["owned"]:
-                total_evolutions_owned += 1
-                stage_owned[stage] = stage_owned.get(stage, 0) + 1
+    if previous.get("format") == SPLIT_FORMAT:
+        if previous.get("catalog", {}).get("version") != catalog_version(catalog) \
+                or not isinstance(pokemon, dict):
+            return None
 
-    # =========================
-    # ENRICH POKEMON WITH EVOLUTION FLAGS
-    # =========================
+        entries = [pokemon.get(key, {}) for key in species_order]
+    else:
+        pokemon_metadata = catalog["pokemon_metadata"]
 
-    # 1️⃣ Determine which evolution lines are complete
-    line_completion_map = {}
+        if not isinstance(pokemon, list) or len(pokemon) != len(species_order):
+            return None
 
-    for line_id, line in evolution_lines.items():
-        is_complete = all(p["owned"] for p in line)
-        line_completion_map[line_id] = is_complete
+        for key, p in zip(species_order, pokemon):
+            if p.get("name") != pokemon_metadata[key]["name"]:
+                return None
 
+        entries = pokemon
 
-    # 2️⃣ Enrich each Pokémon
-    for p in pokemon_list:
+    species_index = catalog["species_index"]
 
-        # Normalize stage to int (important for filtering)
-        stage_int = safe_int(p["evolution_stage"], 0)
+    counts = [p.get("count", 0) for p in entries]
+    friendship = {
+        safe_str(line_id): entries[species_index[keys[0]]].get("friendship_points", 0)
+        for line_id, keys in lines.items()
+    }
 
-        if stage_int == 4:
-            p["evolution_stage"] = "mega"
-        else:
-            p["evolution_stage"] = stage_int
+    return counts, friendship
 
 
-        # Line complete flag
-        p["line_complete"] = line_completion_map.get(
-            p["evolution_line_id"], False
-        )
-        
+def incremental_trainer_document(inputs, catalog, previous):
+    return incremental_state_document(parse_trainer_inputs(inputs, catalog), catalog, previous)
 
-        # =========================
-        # INJECT TRANSITION REQUIREMENT (CHILD-SIDE)
-        # =========================
 
-        species_key = safe_str(p["name"]).strip().lower()
+def incremental_state_document(state, catalog, previous):
+    """
+    Return the trainer document for state, reusing previous where possible,
+    or None when the result would only differ from previous by updated_at.
+    """
+    previous_state = previous_pokemon_state(previous, catalog)
 
-        # --- Defaults ---
-        p["requirement"] = ""
-        p["item_required"] = False
-        p["quantity_required"] = 0
-        p["evolvable_now"] = False
-        requirement_text = ""
+    # Also rebuild when FILTER_INDEX / PATCH_FEED were switched since the file was written.
+    if previous_state is None or ("filters" in previous) != FILTER_INDEX \
+            or ("revision" in previous) != PATCH_FEED:
+        return build_state_document(state, catalog)
 
-        # --------------------------------------------------
-        # CHILD LOGIC → requirement lives on the child
-        # --------------------------------------------------
-        if species_key in transition_map:
-            transition = transition_map[species_key]
+    previous_counts, previous_friendship = previous_state
 
-            p["requirement"] = transition["requirement"]
-            p["item_required"] = transition["item_required"]
+    owned_counts = state["owned_counts"]
+    friendship_map = state["friendship_map"]
 
-            requirement_text = safe_str(transition["requirement"]).strip().lower()
+    species_order = catalog["species_order"]
+    evolution = catalog["evolution"]
 
-        p["requires_stone"] = "stone" in requirement_text
-        p["requires_trade"] = "trade" in requirement_text
+    changed_species = [
+        index for index, key in enumerate(species_order)
+        if owned_counts.get(key, 0) != previous_counts[index]
+    ]
 
+    changed_lines = [
+        line_id for line_id in evolution["lines"]
+        if friendship_map.get(safe_str(line_id), 0) != previous_friendship[safe_str(line_id)]
+    ]
 
-        # --------------------------------------------------
-        # PARENT LOGIC → quantity + evolvable live here
-        # --------------------------------------------------
+    pokeballs, journey = build_capture_stats(state)
+    previous_stats = previous["trainer_stats"]
 
-        # Find all children of this Pokémon
-        children = [
-            transition
-            for transition in transition_map.values()
-            if transition["parent"] == species_key
-        ]
+    # ---- SLIM DOCUMENTS: DIFF ONLY ----
+    # Split files don't carry enough to patch, but they are cheap to rebuild.
+    if previous.get("format") == SPLIT_FORMAT:
+        output = build_state_document(state, catalog)
 
-        if children:
+        if changed_species or changed_lines or output["user"] != previous["user"] \
+                or output["trainer_stats"]["pokeballs"] != previous_stats["pokeballs"] \
+                or output["trainer_stats"]["journey"] != previous_stats["journey"] \
+                or output["companion"] != previous["companion"]:
+            return output
 
-            # Use MINIMUM quantity required across children
-            min_required = min(
-                t["quantity_required"]
-                for t in children
-                if t["quantity_required"] > 0
-            ) if any(t["quantity_required"] > 0 for t in children) else 0
+        return None
 
-            p["quantity_required"] = min_required
+    # ---- PATCH CHANGED SPECIES ----
+    pokemon_list = previous["pokemon"]
+    evolution_nodes = evolution["nodes"]
 
-            if (
-                p["owned"]
-                and min_required > 0
-                and p["count"] >= min_required
-            ):
-                p["evolvable_now"] = True
+    flipped_lines = set()
+    count_delta = 0
 
-        # =========================
-        # FRIENDSHIP ENRICHMENT
-        # =========================
+    for index in changed_species:
+        key = species_order[index]
+        p = pokemon_list[index]
+        count = owned_counts.get(key, 0)
 
-        line_id = safe_str(p["evolution_line_id"])
-        friendship_points = friendship_map.get(line_id, 0)
+        if (count > 0) != p["owned"]:
+            flipped_lines.add(catalog["pokemon_metadata"][key]["evolution_line_id"])
+        elif count > 0:
+            count_delta += count - p["count"]
+
+        p["count"] = count
+        p["owned"] = count > 0
+        p["evolvable_now"] = is_evolvable_now(evolution_nodes[key], count)
+
+    # ---- LINE COMPLETION FOR LINES THAT GAINED OR LOST A SPECIES ----
+    species_index = catalog["species_index"]
+
+    for line_id in flipped_lines:
+        complete = line_is_complete(evolution, line_id, owned_counts)
+
+        for key in evolution["lines"][line_id]:
+            pokemon_list[species_index[key]]["line_complete"] = complete
+
+    # ---- FRIENDSHIP FOR CHANGED LINES ----
+    for line_id in changed_lines:
+        points = friendship_map.get(safe_str(line_id), 0)
+
+        for key in evolution["lines"][line_id]:
+            apply_friendship(
+                pokemon_list[species_index[key]],
+                points,
+                evolution_nodes[key]["requires_friendship"]
+            )
+
+    # ---- AGGREGATES ----
+    if flipped_lines:
+        # Ownership moved, so generation / type / evolution / legendary buckets all can.
+        line_completion_map = {
+            line_id: pokemon_list[species_index[keys[0]]]["line_complete"]
+            for line_id, keys in evolution["lines"].items()
+        }
+        collection_stats = build_collection_stats(pokemon_list, line_completion_map, catalog)
+    else:
+        # Counts alone only move the total.
+        collection_stats = previous_stats
+        collection_stats["pokedex"]["total_owned"] += count_delta
 
-        p["friendship_points"] = friendship_points
+    companion = build_companion(state, pokemon_list, catalog)
 
-        if "friendship" in requirement_text:
+    user = {
+        "username": state["username"],
+        "avatar": state["avatar"]
+    }
 
-            percent = round(
-                min((friendship_points / FRIENDSHIP_REQUIREMENT) * 100, 100),
-                2
-            ) if FRIENDSHIP_REQUIREMENT > 0 else 0
+    if not changed_species and not changed_lines and user == previous["user"] \
+            and pokeballs == previous_stats["pokeballs"] \
+            and journey == previous_stats["journey"] \
+            and companion == previous["companion"]:
+        return None
+
+    return assemble_trainer_document(
+        state,
+        assemble_trainer_stats(collection_stats, pokeballs, journey),
+        pokemon_list,
+        companion
+    )
 
-            p["friendship_requirement"] = FRIENDSHIP_REQUIREMENT
-            p["friendship_progress_percent"] = percent
 
+# =========================
+# MAIN SCRIPT
+# =========================
 
-    # ---- REGION EVOLUTION LINES ----
-    region_lines = {}
+def generate_trainer_text(inputs, catalog, record=True):
+    with phase("parse_inputs"):
+        state = parse_trainer_inputs(inputs, catalog)
 
-    for line in evolution_lines.values():
-        region = line[0]["region"]
-        region_lines.setdefault(region, []).append(line)
+    return generate_state_text(state, catalog, record)
 
-    for gen in generation_progress.values():
-        region = gen["region"]
-        lines = region_lines.get(region, [])
 
-        gen["total_lines"] = len(lines)
-        gen["lines_completed"] = sum(
-            1 for line in lines if all(p["owned"] for p in line)
-        )
+def generate_state_text(state, catalog, record=True):
+    path = trainer_output_path(state["username"])
 
-    # ---- TYPE MASTERY ----
-    type_progress = {}
+    output, previous_text = build_recorded_document(
+        state, catalog, path, INCREMENTAL_MODE, record_store=record, record_feed=record
+    )
 
-    for p in pokemon_list:
-        t = p["primary_type"].lower()
-        type_progress.setdefault(t, {"owned": 0, "total": 0})
+    # Nothing changed: hand the old file back so it's rewritten with the same bytes.
+    if output is None:
+        return previous_text
 
-        type_progress[t]["total"] += 1
-        if p["owned"]:
-            type_progress[t]["owned"] += 1
+    with phase("render"):
+        text = render_trainer_document(output, catalog)
 
-    for t, data in type_progress.items():
-        data["completion_percent"] = round(
-            (data["owned"] / data["total"]) * 100, 2
-        ) if data["total"] > 0 else 0
+    # The .json is written by Mix It Up or write_trainer_text; the siblings are ours to write.
+    if PRECOMPRESS:
+        with phase("precompress"):
+            write_compressed_siblings(path, text.encode("utf-8"), PRECOMPRESS)
 
+    return text
 
-    # ---- RARITY ----
-    rarity_progress = {}
 
-    for p in pokemon_list:
-        r = p["rarity"].lower()
-        rarity_progress.setdefault(r, {"owned": 0, "total": 0})
+def build_recorded_document(state, catalog, path, incremental=False, record_store=True, record_feed=True):
+    """
+    (output, previous_text) for state's trainer file at path, with the store and
+    the patch feed brought up to date. output is None when incremental found
+    nothing to change; previous_text is then the file to keep. Everything that
+    writes trainer files builds them here, so no writer skips a side record.
+    """
+    if STORE_PATH and record_store:
+        with phase("store"):
+            record_trainer_state(state)
 
-        rarity_progress[r]["total"] += 1
-        if p["owned"]:
-            rarity_progress[r]["owned"] += 1
+    feed = PATCH_FEED and record_feed
+    previous = previous_text = None
 
-    total_legendary_available = 0
-    total_legendary_owned = 0
+    if incremental or feed:
+        with phase("read_previous"):
+            previous, previous_text = read_previous_document(path, catalog)
 
-    for p in pokemon_list:
-        if p.get("is_legendary") or p.get("is_mythic"):
+    # Taken before incremental mode patches the previous document in place.
+    snapshot = patch_snapshot(previous, catalog) if feed else None
 
-            total_legendary_available += 1
+    if incremental:
+        with phase("incremental"):
+            output = incremental_state_document(state, catalog, previous)
 
-            if p["owned"]:
-                total_legendary_owned += 1
+        if output is None:
+            return None, previous_text
+    else:
+        output = build_state_document(state, catalog)
 
+    if feed:
+        with phase("patch_feed"):
+            output = record_revision(path, snapshot, output, catalog, PATCH_RING_SIZE)
+    elif PATCH_FEED:
+        output = stamp_revision(path, output)
 
-    # ---- FINAL TRAINER STATS OBJECT ----
-    trainer_stats = {
-        "pokedex": {
-            "total_available": total_available,
-            "unique_owned": unique_owned,
-            "total_owned": total_owned,
-            "completion_percent": completion_percent
-        },
+    return output, previous_text
 
-        "generation_progress": generation_progress,
 
-        "evolution": {
-            "total_evolutions_owned": total_evolutions_owned,
-            "total_evolutions_available": total_evolutions_available,
-            "lines_completed": lines_completed,
-            "total_lines": total_evolution_lines,
-            "stage_totals": stage_totals,
-            "stage_owned": stage_owned
-        },
+def record_trainer_state(state):
+    # The store is a side record; a locked or broken database must not cost the trainer their file.
+    try:
+        with open_store(STORE_PATH) as connection:
+            save_trainer_state(connection, state)
+    except sqlite3.Error as e:
+        logger.error("Could not record %s in %s: %s", state["username"], STORE_PATH, e)
 
-        "types": type_progress,
 
-        "legendary": {
-            "owned": total_legendary_owned,
-            "total": total_legendary_available
-        },
+def write_trainer_text(path, text):
+    """Atomically replace path with text; False when it already held exactly that."""
+    try:
+        with open(path, "r", encoding="utf-8") as previous_file:
+            if previous_file.read() == text:
+                return False
+    except (OSError, ValueError):
+        pass
 
-        "pokeballs": {
-            "thrown": total_balls_thrown,
-            "success": total_success,
-            "accuracy_percent": accuracy,
-            "most_used": most_used_ball,
-            "details": {
-                "poke ball": poke_ball,
-                "great ball": great_ball,
-                "ultra ball": ultra_ball,
-                "master ball": master_ball
-            }
-        },
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_atomically(path, text)
 
-        "journey": {
-            "watch_hours": user_hours,
-            "follow_age": follow_age or "Unknown",
-            "sub_age": sub_age or "Not Subscribed",
-            "sub_months": user_sub_months,
-            "subs_gifted": user_subs_gifted,
-            "bits_donated": user_bits_lifetime,
-            "total_donated": user_total_donated,
-            "primary_role": user_primary_role,
-            "sub_tier": user_sub_tier,
-            "streams_watched": user_streams_watched,
-            "chat_messages": user_chat_messages,
-            "commands_run": total_commands,
-            "times_tagged": user_times_tagged,
-            "times_evolved": times_evolved,
-            "times_traded": times_traded,
-            "times_eggs_hatched": times_eggs_hatched,
-            "ball_distribution": ball_distribution,
-            "pokebag": pokebag_contents
-        }
-    }
+    return True
 
-    # =========================
-    # BUILD COMPANION OBJECT
-    # =========================
 
-    companion = None
+def request_from_daemon(inputs):
+    """The daemon's document, or None when nothing is listening."""
+    request = urllib.request.Request(
+        f"{DAEMON_URL.rstrip('/')}/render",
+        data=json.dumps(inputs).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
 
     try:
-        with open(BUDDY_FILE_PATH, "r", encoding="utf-8") as buddy_file:
-            for line in buddy_file:
-                parts = line.strip().split()
+        with urllib.request.urlopen(request, timeout=DAEMON_TIMEOUT) as response:
+            return response.read().decode("utf-8")
+    except urllib.error.URLError as e:
+        # Same rule as send_to_daemon: only a refused connection means no
+        # daemon saw the request. A timeout or an error reply may come after
+        # it already recorded it.
+        if isinstance(e.reason, ConnectionRefusedError):
+            return None
+        raise
+
+
+def produce_trainer_text(inputs):
+    record = True
+
+    if DAEMON_URL:
+        with phase("daemon_request"):
+            try:
+                text = request_from_daemon(inputs)
+            except (OSError, ValueError) as e:
+                logger.warning("Daemon at %s did not answer for %s (%s); building without side records",
+                               DAEMON_URL, inputs.get("username"), e)
+                text = None
+                record = False
+
+        if text is not None:
+            return text
+
+    with phase("load_catalog"):
+        catalog = load_catalog(POKEMON_CSV_PATH)
+
+    # The event log has one writer: a daemon that is up owns it.
+    if EVENTS_PATH and record:
+        with phase("record_event"):
+            record_sync_event(inputs)
+
+    return generate_trainer_text(inputs, catalog, record)
+
+
+def record_sync_event(inputs):
+    # Same as the store: the log is a side record here and must not cost the trainer their file.
+    try:
+        append_event(EVENTS_PATH, sync_event(inputs))
+    except (OSError, ValueError) as e:
+        logger.error("Could not log %s to %s: %s", inputs.get("username"), EVENTS_PATH, e)
 
-                if len(parts) < 4:
-                    continue
 
-                file_username = parts[0]
+def run():
+    measuring = metrics_enabled(METRICS_ENABLED)
+    profile_output = profile_path()
 
-                if file_username.lower() != username.lower():
-                    continue
+    if measuring:
+        start_run()
 
-                companion_line_id = safe_str(parts[2])
+    profiler = cProfile.Profile() if profile_output else None
 
-                for p in pokemon_list:
-                    if safe_str(p["evolution_line_id"]) == companion_line_id:
+    if profiler:
+        profiler.enable()
 
-                        companion = {
-                            "name": p["name"],
-                            "pokedex_number": p["pokedex_number"],
-                            "image": p["image"],
-                            "primary_type": p["primary_type"],
-                            "secondary_type": p["secondary_type"],
-                            "evolution_line_id": companion_line_id,
-                            "friendship_points": p["friendship_points"],
-                            "times_pet": buddy_times_pet,
-                            "times_fed": buddy_times_fed
-                        }
+    inputs = mix_it_up_inputs()
+    text = produce_trainer_text(inputs)
 
-                        if "friendship_requirement" in p:
-                            companion["friendship_requirement"] = p["friendship_requirement"]
-                            companion["friendship_progress_percent"] = p["friendship_progress_percent"]
+    if OUTPUT_PATH:
+        path = trainer_output_path(inputs["username"])
 
-                        break
+        with phase("write"):
+            try:
+                write_trainer_text(path, text)
+            except OSError as e:
+                logger.error("Could not write %s: %s", path, e)
 
-                break
-    except:
-        companion = None
+    if profiler:
+        profiler.disable()
 
+        try:
+            profiler.dump_stats(profile_output)
+        except OSError as e:
+            logger.warning("Could not write profile to %s: %s", profile_output, e)
+
+    if measuring:
+        finish_run(
+            METRICS_LOG_PATH,
+            username=inputs["username"],
+            output_mode=OUTPUT_MODE,
+            output_format=OUTPUT_FORMAT,
+            incremental=INCREMENTAL_MODE,
+            daemon=bool(DAEMON_URL),
+            bytes=len(text.encode("utf-8"))
+        )
 
-    # =========================
-    # FINAL OUTPUT
-    # =========================
+    # Nothing for Mix It Up to save once the script wrote the file itself.
+    return None if OUTPUT_PATH else text
 
-    output = {
-        "user": {
-            "username": username,
-            "avatar": avatar
-        },
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-        "trainer_stats": trainer_stats,
-        "pokemon": pokemon_list,
-        "companion": companion
-    }
 
-    return json.dumps(output, indent=2, ensure_ascii=False)
+def configure_logging():
+    try:
+        os.makedirs(os.path.dirname(ERROR_LOG_PATH), exist_ok=True)
+        handler = logging.FileHandler(ERROR_LOG_PATH, encoding="utf-8")
+    except OSError:
+        # Still keep warnings off stderr; losing the log beats a corrupt trainer file.
+        handler = logging.NullHandler()
+
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logging.basicConfig(level=logging.WARNING, handlers=[handler])
+
 
+if __name__ == "__main__":
+    configure_logging()
+    text = run()
 
-print(run())
+    if text is not None:
+        print(text)
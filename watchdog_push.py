@@ -1,5 +1,14 @@
 import time
+import json
+import hashlib
+import os
+import queue
+import threading
 import subprocess
+import sys
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from pathlib import Path
@@ -7,29 +16,581 @@ from pathlib import Path
 REPO_PATH = Path(__file__).parent
 DATA_PATH = REPO_PATH / "data"
 
+sys.path.insert(0, str(REPO_PATH / "python"))
+
+from pokedex_manifest import MANIFEST_FILE_NAME, HASHED_DIR_NAME, sync_manifest
+from pokedex_output import COMPRESSED_ENCODINGS
+
+# Written by this script alongside every batch (python/pokedex_manifest.py):
+# data/v/<user>.<hash>.json copies and the manifest that points at them.
+MANIFEST_PATHS = (DATA_PATH / MANIFEST_FILE_NAME, DATA_PATH / HASHED_DIR_NAME)
+
+# =========================
+# PUBLISH CONFIG
+# =========================
+
+# A batch is published once no new change has arrived for QUIET_WINDOW
+# seconds, or MAX_LATENCY seconds after its first change, whichever is first.
+# That caps chat-command-to-overlay delay even while a raid keeps writing.
+QUIET_WINDOW = 2.0
+MAX_LATENCY = 10.0
+
+PUSH_RETRIES = 4
+PUSH_BACKOFF = 2.0  # seconds, doubled after every failed push
+
+# A batch that failed to commit, or commits that failed to push, are tried
+# again after this many seconds even if no new change arrives.
+RETRY_INTERVAL = 30.0
+
+# Commit subjects list at most this many trainers before "and N more".
+COMMIT_NAME_LIMIT = 10
+
+# =========================
+# CONTENT GATE CONFIG
+# =========================
+
+# Per-file, per-section hashes of what was last published (gitignored).
+STATE_PATH = REPO_PATH / ".watchdog_state.json"
+
+# Top-level fields that change on every regeneration without meaning anything.
+VOLATILE_FIELDS = ("updated_at",)
+
+# =========================
+# METRICS CONFIG
+# =========================
+
+# GET http://127.0.0.1:8766/status -> queue depth, counters, latency
+# percentiles and the last successful push per trainer file (None disables it).
+STATUS_HOST = "127.0.0.1"
+STATUS_PORT = 8766
+
+# One JSON line per batch, rolled over to watchdog_metrics.jsonl.1 once it
+# passes METRICS_MAX_BYTES. Use it to tune QUIET_WINDOW / MAX_LATENCY.
+METRICS_PATH = REPO_PATH / "logs" / "watchdog_metrics.jsonl"
+METRICS_MAX_BYTES = 5 * 1024 * 1024
+
+# Latency percentiles are taken over this many most recent samples.
+LATENCY_WINDOW = 500
+
+# (path, monotonic time the event arrived)
+change_queue = queue.Queue()
+
+
+# Writers put "<name>.json.<pid>.tmp" next to the target and rename it over
+# the .json once it is complete (python/pokedex_output.py), so temp files are
+# never queued and a finished file usually shows up as a move, not a write.
+# The .json.gz / .json.br siblings aren't queued either; they are published
+# with their .json (sibling_paths).
+def is_data_file(path):
+    # The manifest is ours; data/v/ is never seen (the observer isn't recursive).
+    return path.endswith(".json") and Path(path).name != MANIFEST_FILE_NAME
+
+
 class DataChangeHandler(FileSystemEventHandler):
+    def queue_path(self, path):
+        if is_data_file(path):
+            change_queue.put((Path(path), time.monotonic()))
+
     def on_modified(self, event):
+        if not event.is_directory:
+            self.queue_path(event.src_path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.queue_path(event.src_path)
+
+    def on_moved(self, event):
         if event.is_directory:
             return
 
-        if event.src_path.endswith(".json"):
-            print(f"Detected change: {event.src_path}")
-            commit_and_push()
+        # Renamed into place (the normal atomic write) or away from its name.
+        self.queue_path(event.dest_path)
+        self.queue_path(event.src_path)
+
+
+# =========================
+# BATCHING
+# =========================
+
+def next_batch(timeout=None):
+    """Block for the first change, then keep collecting until things go quiet.
+
+    Returns ({path: time of its first event}, number of events, time of the first event),
+    or an empty batch when nothing arrived within timeout seconds.
+    """
+    try:
+        path, seen = change_queue.get(timeout=timeout)
+    except queue.Empty:
+        return {}, 0, time.monotonic()
+
+    batch = {path: seen}
+    events = 1
+
+    started = seen
+
+    while True:
+        remaining = MAX_LATENCY - (time.monotonic() - started)
+
+        if remaining <= 0:
+            break
+
+        try:
+            path, seen = change_queue.get(timeout=min(QUIET_WINDOW, remaining))
+        except queue.Empty:
+            break
+
+        batch.setdefault(path, seen)
+        events += 1
+
+    return batch, events, started
+
+
+def commit_message(files):
+    names = [path.stem for path in files]
+
+    if len(names) > COMMIT_NAME_LIMIT:
+        shown = ", ".join(names[:COMMIT_NAME_LIMIT])
+        return f"Update Pokédex data: {shown} and {len(names) - COMMIT_NAME_LIMIT} more"
+
+    return f"Update Pokédex data: {', '.join(names)}"
+
+
+# =========================
+# CONTENT GATE
+# =========================
 
-def commit_and_push():
+def section_hashes(path):
+    # None for a deleted file; a single "raw" hash for anything that isn't a JSON object.
     try:
-        subprocess.run(["git", "add", "data"], cwd=REPO_PATH, check=True)
-        subprocess.run(
-            ["git", "commit", "-m", "Update user Pokédex data"],
-            cwd=REPO_PATH,
-            check=True
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    try:
+        document = json.loads(raw)
+    except ValueError:
+        document = None
+
+    if not isinstance(document, dict):
+        return {"raw": hashlib.sha256(raw).hexdigest()}
+
+    return {
+        key: hashlib.sha256(
+            json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+        for key, value in document.items()
+        if key not in VOLATILE_FIELDS
+    }
+
+
+def changed_sections(old, new):
+    if old == new:
+        return []
+
+    if old is None or new is None:
+        return ["file"]
+
+    return sorted(key for key in old.keys() | new.keys() if old.get(key) != new.get(key))
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    tmp_path = f"{STATE_PATH}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file, indent=2, sort_keys=True)
+
+    os.replace(tmp_path, STATE_PATH)
+
+
+def seed_state(state):
+    """Hash the data files git already has as committed; returns the ones it doesn't."""
+    files = [path for path in sorted(DATA_PATH.glob("*.json")) if path.name != MANIFEST_FILE_NAME]
+    unpublished = uncommitted_files(files)
+
+    # Only a file whose content is committed can be assumed to be published;
+    # anything written while we weren't running goes out as a startup batch.
+    for path in files:
+        if path.name not in state and path not in unpublished:
+            state[path.name] = section_hashes(path)
+
+    save_state(state)
+
+    return [path for path in files if path in unpublished]
+
+
+def gate_batch(files, state):
+    """Split a batch into {path: changed sections} and fresh hashes, dropping no-op rewrites."""
+    changes = {}
+    hashes = {}
+
+    for path in files:
+        new = section_hashes(path)
+        sections = changed_sections(state.get(path.name), new)
+
+        if sections:
+            changes[path] = sections
+            hashes[path.name] = new
+
+    return changes, hashes
+
+
+# =========================
+# METRICS
+# =========================
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def elapsed_ms(start, end):
+    return round((end - start) * 1000, 1)
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0
+
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(samples):
+    samples = list(samples)
+
+    return {
+        "samples": len(samples),
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "max_ms": max(samples, default=0)
+    }
+
+
+class PublishMetrics:
+    # Written by the publisher thread, read by the status endpoint.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = now_iso()
+        self.counters = {
+            "events": 0,
+            "batches": 0,
+            "skipped_rewrites": 0,
+            "commits": 0,
+            "commit_failures": 0,
+            "pushes": 0,
+            "push_failures": 0,
+            "push_retries": 0
+        }
+        self.event_to_commit = deque(maxlen=LATENCY_WINDOW)
+        self.commit_to_push = deque(maxlen=LATENCY_WINDOW)
+        self.event_to_push = deque(maxlen=LATENCY_WINDOW)
+        self.unpushed = {}  # file name -> (first event, commit) monotonic times
+        self.last_push = {}  # file name -> ISO time of its last successful push
+        self.last_error = None
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def failed(self, counter, error):
+        with self.lock:
+            self.counters[counter] += 1
+            self.last_error = {"at": now_iso(), "error": str(error)}
+
+    def committed(self, first_events, committed_at):
+        with self.lock:
+            self.counters["commits"] += 1
+
+            for name, seen in first_events.items():
+                self.event_to_commit.append(elapsed_ms(seen, committed_at))
+                # A file committed again before its push keeps its original event time.
+                self.unpushed.setdefault(name, (seen, committed_at))
+
+    def pushed(self, pushed_at, attempts):
+        """Record a successful push of everything unpushed; returns the commit->push latencies."""
+        with self.lock:
+            self.counters["pushes"] += 1
+            self.counters["push_retries"] += attempts - 1
+
+            pushed_iso = now_iso()
+            commit_latencies = []
+
+            for name, (seen, committed_at) in self.unpushed.items():
+                commit_latencies.append(elapsed_ms(committed_at, pushed_at))
+                self.event_to_push.append(elapsed_ms(seen, pushed_at))
+                self.last_push[name] = pushed_iso
+
+            self.commit_to_push.extend(commit_latencies)
+            self.unpushed = {}
+
+            return commit_latencies
+
+    def status(self):
+        with self.lock:
+            return {
+                "started_at": self.started,
+                "queue_depth": change_queue.qsize(),
+                "unpushed_files": sorted(self.unpushed),
+                "counters": dict(self.counters),
+                "latency": {
+                    "event_to_commit": latency_summary(self.event_to_commit),
+                    "commit_to_push": latency_summary(self.commit_to_push),
+                    "event_to_push": latency_summary(self.event_to_push)
+                },
+                "last_error": self.last_error,
+                "last_push": dict(sorted(self.last_push.items()))
+            }
+
+
+metrics = PublishMetrics()
+
+
+def append_metrics(record):
+    try:
+        METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+        if METRICS_PATH.exists() and METRICS_PATH.stat().st_size > METRICS_MAX_BYTES:
+            os.replace(METRICS_PATH, f"{METRICS_PATH}.1")
+
+        with open(METRICS_PATH, "a", encoding="utf-8") as metrics_file:
+            metrics_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print("Could not write metrics:", e)
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/status":
+            status, body = 200, metrics.status()
+        else:
+            status, body = 404, {"error": "not found"}
+
+        data = json.dumps(body, indent=2).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the console for publish messages.
+        pass
+
+
+def start_status_server():
+    if STATUS_PORT is None:
+        return None
+
+    try:
+        server = HTTPServer((STATUS_HOST, STATUS_PORT), StatusHandler)
+    except OSError as e:
+        print(f"Status endpoint disabled ({STATUS_HOST}:{STATUS_PORT}): {e}")
+        return None
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Status: http://{STATUS_HOST}:{STATUS_PORT}/status")
+
+    return server
+
+
+# =========================
+# GIT
+# =========================
+
+def git(*args, check=True):
+    return subprocess.run(["git", *args], cwd=REPO_PATH, check=check)
+
+
+def uncommitted_files(files):
+    """The files that are untracked or differ from HEAD (all of them before the first commit)."""
+    names = []
+
+    for args in (("diff", "--name-only", "-z", "HEAD"), ("ls-files", "-z", "--others", "--exclude-standard")):
+        result = subprocess.run(
+            ["git", *args, "--", *map(str, files)],
+            cwd=REPO_PATH, capture_output=True, text=True
         )
-        subprocess.run(["git", "push"], cwd=REPO_PATH, check=True)
-        print("Changes committed and pushed.")
-    except subprocess.CalledProcessError as e:
-        print("Git command failed:", e)
+
+        if result.returncode != 0:
+            return set(files)
+
+        names += [name for name in result.stdout.split("\0") if name]
+
+    return {REPO_PATH / name for name in names}
+
+
+def sibling_paths(files):
+    """Precompressed siblings of files that exist, or are tracked and were deleted."""
+    candidates = [
+        path.with_name(f"{path.name}.{encoding}")
+        for path in files
+        for encoding in COMPRESSED_ENCODINGS
+    ]
+
+    tracked = subprocess.run(
+        ["git", "ls-files", "-z", "--", *map(str, candidates)],
+        cwd=REPO_PATH, check=True, capture_output=True, text=True
+    ).stdout.split("\0")
+
+    tracked = {(REPO_PATH / name).resolve() for name in tracked if name}
+
+    return [path for path in candidates if path.exists() or path.resolve() in tracked]
+
+
+def commit_batch(changes):
+    files = sorted(changes)
+    paths = [str(path) for path in files + sibling_paths(files)] \
+        + [str(path) for path in MANIFEST_PATHS if path.exists()]
+
+    git("add", "--all", "--", *paths)
+
+    # Rewrites with identical content leave nothing staged; skip the commit.
+    if git("diff", "--cached", "--quiet", "--", *paths, check=False).returncode == 0:
+        return False
+
+    body = "\n".join(f"{path.stem}: {', '.join(changes[path])}" for path in files)
+
+    git("commit", "-m", commit_message(files), "-m", body, "--", *paths)
+    return True
+
+
+def push_with_retries():
+    """(pushed, attempts used)."""
+    delay = PUSH_BACKOFF
+
+    for attempt in range(1, PUSH_RETRIES + 1):
+        if git("push", check=False).returncode == 0:
+            return True, attempt
+
+        if attempt < PUSH_RETRIES:
+            print(f"Push failed (attempt {attempt}/{PUSH_RETRIES}), retrying in {delay:.0f}s...")
+            time.sleep(delay)
+            delay *= 2
+
+    return False, PUSH_RETRIES
+
+
+def publish_forever():
+    # Single worker: git never runs concurrently, one commit + push per batch.
+    state = load_state()
+
+    for path in seed_state(state):
+        change_queue.put((path, time.monotonic()))
+
+    # Catch the manifest up with files written while we weren't running;
+    # whatever it adds goes out with the first commit.
+    sync_manifest(DATA_PATH)
+
+    # Files from a batch that failed to commit ({path: time of first event}),
+    # and whether there are local commits a push hasn't taken yet.
+    pending = {}
+    unpushed = False
+
+    while True:
+        batch, events, started = next_batch(RETRY_INTERVAL if pending or unpushed else None)
+        collected = time.monotonic()
+
+        for path, seen in pending.items():
+            batch[path] = min(seen, batch.get(path, seen))
+            started = min(started, seen)
+
+        pending = {}
+
+        files = sorted(batch)
+        changes, hashes = gate_batch(files, state)
+
+        skipped = len(files) - len(changes)
+
+        metrics.count("events", events)
+        metrics.count("batches")
+        metrics.count("skipped_rewrites", skipped)
+
+        record = {
+            "at": now_iso(),
+            "events": events,
+            "files": len(files),
+            "changed": sorted(path.name for path in changes),
+            "skipped": skipped,
+            "batch_window_ms": elapsed_ms(started, collected),
+            "queue_depth": change_queue.qsize()
+        }
+
+        if skipped:
+            print(f"Ignored {skipped} rewrite(s) with no real changes.")
+
+        for path, sections in changes.items():
+            print(f"Detected change: {path.name} ({', '.join(sections)})")
+
+        committed = False
+
+        if changes:
+            try:
+                sync_manifest(DATA_PATH, [path.name for path in changes])
+                committed = commit_batch(changes)
+            except (OSError, subprocess.CalledProcessError) as e:
+                # Keep the batch; its hashes aren't saved, so it is gated and committed again.
+                pending = batch
+                print(f"Publish failed, retrying in {RETRY_INTERVAL:.0f}s:", e)
+                metrics.failed("commit_failures", e)
+                append_metrics({**record, "error": f"commit: {e}"})
+                continue
+
+            if committed:
+                committed_at = time.monotonic()
+                metrics.committed({path.name: batch[path] for path in changes}, committed_at)
+                record["event_to_commit_ms"] = max(elapsed_ms(batch[path], committed_at) for path in changes)
+
+            # Only remember hashes once the content is safely committed.
+            for name, new in hashes.items():
+                if new is None:
+                    state.pop(name, None)
+                else:
+                    state[name] = new
+
+            save_state(state)
+
+        if not committed and not unpushed:
+            print("No content changes, nothing to publish.")
+            append_metrics(record)
+            continue
+
+        pushed, attempts = push_with_retries()
+        unpushed = not pushed
+
+        record["push_attempts"] = attempts
+
+        if unpushed:
+            # The commit stays local and goes out with the next batch's push, or on the retry timer.
+            metrics.failed("push_failures", f"push failed after {attempts} attempts")
+            record["error"] = "push"
+            print(f"Push failed, will retry in {RETRY_INTERVAL:.0f}s or with the next batch.")
+        else:
+            pushed_at = time.monotonic()
+            record["commit_to_push_ms"] = max(metrics.pushed(pushed_at, attempts), default=0)
+
+            if batch:
+                record["event_to_push_ms"] = elapsed_ms(started, pushed_at)
+                print(f"Changes committed and pushed ({pushed_at - started:.1f}s after first change).")
+            else:
+                print("Pending commits pushed.")
+
+        append_metrics(record)
+
 
 if __name__ == "__main__":
+    publisher = threading.Thread(target=publish_forever, daemon=True)
+    publisher.start()
+
+    start_status_server()
+
     observer = Observer()
     handler = DataChangeHandler()
     observer.schedule(handler, str(DATA_PATH), recursive=False)